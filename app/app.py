@@ -1,32 +1,143 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from contextlib import asynccontextmanager
 import logging
-from typing import Optional, Dict
+from typing import AsyncIterator, Optional, Dict, List, Literal
 import time
+import os
+import asyncio
+import uuid
     
-from app.database import engine, Base, get_db, CryptocurrencyDB
-from app.schemas import CryptocurrencyCreate, CryptocurrencyUpdate, CryptocurrencyResponse
-from app.services.create_api_service import CoinGeckoService
+from app.startup import (
+    RUN_MIGRATIONS, StartupTimer, configure_logging, run_migrations, wait_for_database
+)
+from app.database import (
+    get_db, get_async_db, dispose_async_engine, upsert_cryptocurrencies,
+    bump_table_version, get_table_version, insert_price_snapshots, prune_price_history, bulk_update_prices,
+    get_refresh_checkpoint, save_refresh_checkpoint, clear_refresh_checkpoint, finish_create_jobs,
+    prune_create_jobs, fail_pending_create_jobs, SessionLocal, CreateJobDB, CryptocurrencyDB
+)
+from app.create_pipeline import (
+    CREATE_JOB_PENDING_TIMEOUT_SECONDS, CREATE_JOB_RETENTION_HOURS, CreatePipeline
+)
+from app.export import EXPORT_QUERIES, MEDIA_TYPES, arrow_available, export_filename, stream_export
+from app.metrics import RequestMetricsMiddleware, instrument_engines, record_data_freshness, record_refresh, render_metrics
+from app.leader import LEADER_CHECK_SECONDS, LeaderElection
+from app.history import HISTORY_MAX_BUCKETS, PRICE_HISTORY_RETENTION_DAYS, price_history_query
+from app.pagination import InvalidCursor, apply_keyset, next_cursor
+from app.refresh_scheduler import REFRESH_READS_FLUSH_SECONDS, REFRESH_TICK_SECONDS, TieredRefreshScheduler
+from app.streaming import price_broker, parse_symbols, serve_websocket, sse_events
+from app.quotes import QUOTES_MAX_LOOKUPS, QuoteSnapshot, quote_store
+from app.read_cache import PageCache, cache_headers, etag_matches, make_etag
+from app.serialization import dumps, encode_row, encode_rows, select_response_columns
+from app.schemas import (
+    CryptocurrencyCreate, CryptocurrencyUpdate, CryptocurrencyResponse, BulkCreateResponse, CreateJobResponse,
+    PriceHistoryBucket, QuoteResponse
+)
+from app.services.circuit_breaker import get_circuit_breaker
+from app.services.create_api_service import CoinGeckoService, get_coingecko_service
+from app.services.http_client import close_client_loop, close_session, get_client_loop
+from app.services.single_flight import single_flight_stats
 
-logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
-Base.metadata.create_all(bind=engine)
+page_cache = PageCache()
+startup = StartupTimer()
+
+async def prepare_worker() -> None:
+    """Wait for the database, migrate it and start the background jobs, timing each phase.
+
+    Runs after the server started listening, so /health answers meanwhile and
+    /ready reports 503 until it finished. Database statements are only timed
+    once the worker is ready, so startup does not pay for loading the metrics.
+
+    :return: None
+    """
+    try:
+        with startup.phase("database"):
+            await asyncio.to_thread(wait_for_database)
+        if RUN_MIGRATIONS:
+            with startup.phase("migrations"):
+                await asyncio.to_thread(run_migrations)
+        with startup.phase("background_jobs"):
+            start_background_jobs()
+    except Exception as e:
+        startup.fail(e)
+        return
+
+    startup.finish()
+    instrument_engines()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Prepare the worker in the background on startup and stop the background jobs on shutdown.
+
+    :param app: FastAPI, application.
+    :return: AsyncIterator, lifespan context.
+    """
+    configure_logging()
+    price_broker.bind(asyncio.get_running_loop())
+    startup.mark("import")
+    preparing = asyncio.create_task(prepare_worker())
+
+    yield
+
+    preparing.cancel()
+    stop_background_jobs()
+    create_pipeline.stop()
+    close_session()
+    close_client_loop()
+    await dispose_async_engine()
 
 app = FastAPI(
     title="Cryptocurrency API", 
-    description="CRUD operations for cryptocurrency records"
+    description="CRUD operations for cryptocurrency records",
+    lifespan=lifespan
 )
 
 @app.get("/health", status_code=200)
-def health_check():
-    """Health check endpoint for container healthchecks.
+def health_check(response: Response):
+    """Liveness probe for container healthchecks.
+
+    Answers while the worker is still starting; only a startup that failed makes it
+    unhealthy. The CoinGecko circuit state is informational; an open circuit does not
+    make the API unhealthy.
     
+    :param response: Response, used to set 503 after a failed startup.
     :return: Dict with status information
     """
-    return {"status": "healthy"}
+    if startup.error:
+        response.status_code = 503
+        return {"status": "unhealthy", "startup": startup.stats()}
+
+    return {"status": "healthy", "coingecko": get_circuit_breaker().stats(), "create_queue": create_pipeline.stats()}
+
+@app.get("/ready", status_code=200)
+def readiness_check(response: Response) -> Dict:
+    """Readiness probe: 503 until the database is reachable, migrated and the background jobs started.
+
+    :param response: Response, used to set 503 while not ready.
+    :return: Dict with readiness and the startup phase timings.
+    """
+    if not startup.ready:
+        response.status_code = 503
+    return startup.stats()
+
+app.add_middleware(RequestMetricsMiddleware)
+
+@app.get("/metrics")
+def metrics() -> Response:
+    """Expose request, CoinGecko, database and refresh metrics in the Prometheus text format.
+
+    :return: Response, Prometheus exposition.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
 def validate_cryptocurrency_with_coingecko(symbol: str) -> Optional[Dict]:
     """Validate cryptocurrency symbol using CoinGecko API.
@@ -34,105 +145,628 @@ def validate_cryptocurrency_with_coingecko(symbol: str) -> Optional[Dict]:
     :param symbol: str, cryptocurrency symbol to validate.
     :return: CoinGecko cryptocurrency details if valid, None otherwise.
     """
-    service = CoinGeckoService()
+    service = get_coingecko_service()
     return service.validate_cryptocurrency(symbol)
 
-def auto_refresh_cryptocurrencies() -> None:
+REFRESH_MODE = os.getenv("REFRESH_MODE", "batched")  # "batched" or "per_coin"
+REFRESH_SCHEDULE = os.getenv("REFRESH_SCHEDULE", "tiered")  # "tiered" or "sweep" (every row once a day)
+COIN_CATALOG_REFRESH_HOURS = float(os.getenv("COIN_CATALOG_REFRESH_HOURS", "24"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+REFRESH_BATCH_SIZE = int(os.getenv("REFRESH_BATCH_SIZE", "250"))
+REFRESH_CHECKPOINT_MAX_AGE_HOURS = float(os.getenv("REFRESH_CHECKPOINT_MAX_AGE_HOURS", "24"))
+
+def _price_snapshot(update: Dict) -> Dict:
+    """Build a price history row from a refreshed price.
+
+    :param update: Dict, refreshed row with id, current_price, market_cap and last_updated.
+    :return: Dict with price_history column values.
+    """
+    return {
+        'cryptocurrency_id': update['id'],
+        'ts': update['last_updated'],
+        'price': update['current_price'],
+        'market_cap': update['market_cap']
+    }
+
+def _fetch_market_data(service: CoinGeckoService, coingecko_ids: list[str]) -> Dict[str, Dict]:
+    """Fetch current prices for a batch of coins, according to REFRESH_MODE.
+
+    :param service: CoinGeckoService, service used for the API calls.
+    :param coingecko_ids: list[str], CoinGecko IDs to fetch.
+    :return: Dict mapping CoinGecko ID to details with current_price and market_cap.
+    """
+    if REFRESH_MODE != "per_coin":
+        # one loop and client for all batches and runs, keeping CoinGecko connections pooled
+        return get_client_loop().run(lambda client: service.get_market_data_async(coingecko_ids, client=client))
+
+    market_data = {}
+    for coingecko_id in coingecko_ids:
+        try:
+            details = service.get_cryptocurrency_details(coingecko_id, use_cache=False)
+        except Exception as e:
+            logger.error(f"Error fetching {coingecko_id}: {e}")
+            continue
+        if details:
+            market_data[coingecko_id] = details
+
+    return market_data
+
+def _refresh_batch(db: Session, service: CoinGeckoService, coins: list, checkpoint_started_at: Optional[float]) -> Dict:
+    """Fetch and write one batch of coins in a single transaction.
+
+    :param db: Session, database session.
+    :param service: CoinGeckoService, service used for the API calls.
+    :param coins: list, rows with id, symbol and coingecko_id, ordered by id.
+    :param checkpoint_started_at: float, optional, start of the full run to checkpoint, None to skip checkpointing.
+    :return: Dict with coins, updated, failed, failed_ids, fetch_seconds, write_seconds and committed.
+    """
+    started = time.perf_counter()
+    market_data = _fetch_market_data(service, [coin.coingecko_id for coin in coins])
+    fetched = time.perf_counter()
+
+    now = time.time()
+    updates = []
+    for coin in coins:
+        details = market_data.get(coin.coingecko_id)
+
+        if not details:
+            logger.error(f"No market data returned for {coin.symbol}")
+            continue
+
+        updates.append({
+            'id': coin.id,
+            'current_price': details.get('current_price'),
+            'market_cap': details.get('market_cap'),
+            'last_updated': now
+        })
+
+    committed = True
+    try:
+        bulk_update_prices(db, updates)
+        insert_price_snapshots(db, [_price_snapshot(update) for update in updates])
+        if checkpoint_started_at is not None:
+            save_refresh_checkpoint(db, checkpoint_started_at, coins[-1].id)
+        bump_table_version(db, changed_ids=[update['id'] for update in updates])
+        db.commit()
+
+    except Exception as e:
+        logger.error(f"Error committing refresh batch: {e}")
+        db.rollback()
+        updates, committed = [], False
+
+    return {
+        'coins': len(coins),
+        'updated': len(updates),
+        'failed': len(coins) - len(updates),
+        'failed_ids': sorted({coin.id for coin in coins} - {update['id'] for update in updates}),
+        'fetch_seconds': round(fetched - started, 3),
+        'write_seconds': round(time.perf_counter() - fetched, 3),
+        'committed': committed
+    }
+
+def auto_refresh_cryptocurrencies(cryptocurrency_ids: Optional[list[int]] = None) -> Dict:
     """Automatically refresh cryptocurrency data in the database.
 
+    Coins are written in REFRESH_BATCH_SIZE batches, one transaction each. A full
+    refresh checkpoints the last written ID with every batch, so a run that was
+    interrupted resumes after that ID instead of starting over.
+
+    :param cryptocurrency_ids: list[int], optional, IDs to refresh; every CoinGecko-backed row when omitted.
+    :return: Dict with refresh statistics (mode, coins, updated, failed, failed_ids, api_calls, duration, batches).
+    """
+    logger.info(f"Starting automatic cryptocurrency data refresh ({REFRESH_MODE})")
+    started = time.perf_counter()
+    service = get_coingecko_service()
+    calls_before = service.request_count
+    full_run = cryptocurrency_ids is None
+    run_started_at, resumed_after = time.time(), None
+    batches = []
+    db = next(get_db())
+
+    try:
+        query = select(CryptocurrencyDB.id, CryptocurrencyDB.symbol, CryptocurrencyDB.coingecko_id).where(
+            CryptocurrencyDB.coingecko_id.isnot(None)
+        ).order_by(CryptocurrencyDB.id)
+
+        if not full_run:
+            query = query.where(CryptocurrencyDB.id.in_(cryptocurrency_ids))
+        else:
+            checkpoint = get_refresh_checkpoint(db)
+            if checkpoint and time.time() - checkpoint.updated_at < REFRESH_CHECKPOINT_MAX_AGE_HOURS * 3600:
+                run_started_at, resumed_after = checkpoint.started_at, checkpoint.last_id
+                query = query.where(CryptocurrencyDB.id > resumed_after)
+                logger.info(f"Resuming interrupted refresh after ID {resumed_after}")
+
+        coins = db.execute(query).all()
+
+        for offset in range(0, len(coins), REFRESH_BATCH_SIZE):
+            batch = _refresh_batch(
+                db, service, coins[offset:offset + REFRESH_BATCH_SIZE], run_started_at if full_run else None
+            )
+            batches.append(batch)
+            logger.info(
+                f"Refresh batch {len(batches)}: {batch['updated']}/{batch['coins']} updated, "
+                f"fetch {batch['fetch_seconds']}s, write {batch['write_seconds']}s"
+            )
+            if not batch['committed']:
+                break  # stop at the checkpoint; the next run resumes from there
+
+        if full_run and all(batch['committed'] for batch in batches):
+            clear_refresh_checkpoint(db)
+            db.commit()
+
+        # measured once per run here rather than on every /metrics scrape
+        record_data_freshness(*db.execute(
+            select(func.min(CryptocurrencyDB.last_updated), func.avg(CryptocurrencyDB.last_updated)).where(
+                CryptocurrencyDB.coingecko_id.isnot(None)
+            )
+        ).one())
+
+    finally:
+        db.close()
+
+    failed_ids = [coin.id for coin in coins[sum(batch['coins'] for batch in batches):]]  # after a failed commit
+    for batch in batches:
+        failed_ids.extend(batch.pop('failed_ids'))
+
+    stats = {
+        'mode': REFRESH_MODE,
+        'coins': len(coins),
+        'resumed_after': resumed_after,
+        'api_calls': service.request_count - calls_before,
+        'duration': round(time.perf_counter() - started, 3),
+        'updated': sum(batch['updated'] for batch in batches),
+        'failed': len(coins) - sum(batch['updated'] for batch in batches),
+        'failed_ids': sorted(failed_ids),
+        'batches': batches
+    }
+    record_refresh(stats)
+    logger.info(
+        f"Cryptocurrency data refresh completed: {stats['updated']}/{stats['coins']} updated, "
+        f"{stats['api_calls']} API calls in {stats['duration']}s"
+    )
+    return stats
+
+def resume_interrupted_refresh() -> None:
+    """Finish a full refresh that was interrupted, if its checkpoint is recent enough.
+
     :return: None
     """
-    logger.info("Starting automatic cryptocurrency data refresh")
     db = next(get_db())
-    
+
     try:
-        cryptocurrencies = db.query(CryptocurrencyDB).all()
-        
-        for crypto in cryptocurrencies:
-            try:
-                if crypto.coingecko_id:
-                    service = CoinGeckoService()
-                    details = service.get_cryptocurrency_details(crypto.coingecko_id)
-                    
-                    if details:
-                        crypto.current_price = details.get('current_price')
-                        crypto.market_cap = details.get('market_cap')
-                        crypto.last_updated = time.time()
-                        
-                        db.commit()
-                        logger.info(f"Updated {crypto.symbol} with new details")
-            
-            except Exception as e:
-                logger.error(f"Error updating {crypto.symbol}: {e}")
-                db.rollback()
-        
-        logger.info("Cryptocurrency data refresh completed")
+        checkpoint = get_refresh_checkpoint(db)
+    finally:
+        db.close()
+
+    if checkpoint and time.time() - checkpoint.updated_at < REFRESH_CHECKPOINT_MAX_AGE_HOURS * 3600:
+        auto_refresh_cryptocurrencies()
+
+def load_coin_catalog() -> None:
+    """Load the local coin catalog, refreshing it if missing or stale.
+
+    Only the leader fetches a stale catalog; other workers reload the file it saved.
+
+    :return: None
+    """
+    service = get_coingecko_service()
     
+    if service.ensure_catalog() and service.catalog.is_stale:
+        if leader.is_leader:
+            service.refresh_catalog()
+        else:
+            service.catalog.load()
+
+def prune_price_history_job() -> None:
+    """Delete price history older than PRICE_HISTORY_RETENTION_DAYS.
+
+    :return: None
+    """
+    db = next(get_db())
+
+    try:
+        deleted = prune_price_history(db, PRICE_HISTORY_RETENTION_DAYS)
+        db.commit()
+        logger.info(f"Pruned {deleted} price history rows")
+    except Exception as e:
+        logger.error(f"Error pruning price history: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def expire_create_jobs() -> None:
+    """Fail pending create jobs older than CREATE_JOB_PENDING_TIMEOUT_SECONDS.
+
+    Queued jobs only live in the memory of the worker that accepted them, so
+    jobs that stay pending this long were lost with it (crash, deploy or
+    scale-down) and would otherwise be polled forever.
+
+    :return: None
+    """
+    db = SessionLocal()
+
+    try:
+        expired = fail_pending_create_jobs(
+            db,
+            "Create was interrupted before it was processed, please retry",
+            created_before=time.time() - CREATE_JOB_PENDING_TIMEOUT_SECONDS
+        )
+        db.commit()
+        if expired:
+            logger.warning(f"Failed {expired} interrupted create jobs")
+    except Exception as e:
+        logger.error(f"Error expiring create jobs: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def prune_create_jobs_job() -> None:
+    """Fail interrupted create jobs and delete finished ones older than CREATE_JOB_RETENTION_HOURS.
+
+    :return: None
+    """
+    expire_create_jobs()
+    db = next(get_db())
+
+    try:
+        deleted = prune_create_jobs(db, CREATE_JOB_RETENTION_HOURS * 3600)
+        db.commit()
+        logger.info(f"Pruned {deleted} finished create jobs")
+    except Exception as e:
+        logger.error(f"Error pruning create jobs: {e}")
+        db.rollback()
     finally:
         db.close()
 
-scheduler = BackgroundScheduler()
-scheduler.add_job(
-    auto_refresh_cryptocurrencies, 
-    IntervalTrigger(hours=24)  # run every 24 hours
+refresh_scheduler = TieredRefreshScheduler(
+    auto_refresh_cryptocurrencies,
+    coins_per_call=1 if REFRESH_MODE == "per_coin" else CoinGeckoService.MARKETS_BATCH_SIZE
 )
 
-@app.on_event("startup")
-async def startup_event() -> None:
-    """Start the background scheduler when the application starts.
+leader = LeaderElection()
+
+def leader_election_job() -> None:
+    """Acquire or confirm leadership of the background jobs for this worker.
 
     :return: None
     """
+    was_leader = leader.is_leader
+
+    if not leader.check() or was_leader:
+        return
+
+    scheduler.add_job(expire_create_jobs)  # jobs queued by a worker that went away are never processed
+    if REFRESH_SCHEDULE == "sweep":
+        scheduler.add_job(resume_interrupted_refresh)  # pick up a run the previous leader did not finish
+    else:
+        refresh_scheduler.sync()  # a previous leader may have refreshed coins since this queue was built
+
+scheduler: Optional[BackgroundScheduler] = None
+
+def create_scheduler() -> BackgroundScheduler:
+    """Build the scheduler of the background jobs.
+
+    Every worker runs the scheduler, but refresh and pruning only run in the elected leader.
+
+    :return: BackgroundScheduler, scheduler with all jobs added, not started.
+    """
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        leader_election_job,
+        IntervalTrigger(seconds=LEADER_CHECK_SECONDS)
+    )
+    if REFRESH_SCHEDULE == "sweep":
+        scheduler.add_job(
+            leader.leader_only(auto_refresh_cryptocurrencies), 
+            IntervalTrigger(hours=24)  # run every 24 hours
+        )
+    else:
+        scheduler.add_job(
+            leader.leader_only(refresh_scheduler.tick),
+            IntervalTrigger(seconds=REFRESH_TICK_SECONDS)
+        )
+        scheduler.add_job(
+            refresh_scheduler.flush_reads,  # every worker counts reads, the leader's sync sums them
+            IntervalTrigger(seconds=REFRESH_READS_FLUSH_SECONDS)
+        )
+    scheduler.add_job(
+        load_coin_catalog,
+        IntervalTrigger(hours=COIN_CATALOG_REFRESH_HOURS)
+    )
+    scheduler.add_job(
+        leader.leader_only(prune_price_history_job),
+        IntervalTrigger(hours=24)
+    )
+    scheduler.add_job(
+        leader.leader_only(prune_create_jobs_job),
+        IntervalTrigger(hours=1)
+    )
+    scheduler.add_job(leader_election_job)  # elect a leader right away instead of after the first interval
+    scheduler.add_job(load_coin_catalog)  # load the coin catalog once, without blocking startup
+    return scheduler
+
+def start_background_jobs() -> None:
+    """Start the background scheduler.
+
+    :return: None
+    """
+    global scheduler
+
+    scheduler = create_scheduler()
     scheduler.start()
+    quote_store.start()
     logger.info("Cryptocurrency auto-refresh scheduler started")
 
-@app.on_event("shutdown")
-async def shutdown_event() -> None:
-    """Shutdown the background scheduler when the application stops.
+def stop_background_jobs() -> None:
+    """Shutdown the background scheduler and the quote snapshot watcher, and give up leadership.
+
+    :return: None
+    """
+    if scheduler is not None and scheduler.running:
+        scheduler.shutdown()
+        logger.info("Cryptocurrency auto-refresh scheduler stopped")
+    if REFRESH_SCHEDULE != "sweep":
+        refresh_scheduler.flush_reads()
+    quote_store.stop()
+    leader.release()
+
+@app.get("/cache/stats")
+def cache_stats() -> Dict:
+    """Return hit/miss/eviction counters of the CoinGecko response cache.
+
+    single_flight reports, per layer, the calls made and the calls saved by
+    joining an identical call already in flight; quotes reports the in-memory
+    quote snapshot.
+
+    :return: Dict with cache counters.
+    """
+    stats = get_coingecko_service().cache.stats()
+    stats['single_flight'] = single_flight_stats()
+    stats['quotes'] = quote_store.stats()
+    return stats
+
+@app.get("/refresh/stats")
+def refresh_stats() -> Dict:
+    """Return the tiered refresh queue size, coins per tier and the last tick's stats.
+
+    :return: Dict with refresh scheduler stats.
+    """
+    return {'schedule': REFRESH_SCHEDULE, 'leader': leader.is_leader, **refresh_scheduler.stats()}
+
+def validation_error(symbol: str) -> HTTPException:
+    """Build the error for a cryptocurrency that could not be validated.
+
+    :param symbol: str, requested symbol.
+    :return: HTTPException, 503 while the CoinGecko circuit is open, 400 otherwise.
+    """
+    breaker = get_circuit_breaker()
+    if breaker.is_open:
+        return HTTPException(
+            status_code=503,
+            detail="CoinGecko is unavailable, retry later or provide current price and market cap",
+            headers={"Retry-After": str(max(1, round(breaker.retry_after())))}
+        )
+    return HTTPException(status_code=400, detail=f"Cryptocurrency symbol {symbol} not found or invalid")
+
+def respond_async(prefer: Optional[str]) -> bool:
+    """Whether a create should be validated in the background.
+
+    :param prefer: str, optional, Prefer request header.
+    :return: bool, True only for Prefer: respond-async, so clients expecting a 200 keep getting one.
+    """
+    return bool(prefer) and "respond-async" in {token.strip().lower() for token in prefer.split(",")}
 
+def job_body(job: CreateJobDB) -> Dict:
+    """Serialize a create job.
+
+    :param job: CreateJobDB, create job.
+    :return: Dict with the CreateJobResponse fields.
+    """
+    return {field: getattr(job, field) for field in CreateJobResponse.__fields__}
+
+def process_create_jobs(jobs: List[Dict]) -> None:
+    """Validate and insert a batch of queued creates, recording every job's outcome.
+
+    CoinGecko-backed requests share one validate_cryptocurrencies call. Rows go
+    live in a single transaction together with their job outcomes; if that
+    fails, each row is retried in its own transaction.
+
+    :param jobs: List[Dict], jobs with id and payload (a CryptocurrencyCreate dict).
     :return: None
     """
-    scheduler.shutdown()
-    logger.info("Cryptocurrency auto-refresh scheduler stopped")
+    outcomes: Dict[str, Dict] = {}
+    rows: Dict[str, Dict] = {}
+
+    def fail(job_id: str, error: str) -> None:
+        outcomes[job_id] = {'id': job_id, 'status': 'failed', 'cryptocurrency_id': None, 'error': error}
+
+    requested = [(job['id'], CryptocurrencyCreate(**job['payload'])) for job in jobs]
+    coingecko_items = [(job_id, cryptocurrency) for job_id, cryptocurrency in requested if cryptocurrency.coingecko_id]
+    validated = get_coingecko_service().validate_cryptocurrencies([
+        {
+            'symbol': cryptocurrency.symbol,
+            'current_price': cryptocurrency.current_price,
+            'market_cap': cryptocurrency.market_cap,
+            'coingecko_id': cryptocurrency.coingecko_id
+        }
+        for _, cryptocurrency in coingecko_items
+    ]) if coingecko_items else []
+    validated_by_job = {job_id: details for (job_id, _), details in zip(coingecko_items, validated)}
+
+    for job_id, cryptocurrency in requested:
+        if cryptocurrency.coingecko_id:
+            details = validated_by_job[job_id]
+            if not details:
+                fail(job_id, validation_error(cryptocurrency.symbol).detail)
+                continue
+            row = {key: details[key] for key in ('name', 'symbol', 'coingecko_id', 'current_price', 'market_cap')}
+        else:
+            row = {
+                'name': cryptocurrency.name,
+                'symbol': cryptocurrency.symbol,
+                'coingecko_id': None,
+                'current_price': cryptocurrency.current_price,
+                'market_cap': cryptocurrency.market_cap
+            }
+        rows[job_id] = {**row, 'pinned': cryptocurrency.pinned}
+
+    db = SessionLocal()
+
+    def insert(job_ids: List[str]) -> None:
+        cryptos = {job_id: CryptocurrencyDB(**rows[job_id]) for job_id in job_ids}
+        db.add_all(cryptos.values())
+        db.flush()
+        if cryptos:
+            bump_table_version(db, changed_ids=[crypto.id for crypto in cryptos.values()])
+        for job_id, crypto in cryptos.items():
+            outcomes[job_id] = {'id': job_id, 'status': 'succeeded', 'cryptocurrency_id': crypto.id, 'error': None}
+
+    try:
+        existing = db.query(CryptocurrencyDB.symbol, CryptocurrencyDB.name).filter(
+            CryptocurrencyDB.symbol.in_({row['symbol'] for row in rows.values()}) |
+            CryptocurrencyDB.name.in_({row['name'] for row in rows.values()})
+        ).all() if rows else []
+        taken_symbols = {crypto.symbol for crypto in existing}
+        taken_names = {crypto.name for crypto in existing}
+
+        for job_id, row in list(rows.items()):
+            if row['symbol'] in taken_symbols or row['name'] in taken_names:
+                fail(job_id, f"Cryptocurrency with symbol {row['symbol']} already exists")
+                del rows[job_id]
+                continue
+            taken_symbols.add(row['symbol'])
+            taken_names.add(row['name'])
+
+        try:
+            insert(list(rows))
+            finish_create_jobs(db, list(outcomes.values()))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Batched create of {len(rows)} rows failed, retrying one by one: {e}")
+
+            for job_id in rows:
+                try:
+                    insert([job_id])
+                    finish_create_jobs(db, [outcomes[job_id]])
+                    db.commit()
+                except Exception as row_error:
+                    db.rollback()
+                    logger.error(f"Error creating cryptocurrency {rows[job_id]['symbol']}: {row_error}")
+                    fail(job_id, "Internal server error")
+
+            finish_create_jobs(db, [outcome for outcome in outcomes.values() if outcome['status'] == 'failed'])
+            db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error processing {len(jobs)} create jobs: {e}")
+        for job_id, _ in requested:
+            if outcomes.get(job_id, {}).get('status') != 'succeeded':
+                fail(job_id, "Internal server error")
+        finish_create_jobs(db, [outcome for outcome in outcomes.values() if outcome['status'] == 'failed'])
+        db.commit()
+    finally:
+        db.close()
+
+def fail_create_jobs(jobs: List[Dict], error: str) -> None:
+    """Mark queued create jobs failed, unless they already finished.
+
+    :param jobs: List[Dict], jobs with id.
+    :param error: str, error reported to clients polling the jobs.
+    :return: None
+    """
+    db = SessionLocal()
+
+    try:
+        fail_pending_create_jobs(db, error, job_ids=[job['id'] for job in jobs])
+        db.commit()
+    finally:
+        db.close()
+
+create_pipeline = CreatePipeline(process_create_jobs, fail_create_jobs)
+
+def submit_create_job(cryptocurrency: CryptocurrencyCreate, db: Session) -> JSONResponse:
+    """Record a create job and queue it for background validation.
+
+    :param cryptocurrency: CryptocurrencyCreate, cryptocurrency details.
+    :param db: Session, database session.
+    :exception: HTTPException 503 if the create queue is full.
+    :return: JSONResponse, 202 with the job and its status URL in Location.
+    """
+    now = time.time()
+    job = CreateJobDB(
+        id=uuid.uuid4().hex,
+        status="pending",
+        symbol=cryptocurrency.symbol,
+        payload=cryptocurrency.dict(),
+        created_at=now,
+        updated_at=now
+    )
+    db.add(job)
+    db.commit()
+
+    if not create_pipeline.submit({'id': job.id, 'payload': job.payload}):
+        finish_create_jobs(db, [{'id': job.id, 'status': 'failed', 'cryptocurrency_id': None, 'error': "Create queue is full"}])
+        db.commit()
+        raise HTTPException(status_code=503, detail="Too many pending creates, retry later", headers={"Retry-After": "5"})
+
+    return JSONResponse(
+        status_code=202,
+        content=job_body(job),
+        headers={"Location": f"/cryptocurrencies/jobs/{job.id}"}
+    )
 
-@app.post("/cryptocurrencies/", response_model=CryptocurrencyResponse)
+@app.post(
+    "/cryptocurrencies/", 
+    response_model=CryptocurrencyResponse,
+    responses={202: {'model': CreateJobResponse, 'description': "Accepted for background validation"}}
+)
 def create_cryptocurrency(
     cryptocurrency: CryptocurrencyCreate, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    prefer: Optional[str] = Header(None)
 ) -> CryptocurrencyDB:
     """Create a new cryptocurrency.
 
+    With Prefer: respond-async the request is queued
+    instead: the response is 202 with a job to poll at
+    /cryptocurrencies/jobs/{job_id}, and the row goes live once it is validated.
+
     :param cryptocurrency: CryptocurrencyCreate, cryptocurrency details.
     :param db: Session, database session.
+    :param prefer: str, optional, Prefer request header.
     :return: CryptocurrencyDB, created cryptocurrency.
     """
+    if not cryptocurrency.coingecko_id and not (cryptocurrency.current_price and cryptocurrency.market_cap):
+        raise HTTPException(
+            status_code=400, 
+            detail="Custom cryptocurrencies must provide current price and market cap"
+        )
+
+    if respond_async(prefer):
+        return submit_create_job(cryptocurrency, db)
+
     try:
         if not cryptocurrency.coingecko_id:
-            if not (cryptocurrency.current_price and cryptocurrency.market_cap):
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Custom cryptocurrencies must provide current price and market cap"
-                )
-            
             new_crypto = CryptocurrencyDB(
                 name=cryptocurrency.name,
                 symbol=cryptocurrency.symbol,
                 current_price=cryptocurrency.current_price,
-                market_cap=cryptocurrency.market_cap
+                market_cap=cryptocurrency.market_cap,
+                pinned=cryptocurrency.pinned
             )
         else:
-            service = CoinGeckoService()
+            service = get_coingecko_service()
             validated_crypto = service.validate_cryptocurrency(
                 symbol=cryptocurrency.symbol, 
                 current_price=cryptocurrency.current_price, 
-                market_cap=cryptocurrency.market_cap
+                market_cap=cryptocurrency.market_cap,
+                coingecko_id=cryptocurrency.coingecko_id
             )
             
             if not validated_crypto:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Cryptocurrency symbol {cryptocurrency.symbol} not found or invalid"
-                )
+                raise validation_error(cryptocurrency.symbol)
             
             existing_crypto = db.query(CryptocurrencyDB).filter(
                 (CryptocurrencyDB.symbol == validated_crypto['symbol']) | 
@@ -150,10 +784,13 @@ def create_cryptocurrency(
                 symbol=validated_crypto['symbol'],
                 coingecko_id=validated_crypto.get('coingecko_id'),
                 current_price=validated_crypto['current_price'],
-                market_cap=validated_crypto['market_cap']
+                market_cap=validated_crypto['market_cap'],
+                pinned=cryptocurrency.pinned
             )
         
         db.add(new_crypto)
+        db.flush()
+        bump_table_version(db, changed_ids=[new_crypto.id])
         db.commit()
         db.refresh(new_crypto)
         
@@ -165,39 +802,308 @@ def create_cryptocurrency(
         logger.error(f"Error creating cryptocurrency: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@app.get("/cryptocurrencies/", response_model=list[CryptocurrencyResponse])
-def list_cryptocurrencies(
-    skip: int = 0, 
-    limit: int = 100, 
+@app.get("/cryptocurrencies/jobs/{job_id}", response_model=CreateJobResponse)
+def get_create_job(job_id: str, db: Session = Depends(get_db)) -> CreateJobDB:
+    """Return the status of an asynchronous create.
+
+    :param job_id: str, job ID returned by POST /cryptocurrencies/.
+    :param db: Session, database session.
+    :return: CreateJobDB, create job.
+    """
+    job = db.get(CreateJobDB, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Create job not found")
+    return job
+
+@app.post("/cryptocurrencies/bulk", response_model=BulkCreateResponse)
+def bulk_upsert_cryptocurrencies(
+    cryptocurrencies: list[CryptocurrencyCreate], 
     db: Session = Depends(get_db)
-) -> list[CryptocurrencyDB]:
-    """Retrieve a list of cryptocurrencies with optional pagination.
+) -> Dict:
+    """Create or update many cryptocurrencies in one request.
+
+    CoinGecko-backed items are validated together in batched lookups and all
+    accepted items are written with a single upsert keyed on symbol.
+
+    :param cryptocurrencies: list[CryptocurrencyCreate], cryptocurrency details.
+    :param db: Session, database session.
+    :return: Dict with created/updated/rejected counts and per-item results.
+    """
+    if len(cryptocurrencies) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, 
+            detail=f"At most {BULK_MAX_ITEMS} cryptocurrencies can be created per request"
+        )
+
+    coingecko_items = [
+        (index, cryptocurrency) for index, cryptocurrency in enumerate(cryptocurrencies) 
+        if cryptocurrency.coingecko_id
+    ]
+    validated = get_coingecko_service().validate_cryptocurrencies([
+        {
+            'symbol': cryptocurrency.symbol,
+            'current_price': cryptocurrency.current_price,
+            'market_cap': cryptocurrency.market_cap,
+            'coingecko_id': cryptocurrency.coingecko_id
+        }
+        for _, cryptocurrency in coingecko_items
+    ])
+    validated_by_index = {index: details for (index, _), details in zip(coingecko_items, validated)}
+
+    results: list[Dict] = []
+    accepted: Dict[int, Dict] = {}
+
+    for index, cryptocurrency in enumerate(cryptocurrencies):
+        if cryptocurrency.coingecko_id:
+            details = validated_by_index[index]
+            if not details:
+                results.append({
+                    'index': index, 'symbol': cryptocurrency.symbol, 'status': 'rejected',
+                    'reason': f"Cryptocurrency symbol {cryptocurrency.symbol} not found or invalid"
+                })
+                continue
+            row = {key: details[key] for key in ('name', 'symbol', 'coingecko_id', 'current_price', 'market_cap')}
+            row['last_updated'] = time.time()
+            row.update(cryptocurrency.dict(include={'pinned'}, exclude_unset=True))
+        else:
+            # only the fields the client sent, so an update keeps the others (pinned, coingecko_id, ...)
+            row = cryptocurrency.dict(exclude={'coingecko_id'}, exclude_unset=True)
+
+        results.append({'index': index, 'symbol': row['symbol'], 'status': None})
+        accepted[index] = row
 
+    existing = db.query(CryptocurrencyDB).filter(
+        CryptocurrencyDB.symbol.in_({row['symbol'] for row in accepted.values()}) |
+        CryptocurrencyDB.name.in_({row['name'] for row in accepted.values()}) |
+        CryptocurrencyDB.coingecko_id.in_({row['coingecko_id'] for row in accepted.values() if row.get('coingecko_id')})
+    ).all() if accepted else []
+    owners = {
+        'name': {crypto.name: crypto.symbol for crypto in existing},
+        'coingecko_id': {crypto.coingecko_id: crypto.symbol for crypto in existing if crypto.coingecko_id}
+    }
+    existing_symbols = {crypto.symbol for crypto in existing}
+    requested_symbols = set()
+
+    for result in results:
+        row = accepted.get(result['index'])
+        if row is None:
+            continue
+
+        if row['symbol'] in requested_symbols:
+            reason = f"Duplicate symbol {row['symbol']} in request"
+        else:
+            conflict = next(
+                (
+                    column for column in ('name', 'coingecko_id') 
+                    if row.get(column) and owners[column].get(row[column], row['symbol']) != row['symbol']
+                ),
+                None
+            )
+            reason = conflict and f"Cryptocurrency with {conflict} {row[conflict]} already exists"
+
+        if reason:
+            result.update(status='rejected', reason=reason)
+            del accepted[result['index']]
+            continue
+
+        requested_symbols.add(row['symbol'])
+        for column in ('name', 'coingecko_id'):
+            if row.get(column):
+                owners[column][row[column]] = row['symbol']
+
+    try:
+        ids = upsert_cryptocurrencies(db, list(accepted.values()))
+        bump_table_version(db, changed_ids=ids.values())
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error bulk creating cryptocurrencies: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    for result in results:
+        if result['status'] is None:
+            result['id'] = ids.get(result['symbol'])
+            result['status'] = 'updated' if result['symbol'] in existing_symbols else 'created'
+
+    return {
+        'created': sum(result['status'] == 'created' for result in results),
+        'updated': sum(result['status'] == 'updated' for result in results),
+        'rejected': sum(result['status'] == 'rejected' for result in results),
+        'results': results
+    }
+
+@app.get("/cryptocurrencies/", response_model=list[CryptocurrencyResponse])
+async def list_cryptocurrencies(
+    request: Request,
+    skip: int = Query(0, ge=0, description="Offset pagination, prefer cursor for deep pages"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    sort_by: Literal['id', 'market_cap', 'current_price', 'last_updated', 'symbol'] = 'id',
+    order: Literal['asc', 'desc'] = 'asc',
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_market_cap: Optional[float] = None,
+    max_market_cap: Optional[float] = None,
+    stale_after: Optional[float] = Query(None, ge=0, description="Only rows not refreshed in this many seconds"),
+    db: AsyncSession = Depends(get_async_db)
+) -> Response:
+    """Retrieve a list of cryptocurrencies with filtering, sorting and pagination.
+
+    Pages are ordered by (sort_by, id). When more rows follow, the cursor for
+    the next page is returned in the X-Next-Cursor header. Responses carry an
+    ETag derived from the table version; a matching If-None-Match gets a 304,
+    and serialized pages are cached until the next write.
+
+    :param request: Request, incoming request, used for conditional GET.
     :param skip: int, number of records to skip.
     :param limit: int, number of records to return.
-    :param db: Session, database session.
-    :return: list[CryptocurrencyDB], list of cryptocurrencies.
+    :param cursor: str, optional, opaque cursor from the previous page.
+    :param sort_by: str, column to sort by.
+    :param order: str, "asc" or "desc".
+    :param min_price: float, optional, minimum current price.
+    :param max_price: float, optional, maximum current price.
+    :param min_market_cap: float, optional, minimum market cap.
+    :param max_market_cap: float, optional, maximum market cap.
+    :param stale_after: float, optional, only rows last updated more than this many seconds ago (or never).
+    :param db: AsyncSession, async database session.
+    :return: Response, JSON list of cryptocurrencies.
     """
-    cryptocurrencies = db.query(CryptocurrencyDB).offset(skip).limit(limit).all()
-    return cryptocurrencies
+    version, updated_at = await get_table_version(db)
+    page_key = str(sorted(request.query_params.multi_items()))
+    cacheable = stale_after is None  # staleness filters depend on the clock, not only on writes
+    headers = cache_headers(make_etag(version, page_key), updated_at) if cacheable else {}
+
+    if cacheable:
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        page = page_cache.get(version, page_key)
+        if page is not None:
+            body, page_headers = page
+            return Response(content=body, media_type="application/json", headers={**headers, **page_headers})
+
+    query = select_response_columns()
+
+    if min_price is not None:
+        query = query.where(CryptocurrencyDB.current_price >= min_price)
+    if max_price is not None:
+        query = query.where(CryptocurrencyDB.current_price <= max_price)
+    if min_market_cap is not None:
+        query = query.where(CryptocurrencyDB.market_cap >= min_market_cap)
+    if max_market_cap is not None:
+        query = query.where(CryptocurrencyDB.market_cap <= max_market_cap)
+    if stale_after is not None:
+        query = query.where(
+            (CryptocurrencyDB.last_updated < time.time() - stale_after) |
+            CryptocurrencyDB.last_updated.is_(None)
+        )
+
+    try:
+        query = apply_keyset(query, sort_by, order, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = await db.execute(query.offset(skip).limit(limit + 1))
+    cryptocurrencies = result.all()
+
+    page_headers = {}
+    if len(cryptocurrencies) > limit:
+        cryptocurrencies = cryptocurrencies[:limit]
+        page_headers["X-Next-Cursor"] = next_cursor(cryptocurrencies[-1], sort_by, order)
+
+    body = encode_rows(cryptocurrencies)
+    if cacheable:
+        page_cache.set(version, page_key, body, page_headers)
+
+    return Response(content=body, media_type="application/json", headers={**headers, **page_headers})
+
+@app.get("/cryptocurrencies/export")
+async def export_cryptocurrencies(
+    format: Literal['ndjson', 'csv', 'arrow'] = 'ndjson',
+    dataset: Literal['cryptocurrencies', 'price_history'] = 'cryptocurrencies'
+) -> StreamingResponse:
+    """Stream every cryptocurrency, or the full price history, as NDJSON, CSV or Arrow IPC.
+
+    Rows are read through a server-side cursor in EXPORT_BATCH_SIZE batches and
+    encoded batch by batch, so memory use does not grow with the table size.
+
+    :param format: str, export format.
+    :param dataset: str, table to export.
+    :return: StreamingResponse, exported rows.
+    """
+    if format == 'arrow' and not arrow_available():
+        raise HTTPException(status_code=501, detail="Arrow export requires the pyarrow package")
+
+    return StreamingResponse(
+        stream_export(EXPORT_QUERIES[dataset](), format),
+        media_type=MEDIA_TYPES[format],
+        headers=export_filename(dataset, format)
+    )
 
 @app.get("/cryptocurrencies/{cryptocurrency_id}", response_model=CryptocurrencyResponse)
-def get_cryptocurrency(
+async def get_cryptocurrency(
     cryptocurrency_id: int, 
-    db: Session = Depends(get_db)
-) -> CryptocurrencyDB:
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+) -> Response:
     """Retrieve a specific cryptocurrency by its ID.
 
     :param cryptocurrency_id: int, ID of the cryptocurrency.
-    :param db: Session, database session.
-    :return: CryptocurrencyDB, cryptocurrency.
+    :param request: Request, incoming request, used for conditional GET.
+    :param db: AsyncSession, async database session.
+    :return: Response, JSON cryptocurrency with ETag and Last-Modified headers.
     """
-    cryptocurrency = db.query(CryptocurrencyDB).filter(CryptocurrencyDB.id == cryptocurrency_id).first()
+    version, updated_at = await get_table_version(db)
+    headers = cache_headers(make_etag(version, str(cryptocurrency_id)), updated_at)
+
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        refresh_scheduler.record_read(cryptocurrency_id)  # the ETag came with the row, so it exists
+        return Response(status_code=304, headers=headers)
+
+    result = await db.execute(select_response_columns().where(CryptocurrencyDB.id == cryptocurrency_id))
+    cryptocurrency = result.first()
     
     if not cryptocurrency:
         raise HTTPException(status_code=404, detail="Cryptocurrency not found")
     
-    return cryptocurrency
+    refresh_scheduler.record_read(cryptocurrency_id)
+    return Response(content=encode_row(cryptocurrency), media_type="application/json", headers=headers)
+
+@app.get("/cryptocurrencies/{cryptocurrency_id}/history", response_model=list[PriceHistoryBucket])
+async def get_price_history(
+    cryptocurrency_id: int,
+    start: Optional[float] = Query(None, description="Unix timestamp, defaults to 7 days before end"),
+    end: Optional[float] = Query(None, description="Unix timestamp, defaults to now"),
+    resolution: float = Query(3600, gt=0, description="Bucket width in seconds"),
+    mode: Literal['ohlc', 'last'] = 'ohlc',
+    db: AsyncSession = Depends(get_async_db)
+) -> list[Dict]:
+    """Retrieve the price history of a cryptocurrency aggregated into time buckets.
+
+    :param cryptocurrency_id: int, ID of the cryptocurrency.
+    :param start: float, optional, start of the range (inclusive).
+    :param end: float, optional, end of the range (exclusive).
+    :param resolution: float, bucket width in seconds.
+    :param mode: str, "ohlc" for open/high/low/close or "last" for the last value per bucket.
+    :param db: AsyncSession, async database session.
+    :return: list[Dict], one entry per non-empty bucket.
+    """
+    end = end if end is not None else time.time()
+    start = start if start is not None else end - 7 * 86400
+
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / resolution > HISTORY_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Requested range spans more than {HISTORY_MAX_BUCKETS} buckets, increase resolution"
+        )
+
+    if not await db.get(CryptocurrencyDB, cryptocurrency_id):
+        raise HTTPException(status_code=404, detail="Cryptocurrency not found")
+
+    result = await db.execute(price_history_query(cryptocurrency_id, start, end, resolution, mode))
+    return [dict(row._mapping) for row in result]
 
 @app.put("/cryptocurrencies/{cryptocurrency_id}", response_model=CryptocurrencyResponse)
 def update_cryptocurrency(
@@ -237,6 +1143,7 @@ def update_cryptocurrency(
     for key, value in update_data.items():
         setattr(db_crypto, key, value)
     
+    bump_table_version(db, changed_ids=[cryptocurrency_id])
     db.commit()
     db.refresh(db_crypto)
     return db_crypto
@@ -258,6 +1165,94 @@ def delete_cryptocurrency(
         raise HTTPException(status_code=404, detail="Cryptocurrency not found")
     
     db.delete(db_crypto)
+    bump_table_version(db, changed_ids=[cryptocurrency_id])
     db.commit()
     
     return db_crypto
+
+async def current_quotes() -> QuoteSnapshot:
+    """Return the quote snapshot, building it off the event loop if there is none yet.
+
+    :return: QuoteSnapshot, current snapshot.
+    """
+    return quote_store.snapshot or await asyncio.to_thread(quote_store.get)
+
+@app.get("/quotes", response_model=list[QuoteResponse])
+async def get_quotes(
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols, e.g. BTC,ETH"),
+    ids: Optional[str] = Query(None, description="Comma-separated cryptocurrency IDs, e.g. 1,2")
+) -> Response:
+    """Look up current quotes by symbol and/or ID from the in-memory quote snapshot, without a database query.
+
+    Unknown symbols and IDs are left out. Quotes follow the request order, symbols first.
+
+    :param symbols: str, optional, comma-separated symbols (case-insensitive).
+    :param ids: str, optional, comma-separated cryptocurrency IDs.
+    :return: Response, JSON array of quotes with the snapshot version in X-Quotes-Version.
+    """
+    symbol_list = [symbol.strip().upper() for symbol in parse_symbols(symbols) or [] if symbol.strip()]
+    try:
+        id_list = [int(row_id) for row_id in ids.split(",") if row_id.strip()] if ids else []
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+
+    if not symbol_list and not id_list:
+        raise HTTPException(status_code=400, detail="Provide symbols or ids")
+    if len(symbol_list) + len(id_list) > QUOTES_MAX_LOOKUPS:
+        raise HTTPException(status_code=400, detail=f"At most {QUOTES_MAX_LOOKUPS} symbols and ids per request")
+
+    snapshot = await current_quotes()
+    positions = snapshot.positions(symbol_list, id_list)
+    for row_id in snapshot.ids[positions].tolist():
+        refresh_scheduler.record_read(row_id)
+
+    return Response(
+        content=snapshot.encode(positions),
+        media_type="application/json",
+        headers={"X-Quotes-Version": str(snapshot.version)}
+    )
+
+@app.get("/quotes/{symbol}", response_model=QuoteResponse)
+async def get_quote(symbol: str) -> Response:
+    """Look up the current quote of one symbol from the in-memory quote snapshot, without a database query.
+
+    :param symbol: str, symbol (case-insensitive).
+    :return: Response, JSON quote with the snapshot version in X-Quotes-Version.
+    """
+    snapshot = await current_quotes()
+    positions = snapshot.positions([symbol.upper()])
+
+    if not positions:
+        raise HTTPException(status_code=404, detail="Cryptocurrency not found")
+
+    refresh_scheduler.record_read(int(snapshot.ids[positions[0]]))
+    return Response(
+        content=dumps(snapshot.quotes(positions)[0]),
+        media_type="application/json",
+        headers={"X-Quotes-Version": str(snapshot.version)}
+    )
+
+@app.get("/stream/prices")
+async def stream_prices(symbols: Optional[str] = Query(None, description="Comma-separated symbols, e.g. BTC,ETH")) -> StreamingResponse:
+    """Stream price update diffs as Server-Sent Events.
+
+    :param symbols: str, optional, symbols to receive; all updates when omitted.
+    :return: StreamingResponse, text/event-stream of "prices" and "lagged" events.
+    """
+    subscription = price_broker.subscribe(parse_symbols(symbols))
+    return StreamingResponse(
+        sse_events(price_broker, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/prices")
+async def websocket_prices(websocket: WebSocket, symbols: Optional[str] = None) -> None:
+    """Stream price update diffs over a WebSocket.
+
+    :param websocket: WebSocket, client connection.
+    :param symbols: str, optional, comma-separated symbols to receive.
+    :return: None
+    """
+    await websocket.accept()
+    await serve_websocket(price_broker, websocket, parse_symbols(symbols))
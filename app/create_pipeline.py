@@ -0,0 +1,187 @@
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+CREATE_WORKERS = int(os.getenv("CREATE_WORKERS", "2"))
+CREATE_BATCH_SIZE = int(os.getenv("CREATE_BATCH_SIZE", "50"))
+CREATE_BATCH_WAIT_MS = float(os.getenv("CREATE_BATCH_WAIT_MS", "50"))
+CREATE_QUEUE_SIZE = int(os.getenv("CREATE_QUEUE_SIZE", "1000"))
+CREATE_JOB_RETENTION_HOURS = float(os.getenv("CREATE_JOB_RETENTION_HOURS", "24"))
+# pending jobs older than this were lost with the worker that queued them (crash, deploy, scale-down)
+CREATE_JOB_PENDING_TIMEOUT_SECONDS = float(os.getenv("CREATE_JOB_PENDING_TIMEOUT_SECONDS", "600"))
+
+SHUTDOWN_ERROR = "Server shut down before the create was processed, please retry"
+PROCESSING_ERROR = "Internal server error"
+
+
+class CreatePipeline:
+    """Worker pool processing queued create jobs in batches.
+
+    Each worker blocks for a job, then keeps collecting jobs for up to
+    batch_wait_ms (or until batch_size) so that creates arriving together are
+    validated with shared CoinGecko lookups. The process callable owns
+    validation, the database writes and recording every job's outcome; the
+    fail callable records jobs as failed when processing raised, and for jobs
+    still queued when the pipeline stops.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[Dict]], None],
+        fail: Callable[[List[Dict], str], None],
+        workers: int = CREATE_WORKERS,
+        batch_size: int = CREATE_BATCH_SIZE,
+        batch_wait_ms: float = CREATE_BATCH_WAIT_MS,
+        queue_size: int = CREATE_QUEUE_SIZE
+    ) -> None:
+        """Initialize the pipeline; workers start on the first submitted job.
+
+        :param process: Callable, handles a batch of jobs.
+        :param fail: Callable, marks jobs that are still pending as failed with an error message.
+        :param workers: int, number of worker threads.
+        :param batch_size: int, maximum jobs per batch.
+        :param batch_wait_ms: float, milliseconds to wait for more jobs after the first one.
+        :param queue_size: int, maximum number of queued jobs.
+        :return: None
+        """
+        self.process = process
+        self.fail = fail
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait_ms / 1000
+        self.submitted = 0
+        self.processed = 0
+        self.batches = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def submit(self, job: Dict) -> bool:
+        """Queue a job, starting the workers if needed.
+
+        :param job: Dict, job with at least its id.
+        :return: bool, False if the queue is full.
+        """
+        self._start()
+
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            return False
+
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the workers once their current batch is done.
+
+        Jobs still queued are drained and marked failed, so clients polling
+        them learn to retry instead of waiting for a worker that is gone.
+
+        :param timeout: float, seconds to wait for each worker.
+        :return: None
+        """
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+        with self._lock:
+            self._threads = []
+        self._stopping.clear()
+
+        abandoned = []
+        while True:
+            try:
+                abandoned.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if abandoned:
+            logger.warning(f"Failing {len(abandoned)} queued create jobs on shutdown")
+            self._fail(abandoned, SHUTDOWN_ERROR)
+
+    def stats(self) -> Dict:
+        """Return queue and throughput counters.
+
+        :return: Dict with queued, submitted, processed and batches.
+        """
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'submitted': self.submitted,
+                'processed': self.processed,
+                'batches': self.batches
+            }
+
+    def _fail(self, jobs: List[Dict], error: str) -> None:
+        """Mark jobs failed, logging instead of raising if that fails too.
+
+        :param jobs: List[Dict], jobs to fail.
+        :param error: str, error reported to clients.
+        :return: None
+        """
+        try:
+            self.fail(jobs, error)
+        except Exception as e:
+            logger.error(f"Error failing {len(jobs)} create jobs: {e}")
+
+    def _start(self) -> None:
+        """Start the worker threads unless they are running.
+
+        :return: None
+        """
+        with self._lock:
+            if self._threads:
+                return
+
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"create-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _next_batch(self) -> List[Dict]:
+        """Wait for a job, then collect more for up to batch_wait seconds.
+
+        :return: List[Dict], jobs of the batch, empty if none arrived.
+        """
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self) -> None:
+        """Worker loop.
+
+        :return: None
+        """
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            try:
+                self.process(batch)
+            except Exception as e:
+                logger.error(f"Error processing {len(batch)} create jobs: {e}")
+                self._fail(batch, PROCESSING_ERROR)
+
+            with self._lock:
+                self.processed += len(batch)
+                self.batches += 1
@@ -1,19 +1,64 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import (
+    create_engine, event, cast, column, delete, func, insert, select, update, values, false,
+    Boolean, Column, Integer, String, Float, ForeignKey, Index, JSON
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from sqlalchemy.pool import NullPool
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import csv
+import io
 import os
+import time
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL", 
     "postgresql://postgres:postgres@db:5432/coingecko_api"
 )
 
+DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "true").lower() == "true"  # disable behind PgBouncer
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
 
-engine = create_engine(
-    DATABASE_URL, 
-    poolclass=NullPool,  
-    pool_pre_ping=True   
-)
+
+def _to_async_url(url: str) -> str:
+    """Derive the async driver URL from a sync database URL.
+
+    :param url: str, sync database URL.
+    :return: str, URL using asyncpg (or aiosqlite for SQLite).
+    """
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _to_async_url(DATABASE_URL))
+
+
+def pool_options() -> Dict:
+    """Build engine pool keyword arguments from the DB_POOL_* settings.
+
+    :return: Dict with create_engine pool arguments.
+    """
+    if not DB_POOL_ENABLED:
+        return {'poolclass': NullPool, 'pool_pre_ping': DB_POOL_PRE_PING}
+
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING
+    }
+
+
+engine = create_engine(DATABASE_URL, **pool_options())
 
 Base = declarative_base()
 
@@ -32,6 +77,57 @@ def get_db():
         db.close()
 
 
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return the async engine, creating it on first use.
+
+    Created lazily so the async driver is only needed by processes that use it.
+
+    :return: AsyncEngine, engine bound to ASYNC_DATABASE_URL.
+    """
+    global _async_engine, _async_session_factory
+
+    if _async_engine is None:
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options())
+        _async_session_factory = async_sessionmaker(
+            _async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+
+    return _async_engine
+
+
+def open_async_session() -> AsyncSession:
+    """Create a new async session, for work that outlives a request (e.g. streaming).
+
+    :return: AsyncSession, session to be used as an async context manager.
+    """
+    get_async_engine()
+    return _async_session_factory()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with open_async_session() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close all pooled async connections.
+
+    :return: None
+    """
+    global _async_engine, _async_session_factory
+
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
+
 class CryptocurrencyDB(Base):
     """SQLAlchemy model for storing cryptocurrency information."""
     __tablename__ = "cryptocurrencies"
@@ -43,3 +139,429 @@ class CryptocurrencyDB(Base):
     market_cap = Column(Float)
     coingecko_id = Column(String, unique=True)
     last_updated = Column(Float, nullable=True)  
+    pinned = Column(Boolean, nullable=False, default=False, server_default=false())  # refreshed in the fastest tier
+
+    # composite (sort column, id) indexes backing keyset pagination
+    __table_args__ = (
+        Index("ix_cryptocurrencies_market_cap_id", "market_cap", "id"),
+        Index("ix_cryptocurrencies_current_price_id", "current_price", "id"),
+        Index("ix_cryptocurrencies_last_updated_id", "last_updated", "id"),
+    )
+
+
+class PriceHistoryDB(Base):
+    """SQLAlchemy model for append-only price snapshots written by the refresh job."""
+    __tablename__ = "price_history"
+
+    cryptocurrency_id = Column(
+        Integer, 
+        ForeignKey("cryptocurrencies.id", ondelete="CASCADE"), 
+        primary_key=True
+    )
+    ts = Column(Float, primary_key=True)  # Unix timestamp, like CryptocurrencyDB.last_updated
+    price = Column(Float)
+    market_cap = Column(Float)
+
+    # BRIN on the append-ordered timestamp keeps retention deletes cheap at a tiny index size
+    __table_args__ = (
+        Index("ix_price_history_ts", "ts", postgresql_using="brin"),
+    )
+
+
+class TableVersionDB(Base):
+    """SQLAlchemy model counting committed writes per table, used for HTTP caching."""
+    __tablename__ = "table_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(Float, nullable=False)
+
+
+class RefreshCheckpointDB(Base):
+    """SQLAlchemy model recording how far an unfinished full refresh got."""
+    __tablename__ = "refresh_checkpoints"
+
+    name = Column(String, primary_key=True)
+    started_at = Column(Float, nullable=False)
+    last_id = Column(Integer, nullable=False)
+    updated_at = Column(Float, nullable=False)
+
+
+class RateLimitDB(Base):
+    """SQLAlchemy model holding a token bucket shared by all worker processes."""
+    __tablename__ = "rate_limits"
+
+    name = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # database clock, Unix time of the last refill
+    paused_until = Column(Float, nullable=False, default=0.0)
+
+
+class CoinReadDB(Base):
+    """SQLAlchemy model counting recent reads of a coin, summed over all worker processes."""
+    __tablename__ = "coin_reads"
+
+    cryptocurrency_id = Column(Integer, primary_key=True)  # no foreign key: counts of deleted coins decay away
+    reads = Column(Integer, nullable=False)
+
+
+class CreateJobDB(Base):
+    """SQLAlchemy model tracking an asynchronous cryptocurrency create."""
+    __tablename__ = "create_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 hex
+    status = Column(String, nullable=False, index=True)  # pending, succeeded or failed
+    symbol = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)  # the CryptocurrencyCreate request
+    cryptocurrency_id = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
+
+
+TABLE_VERSION_CHANNEL = "table_versions"  # Postgres NOTIFY channel of bump_table_version
+TABLE_CHANGES_KEY = "table_changes"  # Session.info key of the table changes a transaction will commit
+NOTIFY_PAYLOAD_LIMIT = 8000  # bytes, Postgres rejects longer NOTIFY payloads
+
+
+def encode_table_change(name: str, version: int, changed_ids: Optional[List[int]]) -> str:
+    """Encode a table change as a NOTIFY payload.
+
+    :param name: str, table name.
+    :param version: int, table version the change committed.
+    :param changed_ids: List[int], optional, IDs of the changed rows, None if unknown.
+    :return: str, "name:version:id,id,..." ("name:version" if the IDs are unknown or too many).
+    """
+    payload = f"{name}:{version}"
+    if changed_ids is not None:
+        with_ids = f"{payload}:{','.join(map(str, changed_ids))}"
+        if len(with_ids) < NOTIFY_PAYLOAD_LIMIT:
+            return with_ids
+    return payload
+
+
+def decode_table_change(payload: str) -> Tuple[str, Optional[int], Optional[List[int]]]:
+    """Decode a NOTIFY payload sent by bump_table_version.
+
+    :param payload: str, payload made by encode_table_change.
+    :return: Tuple of table name, version and changed row IDs (None when not sent).
+    """
+    name, _, rest = payload.partition(':')
+    version, separator, ids = rest.partition(':')
+    return (
+        name,
+        int(version) if version else None,
+        [int(row_id) for row_id in ids.split(',') if row_id] if separator else None
+    )
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _discard_table_changes(session: Session, transaction) -> None:
+    """Forget the table changes of a transaction that ended without committing.
+
+    Committed changes were already taken by the after_commit listeners, which run first.
+    """
+    if transaction.parent is None:
+        session.info.pop(TABLE_CHANGES_KEY, None)
+
+
+def _dialect_insert(db: Session, model):
+    """Return an INSERT construct supporting ON CONFLICT for the session's dialect.
+
+    :param db: Session, database session.
+    :param model: declarative model to insert into.
+    :return: Insert, dialect-specific insert statement.
+    """
+    dialect = sqlite if db.get_bind().dialect.name == "sqlite" else postgresql
+    return dialect.insert(model)
+
+
+def bump_table_version(
+    db: Session,
+    name: str = CryptocurrencyDB.__tablename__,
+    changed_ids: Optional[Iterable[int]] = None
+) -> int:
+    """Increment a table's version within the current transaction.
+
+    Call before committing any write to the table so readers see a new version
+    exactly when the write becomes visible. On Postgres, the table name, new
+    version and changed row IDs are also sent on TABLE_VERSION_CHANNEL, which is
+    delivered to listeners on commit. The change is also kept in the session's
+    info under TABLE_CHANGES_KEY until the transaction ends, for after_commit
+    listeners of this process.
+
+    :param db: Session, database session.
+    :param name: str, table name.
+    :param changed_ids: Iterable[int], optional, IDs of the inserted, updated or deleted rows, None if unknown.
+    :return: int, new table version.
+    """
+    statement = _dialect_insert(db, TableVersionDB).values(name=name, version=1, updated_at=time.time())
+    statement = statement.on_conflict_do_update(
+        index_elements=[TableVersionDB.name],
+        set_={'version': TableVersionDB.version + 1, 'updated_at': statement.excluded.updated_at}
+    )
+    version = db.execute(statement.returning(TableVersionDB.version)).scalar_one()
+
+    changed_ids = sorted(set(changed_ids)) if changed_ids is not None else None
+    db.info.setdefault(TABLE_CHANGES_KEY, []).append((name, version, changed_ids))
+
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_notify(TABLE_VERSION_CHANNEL, encode_table_change(name, version, changed_ids))))
+    return version
+
+
+async def get_table_version(db: AsyncSession, name: str = CryptocurrencyDB.__tablename__) -> Tuple[int, float]:
+    """Read a table's version and the time of its last write.
+
+    :param db: AsyncSession, async database session.
+    :param name: str, table name.
+    :return: Tuple of version and last write time (0 for tables never written).
+    """
+    result = await db.execute(
+        select(TableVersionDB.version, TableVersionDB.updated_at).where(TableVersionDB.name == name)
+    )
+    row = result.first()
+    return (row.version, row.updated_at) if row else (0, 0.0)
+
+
+def upsert_cryptocurrencies(db: Session, rows: List[Dict]) -> Dict[str, int]:
+    """Insert or update many cryptocurrencies with INSERT ... ON CONFLICT (symbol) statements.
+
+    Existing rows only take the columns a row gives, so rows are written in one
+    statement per distinct set of columns. A NULL coingecko_id never detaches an
+    existing row from CoinGecko. New rows get the defaults of missing columns.
+    The caller is responsible for committing.
+
+    :param db: Session, database session.
+    :param rows: List[Dict], column values with at least name and symbol.
+    :return: Dict mapping symbol to row ID.
+    """
+    groups: Dict[Tuple[str, ...], List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    ids = {}
+    for columns, group in groups.items():
+        statement = _dialect_insert(db, CryptocurrencyDB).values(group)
+        update_columns = {column: statement.excluded[column] for column in columns if column != 'symbol'}
+        if 'coingecko_id' in update_columns:
+            update_columns['coingecko_id'] = func.coalesce(statement.excluded.coingecko_id, CryptocurrencyDB.coingecko_id)
+        statement = statement.on_conflict_do_update(
+            index_elements=[CryptocurrencyDB.symbol],
+            set_=update_columns
+        ).returning(CryptocurrencyDB.id, CryptocurrencyDB.symbol)
+        ids.update({symbol: row_id for row_id, symbol in db.execute(statement)})
+
+    return ids
+
+
+def bulk_update_prices(db: Session, rows: List[Dict]) -> None:
+    """Write refreshed prices for many cryptocurrencies in one statement.
+
+    Uses UPDATE ... FROM (VALUES ...) on PostgreSQL and an executemany by primary
+    key elsewhere. The caller is responsible for committing.
+
+    :param db: Session, database session.
+    :param rows: List[Dict], rows with id, current_price, market_cap and last_updated.
+    :return: None
+    """
+    if not rows:
+        return
+
+    if db.get_bind().dialect.name != "postgresql":
+        db.execute(update(CryptocurrencyDB), rows)
+        return
+
+    columns = ('id', 'current_price', 'market_cap', 'last_updated')
+    data = values(
+        column('id', Integer),
+        column('current_price', Float),
+        column('market_cap', Float),
+        column('last_updated', Float),
+        name='refreshed'
+    ).data([tuple(row[key] for key in columns) for row in rows])
+
+    # casts keep all-NULL columns from being typed as text
+    statement = update(CryptocurrencyDB).where(CryptocurrencyDB.id == data.c.id).values(
+        current_price=cast(data.c.current_price, Float),
+        market_cap=cast(data.c.market_cap, Float),
+        last_updated=cast(data.c.last_updated, Float)
+    ).execution_options(synchronize_session=False)
+    db.execute(statement)
+
+
+def get_refresh_checkpoint(db: Session, name: str = "full_refresh") -> Optional[RefreshCheckpointDB]:
+    """Read the checkpoint of an unfinished refresh run.
+
+    :param db: Session, database session.
+    :param name: str, checkpoint name.
+    :return: RefreshCheckpointDB, or None if the last run finished.
+    """
+    return db.get(RefreshCheckpointDB, name)
+
+
+def add_coin_reads(db: Session, counts: Dict[int, int]) -> None:
+    """Add read counts of coins within the current transaction.
+
+    :param db: Session, database session.
+    :param counts: Dict mapping cryptocurrency ID to reads since the last call.
+    :return: None
+    """
+    if not counts:
+        return
+
+    statement = _dialect_insert(db, CoinReadDB).values([
+        {'cryptocurrency_id': cryptocurrency_id, 'reads': reads} for cryptocurrency_id, reads in counts.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[CoinReadDB.cryptocurrency_id],
+        set_={'reads': CoinReadDB.reads + statement.excluded.reads}
+    )
+    db.execute(statement)
+
+
+def take_coin_reads(db: Session) -> Dict[int, int]:
+    """Return the read counts of all coins and halve them, within the current transaction.
+
+    Halving on every call makes the counts track recent popularity.
+
+    :param db: Session, database session.
+    :return: Dict mapping cryptocurrency ID to reads.
+    """
+    counts = dict(db.execute(select(CoinReadDB.cryptocurrency_id, CoinReadDB.reads).with_for_update()).all())
+    db.execute(delete(CoinReadDB).where(CoinReadDB.reads <= 1))
+    db.execute(update(CoinReadDB).values(reads=CoinReadDB.reads / 2))
+    return counts
+
+
+def save_refresh_checkpoint(db: Session, started_at: float, last_id: int, name: str = "full_refresh") -> None:
+    """Record refresh progress within the current transaction.
+
+    Commit it together with the batch it covers, so the checkpoint never runs
+    ahead of the written data.
+
+    :param db: Session, database session.
+    :param started_at: float, start time of the run.
+    :param last_id: int, highest cryptocurrency ID written so far.
+    :param name: str, checkpoint name.
+    :return: None
+    """
+    statement = _dialect_insert(db, RefreshCheckpointDB).values(
+        name=name, started_at=started_at, last_id=last_id, updated_at=time.time()
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[RefreshCheckpointDB.name],
+        set_={
+            'started_at': statement.excluded.started_at,
+            'last_id': statement.excluded.last_id,
+            'updated_at': statement.excluded.updated_at
+        }
+    )
+    db.execute(statement)
+
+
+def clear_refresh_checkpoint(db: Session, name: str = "full_refresh") -> None:
+    """Remove a checkpoint once its run has finished.
+
+    :param db: Session, database session.
+    :param name: str, checkpoint name.
+    :return: None
+    """
+    db.execute(delete(RefreshCheckpointDB).where(RefreshCheckpointDB.name == name))
+
+
+def finish_create_jobs(db: Session, outcomes: List[Dict]) -> None:
+    """Record the outcome of create jobs in bulk within the current transaction.
+
+    :param db: Session, database session.
+    :param outcomes: List[Dict], rows with id, status, cryptocurrency_id and error.
+    :return: None
+    """
+    if outcomes:
+        now = time.time()
+        db.execute(update(CreateJobDB), [{**outcome, 'updated_at': now} for outcome in outcomes])
+
+
+def fail_pending_create_jobs(
+    db: Session,
+    error: str,
+    job_ids: Optional[List[str]] = None,
+    created_before: Optional[float] = None
+) -> int:
+    """Mark create jobs that are still pending as failed, within the current transaction.
+
+    Jobs that already finished are left alone.
+
+    :param db: Session, database session.
+    :param error: str, error reported to clients polling the job.
+    :param job_ids: List[str], optional, only these jobs.
+    :param created_before: float, optional, only jobs created before this Unix time.
+    :return: int, number of jobs marked failed.
+    """
+    statement = update(CreateJobDB).where(CreateJobDB.status == "pending")
+    if job_ids is not None:
+        statement = statement.where(CreateJobDB.id.in_(job_ids))
+    if created_before is not None:
+        statement = statement.where(CreateJobDB.created_at < created_before)
+
+    result = db.execute(
+        statement.values(status="failed", error=error, updated_at=time.time()),
+        execution_options={'synchronize_session': False}
+    )
+    return result.rowcount
+
+
+def prune_create_jobs(db: Session, max_age_seconds: float) -> int:
+    """Delete finished create jobs older than max_age_seconds.
+
+    :param db: Session, database session.
+    :param max_age_seconds: float, age after which finished jobs are dropped.
+    :return: int, number of deleted jobs.
+    """
+    result = db.execute(
+        delete(CreateJobDB)
+        .where(CreateJobDB.status != "pending")
+        .where(CreateJobDB.updated_at < time.time() - max_age_seconds)
+    )
+    return result.rowcount
+
+
+def insert_price_snapshots(db: Session, snapshots: List[Dict]) -> None:
+    """Append price snapshots in bulk within the current transaction.
+
+    Uses COPY on PostgreSQL with psycopg2 and a multi-row INSERT elsewhere.
+
+    :param db: Session, database session.
+    :param snapshots: List[Dict], rows with cryptocurrency_id, ts, price and market_cap.
+    :return: None
+    """
+    if not snapshots:
+        return
+
+    connection = db.connection()
+    columns = ('cryptocurrency_id', 'ts', 'price', 'market_cap')
+
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([snapshot[column] for column in columns] for snapshot in snapshots)
+        buffer.seek(0)
+
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {PriceHistoryDB.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+    else:
+        db.execute(insert(PriceHistoryDB), snapshots)
+
+
+def prune_price_history(db: Session, retention_days: float) -> int:
+    """Delete price snapshots older than the retention period.
+
+    :param db: Session, database session.
+    :param retention_days: float, number of days of history to keep.
+    :return: int, number of deleted rows.
+    """
+    cutoff = time.time() - retention_days * 86400
+    result = db.execute(delete(PriceHistoryDB).where(PriceHistoryDB.ts < cutoff))
+    return result.rowcount
@@ -0,0 +1,180 @@
+import csv
+import importlib.util
+import io
+import os
+from typing import AsyncIterator, Dict, List, Sequence, Tuple
+
+from sqlalchemy import select
+
+from app.database import CryptocurrencyDB, PriceHistoryDB, open_async_session
+from app.serialization import dumps
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = (
+    CryptocurrencyDB.id,
+    CryptocurrencyDB.name,
+    CryptocurrencyDB.symbol,
+    CryptocurrencyDB.coingecko_id,
+    CryptocurrencyDB.current_price,
+    CryptocurrencyDB.market_cap,
+    CryptocurrencyDB.last_updated
+)
+
+MEDIA_TYPES = {
+    'ndjson': "application/x-ndjson",
+    'csv': "text/csv",
+    'arrow': "application/vnd.apache.arrow.stream"
+}
+
+
+async def iter_row_batches(query, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[Sequence[Tuple]]:
+    """Stream a query through a server-side cursor in fixed-size batches.
+
+    Opens its own session, because the stream outlives the request handler.
+
+    :param query: Select, column query to stream.
+    :param batch_size: int, rows fetched per round trip.
+    :return: AsyncIterator over lists of row tuples.
+    """
+    async with open_async_session() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+def _encode_ndjson(columns: List[str], rows: Sequence[Tuple]) -> bytes:
+    """Encode rows as newline-delimited JSON objects, with orjson when it is installed.
+
+    :param columns: List[str], column names.
+    :param rows: Sequence[Tuple], rows.
+    :return: bytes, encoded rows.
+    """
+    return b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def _encode_csv(columns: List[str], rows: Sequence[Tuple], header: bool) -> bytes:
+    """Encode rows as CSV, optionally preceded by a header line.
+
+    :param columns: List[str], column names.
+    :param rows: Sequence[Tuple], rows.
+    :param header: bool, whether to write the header line.
+    :return: bytes, encoded rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def _stream_arrow(query, batches: AsyncIterator[Sequence[Tuple]]) -> AsyncIterator[bytes]:
+    """Encode row batches as an Arrow IPC stream, one record batch per row batch.
+
+    :param query: Select, exported column query, used to derive the Arrow schema.
+    :param batches: AsyncIterator over lists of row tuples.
+    :return: AsyncIterator over encoded chunks.
+    """
+    import pyarrow as pa
+
+    arrow_types = {int: pa.int64(), float: pa.float64(), str: pa.string()}
+    schema = pa.schema([
+        (column.key, arrow_types[column.type.python_type]) for column in query.selected_columns
+    ])
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield _drain(sink)
+
+    async for rows in batches:
+        arrays = [
+            pa.array(values, type=field.type)
+            for values, field in zip(zip(*rows), schema)
+        ]
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+        yield _drain(sink)
+
+    writer.close()
+    yield _drain(sink)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    """Return and clear the contents of a buffer.
+
+    :param sink: io.BytesIO, buffer.
+    :return: bytes, buffered data.
+    """
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate(0)
+    return data
+
+
+async def stream_export(query, export_format: str) -> AsyncIterator[bytes]:
+    """Stream the rows of a column query in the requested format.
+
+    :param query: Select, column query to export.
+    :param export_format: str, one of MEDIA_TYPES.
+    :return: AsyncIterator over encoded chunks.
+    """
+    columns = [column.key for column in query.selected_columns]
+    batches = iter_row_batches(query)
+
+    if export_format == 'arrow':
+        async for chunk in _stream_arrow(query, batches):
+            yield chunk
+        return
+
+    if export_format == 'csv':
+        yield _encode_csv(columns, [], header=True)
+
+    async for rows in batches:
+        if export_format == 'csv':
+            yield _encode_csv(columns, rows, header=False)
+        else:
+            yield _encode_ndjson(columns, rows)
+
+
+def cryptocurrency_export_query():
+    """Build the column query used to export the cryptocurrencies table.
+
+    :return: Select, query ordered by ID.
+    """
+    return select(*EXPORT_COLUMNS).order_by(CryptocurrencyDB.id)
+
+
+def arrow_available() -> bool:
+    """Whether the optional pyarrow dependency for Arrow exports is installed.
+
+    :return: bool
+    """
+    return importlib.util.find_spec("pyarrow") is not None  # imported by _stream_arrow
+
+
+def export_filename(name: str, export_format: str) -> Dict[str, str]:
+    """Build a Content-Disposition header for an export.
+
+    :param name: str, base file name.
+    :param export_format: str, export format, used as file extension.
+    :return: Dict with the Content-Disposition header.
+    """
+    return {"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+
+
+def price_history_export_query():
+    """Build the column query used to export the price history table.
+
+    :return: Select, query ordered by cryptocurrency and time.
+    """
+    return select(
+        PriceHistoryDB.cryptocurrency_id,
+        PriceHistoryDB.ts,
+        PriceHistoryDB.price,
+        PriceHistoryDB.market_cap
+    ).order_by(PriceHistoryDB.cryptocurrency_id, PriceHistoryDB.ts)
+
+
+EXPORT_QUERIES = {
+    'cryptocurrencies': cryptocurrency_export_query,
+    'price_history': price_history_export_query
+}
@@ -0,0 +1,54 @@
+import os
+
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+
+from app.database import PriceHistoryDB
+
+HISTORY_MAX_BUCKETS = int(os.getenv("HISTORY_MAX_BUCKETS", "5000"))
+PRICE_HISTORY_RETENTION_DAYS = float(os.getenv("PRICE_HISTORY_RETENTION_DAYS", "365"))
+
+
+def price_history_query(cryptocurrency_id: int, start: float, end: float, resolution: float, mode: str) -> Select:
+    """Build a query aggregating price snapshots into fixed-width time buckets.
+
+    The aggregation runs entirely in the database: window functions pick each
+    bucket's first and last snapshot, and the outer query groups per bucket.
+
+    :param cryptocurrency_id: int, ID of the cryptocurrency.
+    :param start: float, start of the range as a Unix timestamp (inclusive).
+    :param end: float, end of the range as a Unix timestamp (exclusive).
+    :param resolution: float, bucket width in seconds.
+    :param mode: str, "ohlc" for open/high/low/close or "last" for the last value per bucket.
+    :return: Select yielding bucket, open, high, low, close, market_cap and samples columns.
+    """
+    bucket = (func.floor(PriceHistoryDB.ts / resolution) * resolution).label('bucket')
+    whole_bucket = {'partition_by': bucket, 'order_by': PriceHistoryDB.ts, 'range_': (None, None)}
+
+    snapshots = select(
+        bucket,
+        PriceHistoryDB.price,
+        func.first_value(PriceHistoryDB.price).over(**whole_bucket).label('open'),
+        func.last_value(PriceHistoryDB.price).over(**whole_bucket).label('close'),
+        func.last_value(PriceHistoryDB.market_cap).over(**whole_bucket).label('market_cap')
+    ).where(
+        PriceHistoryDB.cryptocurrency_id == cryptocurrency_id,
+        PriceHistoryDB.ts >= start,
+        PriceHistoryDB.ts < end
+    ).subquery()
+
+    # open/close/market_cap are constant within a bucket, so min() just picks that value
+    columns = [
+        snapshots.c.bucket,
+        func.min(snapshots.c.close).label('close'),
+        func.min(snapshots.c.market_cap).label('market_cap'),
+        func.count().label('samples')
+    ]
+    if mode == 'ohlc':
+        columns += [
+            func.min(snapshots.c.open).label('open'),
+            func.max(snapshots.c.price).label('high'),
+            func.min(snapshots.c.price).label('low')
+        ]
+
+    return select(*columns).group_by(snapshots.c.bucket).order_by(snapshots.c.bucket)
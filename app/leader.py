@@ -0,0 +1,130 @@
+import functools
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import NullPool
+
+from app.database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_KEY = int(os.getenv("LEADER_LOCK_KEY", "4242001"))
+LEADER_CHECK_SECONDS = float(os.getenv("LEADER_CHECK_SECONDS", "10"))
+
+# TCP keepalives make Postgres notice a vanished leader (and release its lock) within ~30s
+KEEPALIVE_ARGS = {'keepalives': 1, 'keepalives_idle': 10, 'keepalives_interval': 5, 'keepalives_count': 3}
+
+
+class LeaderElection:
+    """Elects one process as the owner of background jobs through a Postgres advisory lock.
+
+    The lock is session-level, so it is held for exactly as long as the leader's
+    dedicated connection lives. When the leader exits or its connection drops,
+    Postgres releases the lock and the next follower to call check() takes over.
+    Databases without advisory locks (SQLite in development) always elect the
+    current process.
+    """
+
+    def __init__(self, database_url: str = DATABASE_URL, lock_key: int = LEADER_LOCK_KEY) -> None:
+        """Initialize the election without connecting.
+
+        :param database_url: str, sync database URL.
+        :param lock_key: int, advisory lock key shared by all workers.
+        :return: None
+        """
+        self.database_url = database_url
+        self.lock_key = lock_key
+        self.enabled = database_url.startswith("postgresql")
+        self.is_leader = False
+        self._engine: Optional[Engine] = None
+        self._connection: Optional[Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Connection:
+        """Return the dedicated lock connection, opening it if needed.
+
+        :return: Connection, autocommit connection outside the shared pool.
+        """
+        if self._engine is None:
+            connect_args = KEEPALIVE_ARGS if self.database_url.startswith(("postgresql://", "postgresql+psycopg2://")) else {}
+            self._engine = create_engine(
+                self.database_url,
+                poolclass=NullPool,
+                isolation_level="AUTOCOMMIT",
+                connect_args=connect_args
+            )
+        if self._connection is None:
+            self._connection = self._engine.connect()
+        return self._connection
+
+    def _discard_connection(self) -> None:
+        """Close the lock connection, which releases the lock if it was held.
+
+        :return: None
+        """
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def check(self) -> bool:
+        """Try to become leader, or confirm the lock is still held.
+
+        :return: bool, whether this process is the leader.
+        """
+        with self._lock:
+            if not self.enabled:
+                self.is_leader = True
+                return True
+
+            try:
+                connection = self._connect()
+                if self.is_leader:
+                    connection.execute(text("SELECT 1"))
+                elif connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {'key': self.lock_key}).scalar():
+                    self.is_leader = True
+                    logger.info(f"Process {os.getpid()} elected leader for background jobs")
+            except Exception as e:
+                if self.is_leader:
+                    logger.error(f"Process {os.getpid()} lost background job leadership: {e}")
+                self.is_leader = False
+                self._discard_connection()
+
+            return self.is_leader
+
+    def release(self) -> None:
+        """Give up leadership so another process can take over immediately.
+
+        :return: None
+        """
+        with self._lock:
+            if self.is_leader and self._connection is not None:
+                try:
+                    self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': self.lock_key})
+                except Exception as e:
+                    logger.error(f"Failed to release leader lock: {e}")
+            self.is_leader = False
+            self._discard_connection()
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
+
+    def leader_only(self, job: Callable) -> Callable:
+        """Wrap a scheduler job so it only runs in the leader process.
+
+        :param job: Callable, job function.
+        :return: Callable, job that returns None without running on followers.
+        """
+        @functools.wraps(job)
+        def run(*args, **kwargs):
+            if not self.is_leader:
+                return None
+            return job(*args, **kwargs)
+
+        return run
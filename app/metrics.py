@@ -0,0 +1,348 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# set when serving with several workers, so /metrics aggregates all of them
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+_metric_lock = threading.Lock()
+_lazy_metrics: List["LazyMetric"] = []
+
+
+class LazyMetric:
+    """A Prometheus metric that is only created, and prometheus_client imported, on first use.
+
+    Attribute access (labels, inc, observe, set, ...) is forwarded to the real
+    metric, so a LazyMetric is used exactly like the metric it stands for.
+    """
+
+    def __init__(self, kind: str, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs) -> None:
+        """Describe the metric.
+
+        :param kind: str, prometheus_client metric class name (Counter, Gauge or Histogram).
+        :param name: str, metric name.
+        :param documentation: str, help text.
+        :param labelnames: Sequence[str], label names.
+        :param kwargs: further metric arguments (e.g. buckets, multiprocess_mode).
+        :return: None
+        """
+        self._kind = kind
+        self._args = (name, documentation, labelnames)
+        self._kwargs = kwargs
+        self._metric = None
+        _lazy_metrics.append(self)
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.create(), attribute)
+
+    def create(self):
+        """Create the metric unless it exists.
+
+        :return: prometheus_client metric.
+        """
+        if self._metric is None:
+            with _metric_lock:
+                if self._metric is None:
+                    import prometheus_client
+
+                    self._metric = getattr(prometheus_client, self._kind)(*self._args, **self._kwargs)
+        return self._metric
+
+HTTP_REQUEST_SECONDS = LazyMetric(
+    "Histogram",
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ['method', 'route', 'status']
+)
+COINGECKO_CALL_SECONDS = LazyMetric(
+    "Histogram",
+    "coingecko_call_duration_seconds",
+    "Duration of CoinGeckoService calls, including cache hits, retries and rate limiting",
+    ['method']
+)
+COINGECKO_CALLS = LazyMetric(
+    "Counter",
+    "coingecko_calls_total",
+    "CoinGeckoService calls by outcome (ok, empty or error)",
+    ['method', 'outcome']
+)
+COINGECKO_RESPONSES = LazyMetric(
+    "Counter",
+    "coingecko_http_responses_total",
+    "HTTP responses received from CoinGecko, retried ones included",
+    ['endpoint', 'status']
+)
+COINGECKO_COALESCED = LazyMetric(
+    "Counter",
+    "coingecko_coalesced_calls_total",
+    "CoinGecko calls saved by joining an identical call already in flight",
+    ['layer']
+)
+COINGECKO_CIRCUIT_STATE = LazyMetric(
+    "Gauge",
+    "coingecko_circuit_state",
+    "CoinGecko circuit breaker state (0 closed, 1 half-open, 2 open)",
+    multiprocess_mode='max'
+)
+COINGECKO_SHORT_CIRCUITED = LazyMetric(
+    "Counter",
+    "coingecko_short_circuited_calls_total",
+    "CoinGecko calls rejected without a request while the circuit was open"
+)
+DB_QUERY_SECONDS = LazyMetric(
+    "Histogram",
+    "db_query_duration_seconds",
+    "Database statement duration by statement type",
+    ['operation'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+)
+REFRESH_DURATION = LazyMetric(
+    "Gauge",
+    "refresh_last_duration_seconds",
+    "Duration of the last refresh run",
+    multiprocess_mode='mostrecent'
+)
+REFRESH_COINS = LazyMetric(
+    "Gauge",
+    "refresh_last_coins",
+    "Coins updated or failed in the last refresh run",
+    ['result'],
+    multiprocess_mode='mostrecent'
+)
+REFRESH_API_CALLS = LazyMetric(
+    "Gauge",
+    "refresh_last_api_calls",
+    "CoinGecko calls made by the last refresh run",
+    multiprocess_mode='mostrecent'
+)
+REFRESH_COMPLETED = LazyMetric(
+    "Gauge",
+    "refresh_last_completed_timestamp_seconds",
+    "Unix time the last refresh run finished",
+    multiprocess_mode='mostrecent'
+)
+DATA_LAST_UPDATED = LazyMetric(
+    "Gauge",
+    "data_last_updated_timestamp_seconds",
+    "Unix time the stored CoinGecko prices were last updated (oldest and mean), as of the last refresh run",
+    ['stat'],
+    multiprocess_mode='mostrecent'
+)
+
+STARTUP_PHASE_SECONDS = LazyMetric(
+    "Gauge",
+    "startup_phase_duration_seconds",
+    "Duration of each startup phase of the worker (import, database, migrations, background_jobs, total)",
+    ['phase'],
+    multiprocess_mode='max'
+)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    """Record the latency of an HTTP request.
+
+    :param method: str, HTTP method.
+    :param route: str, route template (e.g. /cryptocurrencies/{cryptocurrency_id}).
+    :param status: int, response status code.
+    :param seconds: float, time until the response started.
+    :return: None
+    """
+    HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware recording the latency of every HTTP request under its route template.
+
+    Unlike @app.middleware("http"), it passes the response messages straight
+    through instead of re-streaming the body, so it adds no task or copy per
+    request. WebSocket and lifespan traffic is not observed.
+    """
+
+    def __init__(self, app: Callable) -> None:
+        """Wrap an ASGI application.
+
+        :param app: Callable, ASGI application.
+        :return: None
+        """
+        self.app = app
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        if scope['type'] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        observed = False
+
+        def observe(status: int) -> None:
+            nonlocal observed
+            observed = True
+            route = scope.get('route')
+            observe_request(scope['method'], route.path if route else "unmatched", status, time.perf_counter() - started)
+
+        async def send_observed(message: Dict) -> None:
+            if message['type'] == "http.response.start" and not observed:
+                observe(message['status'])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_observed)
+        finally:
+            if not observed:
+                observe(500)
+
+
+def _outcome(result) -> str:
+    """Classify the result of a CoinGeckoService call.
+
+    :param result: return value of the call.
+    :return: str, "empty" for None, False or empty containers, "ok" otherwise.
+    """
+    return "empty" if result is None or result is False or result == {} or result == [] else "ok"
+
+
+def observe_coingecko(method: Callable) -> Callable:
+    """Decorate a CoinGeckoService method to record its duration and outcome.
+
+    :param method: Callable, sync or async method.
+    :return: Callable, instrumented method.
+    """
+    name = method.__name__
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def observed_async(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = await method(*args, **kwargs)
+            except Exception:
+                COINGECKO_CALLS.labels(name, "error").inc()
+                raise
+            finally:
+                COINGECKO_CALL_SECONDS.labels(name).observe(time.perf_counter() - started)
+            COINGECKO_CALLS.labels(name, _outcome(result)).inc()
+            return result
+
+        return observed_async
+
+    @functools.wraps(method)
+    def observed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            COINGECKO_CALLS.labels(name, "error").inc()
+            raise
+        finally:
+            COINGECKO_CALL_SECONDS.labels(name).observe(time.perf_counter() - started)
+        COINGECKO_CALLS.labels(name, _outcome(result)).inc()
+        return result
+
+    return observed
+
+
+def coingecko_endpoint(url: str) -> str:
+    """Reduce a CoinGecko URL to a low-cardinality endpoint label.
+
+    :param url: str, request URL.
+    :return: str, API path with coin IDs replaced by {id}.
+    """
+    path = urlsplit(url).path.split("/api/v3", 1)[-1]
+    if path.startswith("/coins/") and path.count("/") == 2 and path not in ("/coins/markets", "/coins/list"):
+        return "/coins/{id}"
+    return path
+
+
+def observe_coingecko_response(url: str, status: int) -> None:
+    """Count an HTTP response received from CoinGecko.
+
+    :param url: str, request URL.
+    :param status: int, response status code.
+    :return: None
+    """
+    COINGECKO_RESPONSES.labels(coingecko_endpoint(url), str(status)).inc()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Remember when a statement started, stacked for nested executions."""
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Record a finished statement's duration under its leading keyword."""
+    if not conn.info.get('query_started'):
+        return  # started before the listeners were added
+    started = conn.info['query_started'].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    DB_QUERY_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+
+def _handle_error(exception_context) -> None:
+    """Discard the start time of a statement that failed."""
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+
+def instrument_engines() -> None:
+    """Time every statement of every engine (sync, async and the leader lock connection).
+
+    Can be called while statements are running; those are not timed.
+
+    :return: None
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+def record_refresh(stats: Dict) -> None:
+    """Export the statistics of a finished refresh run as gauges.
+
+    :param stats: Dict, auto_refresh_cryptocurrencies statistics.
+    :return: None
+    """
+    REFRESH_DURATION.set(stats['duration'])
+    REFRESH_COINS.labels("updated").set(stats['updated'])
+    REFRESH_COINS.labels("failed").set(stats['failed'])
+    REFRESH_API_CALLS.set(stats['api_calls'])
+    REFRESH_COMPLETED.set(time.time())
+
+
+def record_data_freshness(oldest: Optional[float], mean: Optional[float]) -> None:
+    """Export when the stored prices were last updated; their age is time() minus these.
+
+    :param oldest: float, optional, oldest last_updated of CoinGecko-backed rows.
+    :param mean: float, optional, mean last_updated of CoinGecko-backed rows.
+    :return: None
+    """
+    if oldest is not None:
+        DATA_LAST_UPDATED.labels("oldest").set(oldest)
+    if mean is not None:
+        DATA_LAST_UPDATED.labels("mean").set(mean)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format.
+
+    :return: Tuple of body and content type.
+    """
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+    for metric in _lazy_metrics:
+        metric.create()  # report metrics that were never used, too
+
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
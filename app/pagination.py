@@ -0,0 +1,110 @@
+import base64
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.sql import Select
+
+from app.database import CryptocurrencyDB
+
+SORT_COLUMNS = {
+    'id': CryptocurrencyDB.id,
+    'market_cap': CryptocurrencyDB.market_cap,
+    'current_price': CryptocurrencyDB.current_price,
+    'last_updated': CryptocurrencyDB.last_updated,
+    'symbol': CryptocurrencyDB.symbol
+}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not match the query."""
+
+
+def encode_cursor(sort_by: str, order: str, value: Any, last_id: int) -> str:
+    """Encode the position after the last row of a page as an opaque cursor.
+
+    :param sort_by: str, sort column name.
+    :param order: str, "asc" or "desc".
+    :param value: Any, sort column value of the last row.
+    :param last_id: int, ID of the last row.
+    :return: str, URL-safe cursor.
+    """
+    payload = json.dumps({'s': sort_by, 'o': order, 'v': value, 'id': last_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> Tuple[Any, int]:
+    """Decode a cursor produced by encode_cursor for the same sort.
+
+    :param cursor: str, cursor from a previous page.
+    :param sort_by: str, sort column name of the current request.
+    :param order: str, sort order of the current request.
+    :exception: InvalidCursor if the cursor is malformed or was issued for another sort.
+    :return: Tuple of the last sort value and last ID.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload: Dict = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id = payload['v'], int(payload['id'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+
+    if payload.get('s') != sort_by or payload.get('o') != order:
+        raise InvalidCursor("Cursor was issued for a different sort order")
+
+    return value, last_id
+
+
+def apply_keyset(query: Select, sort_by: str, order: str, cursor: Optional[str]) -> Select:
+    """Order a cryptocurrency query and restrict it to rows after the cursor.
+
+    Rows are ordered by (sort column, id). NULL sort values come last in
+    ascending and first in descending order, so either direction is a plain
+    forward or backward range scan of the matching composite index.
+
+    :param query: Select, query over CryptocurrencyDB.
+    :param sort_by: str, key of SORT_COLUMNS.
+    :param order: str, "asc" or "desc".
+    :param cursor: str, optional, cursor from the previous page.
+    :exception: InvalidCursor if the cursor is invalid.
+    :return: Select, ordered and filtered query.
+    """
+    column = SORT_COLUMNS[sort_by]
+    descending = order == 'desc'
+
+    if sort_by == 'id':
+        ordering = [column.desc() if descending else column.asc()]
+    elif descending:
+        ordering = [column.desc().nulls_first(), CryptocurrencyDB.id.desc()]
+    else:
+        ordering = [column.asc().nulls_last(), CryptocurrencyDB.id.asc()]
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, order)
+        row_key = tuple_(column, CryptocurrencyDB.id)
+
+        if sort_by == 'id':
+            condition = column < last_id if descending else column > last_id
+        elif descending and value is None:
+            condition = or_(and_(column.is_(None), CryptocurrencyDB.id < last_id), column.isnot(None))
+        elif descending:
+            condition = row_key < (value, last_id)
+        elif value is None:
+            condition = and_(column.is_(None), CryptocurrencyDB.id > last_id)
+        else:
+            condition = or_(row_key > (value, last_id), column.is_(None))
+
+        query = query.where(condition)
+
+    return query.order_by(*ordering)
+
+
+def next_cursor(row: CryptocurrencyDB, sort_by: str, order: str) -> str:
+    """Build the cursor pointing after the given row.
+
+    :param row: CryptocurrencyDB, last row of the page.
+    :param sort_by: str, sort column name.
+    :param order: str, sort order.
+    :return: str, cursor for the next page.
+    """
+    return encode_cursor(sort_by, order, getattr(row, sort_by), row.id)
@@ -0,0 +1,448 @@
+import copy
+import logging
+import os
+import threading
+import time
+from select import select as wait_readable
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from app.database import (
+    DATABASE_URL, TABLE_CHANGES_KEY, TABLE_VERSION_CHANNEL, CryptocurrencyDB, SessionLocal, TableVersionDB,
+    decode_table_change
+)
+from app.leader import KEEPALIVE_ARGS
+from app.serialization import dumps
+from app.streaming import price_broker
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUOTES_POLL_SECONDS = float(os.getenv("QUOTES_POLL_SECONDS", "1"))  # version polling interval without LISTEN/NOTIFY
+QUOTES_MAX_LOOKUPS = int(os.getenv("QUOTES_MAX_LOOKUPS", "500"))
+
+QUOTE_FIELDS = ('id', 'symbol', 'current_price', 'market_cap', 'last_updated')
+QUOTE_COLUMNS = tuple(getattr(CryptocurrencyDB, field) for field in QUOTE_FIELDS)
+SNAPSHOT_COLUMNS = ('ids', 'symbols', 'prices', 'market_caps', 'last_updated')  # QuoteSnapshot arrays, in QUOTE_FIELDS order
+
+
+def _nullable(values: "np.ndarray") -> List:
+    """Convert a float column to a list, with NaN (NULL) as None.
+
+    :param values: np.ndarray, float64 values.
+    :return: List of floats and None.
+    """
+    import numpy as np
+
+    result = values.tolist()
+    for position in np.flatnonzero(np.isnan(values)):
+        result[position] = None
+    return result
+
+
+class QuoteSnapshot:
+    """Immutable columnar copy of the current quotes, indexed by ID and symbol.
+
+    Each column is a NumPy array in ID order; NULL prices and market caps are
+    stored as NaN. Lookups resolve IDs and symbols to row positions through
+    dicts, then gather every column with one fancy-indexing operation. NumPy
+    is imported by the first snapshot built, not with this module.
+    """
+
+    def __init__(self, rows: Sequence, version: int) -> None:
+        """Build the columns from quote rows.
+
+        :param rows: Sequence of (id, symbol, current_price, market_cap, last_updated) rows.
+        :param version: int, cryptocurrencies table version the rows were read at.
+        :return: None
+        """
+        import numpy as np
+
+        self.version = version
+        self.built_at = time.time()
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.symbols = np.array([row[1] for row in rows], dtype=object)
+        self.prices = np.array([row[2] for row in rows], dtype=np.float64)
+        self.market_caps = np.array([row[3] for row in rows], dtype=np.float64)
+        self.last_updated = np.array([row[4] for row in rows], dtype=np.float64)
+        self.by_id = {row_id: position for position, row_id in enumerate(self.ids.tolist())}
+        self.by_symbol = {symbol: position for position, symbol in enumerate(self.symbols.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def positions(self, symbols: Iterable[str] = (), ids: Iterable[int] = ()) -> List[int]:
+        """Resolve symbols and IDs to row positions, skipping unknown ones and duplicates.
+
+        :param symbols: Iterable[str], uppercase symbols.
+        :param ids: Iterable[int], cryptocurrency IDs.
+        :return: List[int], positions in request order (symbols first).
+        """
+        found = [self.by_symbol.get(symbol) for symbol in symbols] + [self.by_id.get(row_id) for row_id in ids]
+        return list(dict.fromkeys(position for position in found if position is not None))
+
+    def quotes(self, positions: Sequence[int]) -> List[Dict]:
+        """Gather the quotes at some row positions.
+
+        :param positions: Sequence[int], row positions.
+        :return: List[Dict], quotes with the QUOTE_FIELDS keys.
+        """
+        import numpy as np
+
+        index = np.asarray(positions, dtype=np.intp)
+        columns = (
+            self.ids[index].tolist(),
+            self.symbols[index].tolist(),
+            _nullable(self.prices[index]),
+            _nullable(self.market_caps[index]),
+            _nullable(self.last_updated[index])
+        )
+        return [dict(zip(QUOTE_FIELDS, values)) for values in zip(*columns)]
+
+    def encode(self, positions: Sequence[int]) -> bytes:
+        """Encode the quotes at some row positions as a JSON array.
+
+        :param positions: Sequence[int], row positions.
+        :return: bytes, JSON array of QuoteResponse objects.
+        """
+        return dumps(self.quotes(positions))
+
+    def with_rows(self, rows: Sequence, removed: Iterable[int], version: int) -> Tuple["QuoteSnapshot", List[Dict]]:
+        """Copy this snapshot with some rows replaced, added or removed.
+
+        Only the copied columns are touched; the lookup dicts are rebuilt only
+        when rows were added or removed, or a symbol changed.
+
+        :param rows: Sequence of (id, symbol, current_price, market_cap, last_updated) rows to write.
+        :param removed: Iterable[int], IDs of rows to remove.
+        :param version: int, cryptocurrencies table version after the change.
+        :return: Tuple of the new snapshot and its written quotes, then removed ones with deleted=True.
+        """
+        import numpy as np
+
+        snapshot = copy.copy(self)
+        snapshot.version = version
+        snapshot.built_at = time.time()
+        for name in SNAPSHOT_COLUMNS:
+            setattr(snapshot, name, getattr(self, name).copy())
+
+        added, reindex = [], False
+        for row in rows:
+            position = self.by_id.get(row[0])
+            if position is None:
+                added.append(row)
+                continue
+            reindex |= snapshot.symbols[position] != row[1]
+            snapshot.symbols[position] = row[1]
+            for name, value in zip(SNAPSHOT_COLUMNS[2:], row[2:]):
+                getattr(snapshot, name)[position] = np.nan if value is None else value
+
+        removed_positions = [self.by_id[row_id] for row_id in removed if row_id in self.by_id]
+        if added or removed_positions:
+            keep = np.ones(len(self), dtype=bool)
+            keep[removed_positions] = False
+            extra = QuoteSnapshot(added, version)
+            merged = [np.concatenate([getattr(snapshot, name)[keep], getattr(extra, name)]) for name in SNAPSHOT_COLUMNS]
+            order = np.argsort(merged[0], kind='stable')
+            for name, values in zip(SNAPSHOT_COLUMNS, merged):
+                setattr(snapshot, name, values[order])
+            snapshot.by_id = {row_id: position for position, row_id in enumerate(snapshot.ids.tolist())}
+            reindex = True
+        if reindex:
+            snapshot.by_symbol = {symbol: position for position, symbol in enumerate(snapshot.symbols.tolist())}
+
+        written = snapshot.quotes(sorted(snapshot.by_id[row[0]] for row in rows))
+        return snapshot, written + [{**quote, 'deleted': True} for quote in self.quotes(removed_positions)]
+
+    def changes_since(self, previous: "QuoteSnapshot") -> List[Dict]:
+        """Diff this snapshot against an older one.
+
+        :param previous: QuoteSnapshot, older snapshot.
+        :return: List[Dict], added and changed quotes, then removed ones with deleted=True.
+        """
+        import numpy as np
+
+        _, old, new = np.intersect1d(previous.ids, self.ids, assume_unique=True, return_indices=True)
+        changed = previous.symbols[old] != self.symbols[new]
+        for before, after in (
+            (previous.prices[old], self.prices[new]),
+            (previous.market_caps[old], self.market_caps[new]),
+            (previous.last_updated[old], self.last_updated[new])
+        ):
+            changed |= ~((before == after) | (np.isnan(before) & np.isnan(after)))
+
+        added = np.setdiff1d(np.arange(len(self)), new, assume_unique=True)
+        removed = np.setdiff1d(np.arange(len(previous)), old, assume_unique=True)
+        updates = self.quotes(np.sort(np.concatenate([new[changed], added])))
+        return updates + [{**quote, 'deleted': True} for quote in previous.quotes(removed)]
+
+
+class QuoteStore:
+    """Process-local quote snapshot, updated whenever the cryptocurrencies table changes.
+
+    An update builds a new QuoteSnapshot and then swaps the reference, so
+    readers always see a complete snapshot. Writes name the rows they changed
+    (see bump_table_version): when the snapshot is at the version just before,
+    only those rows are read; otherwise the whole table is read again. Writes
+    of this process are applied as soon as they commit, so a client reads its
+    own writes. A watcher thread catches up with writes from other workers: on
+    Postgres (psycopg2) it LISTENs on the channel bump_table_version notifies,
+    whose payloads carry the changed row IDs; on other databases it polls the
+    table version every poll_seconds and reads the whole table. Each update
+    passes the quotes it changed to on_change, which is how price updates reach
+    the streaming subscribers of every worker; the snapshot diff is only
+    needed after whole-table reads.
+    """
+
+    def __init__(
+        self,
+        database_url: str = DATABASE_URL,
+        poll_seconds: float = QUOTES_POLL_SECONDS,
+        on_change: Optional[Callable[[List[Dict]], None]] = None
+    ) -> None:
+        """Initialize the store; the snapshot is built on start() or first use.
+
+        :param database_url: str, sync database URL, used for the LISTEN connection.
+        :param poll_seconds: float, version polling interval, and LISTEN wait between stop checks.
+        :param on_change: Callable, optional, called with the changed quotes after each rebuild.
+        :return: None
+        """
+        self.database_url = database_url
+        self.poll_seconds = poll_seconds
+        self.on_change = on_change
+        self.listen = make_url(database_url).get_dialect().driver == "psycopg2"
+        self.snapshot: Optional[QuoteSnapshot] = None
+        self.rebuilds = 0
+        self.deltas = 0
+        self.notifications = 0
+        self._build_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self) -> QuoteSnapshot:
+        """Return the current snapshot, building it if there is none yet.
+
+        :return: QuoteSnapshot, current snapshot.
+        """
+        snapshot = self.snapshot
+        return snapshot if snapshot is not None else self.rebuild()
+
+    def rebuild(self) -> QuoteSnapshot:
+        """Read the table into a new snapshot, make it current and report what changed.
+
+        :return: QuoteSnapshot, new snapshot.
+        """
+        with self._build_lock:
+            return self._rebuild()
+
+    def apply(self, changes: Sequence[Tuple[Optional[int], Optional[List[int]]]]) -> None:
+        """Bring the snapshot up to date with committed table changes.
+
+        Changes the snapshot already includes are skipped. If the others follow
+        on from the snapshot's version and all name their rows, only those rows
+        are read; otherwise the whole table is.
+
+        :param changes: Sequence of (version, changed row IDs) tuples, None for unknown values.
+        :return: None
+        """
+        with self._build_lock:
+            snapshot = self.snapshot
+            if snapshot is None:
+                return  # built on start() or first use
+
+            pending = sorted(
+                (change for change in changes if change[0] is None or change[0] > snapshot.version),
+                key=lambda change: change[0] or 0
+            )
+            if not pending:
+                return
+
+            versions = [version for version, _ in pending]
+            if versions != list(range(snapshot.version + 1, snapshot.version + 1 + len(pending))) or any(
+                ids is None for _, ids in pending
+            ):
+                self._rebuild()
+                return
+
+            ids = sorted({row_id for _, changed_ids in pending for row_id in changed_ids})
+            with SessionLocal() as db:
+                rows = db.execute(
+                    select(*QUOTE_COLUMNS).where(CryptocurrencyDB.id.in_(ids)).order_by(CryptocurrencyDB.id)
+                ).all()
+
+            self.snapshot, written = snapshot.with_rows(rows, set(ids) - {row[0] for row in rows}, versions[-1])
+            self.deltas += 1
+            self._publish(written)
+
+    def _rebuild(self) -> QuoteSnapshot:
+        """Read the whole table into a new snapshot. Must be called while holding the build lock.
+
+        :return: QuoteSnapshot, new snapshot.
+        """
+        with SessionLocal() as db:
+            version = self._read_version(db)
+            rows = db.execute(select(*QUOTE_COLUMNS).order_by(CryptocurrencyDB.id)).all()
+
+        previous = self.snapshot
+        snapshot = QuoteSnapshot(rows, version)
+        self.snapshot = snapshot
+        self.rebuilds += 1
+
+        if previous is not None and self.on_change is not None:
+            try:
+                self._publish(snapshot.changes_since(previous))
+            except Exception as e:
+                logger.error(f"Error diffing quote snapshots: {e}")
+        return snapshot
+
+    def _publish(self, changes: List[Dict]) -> None:
+        """Pass changed quotes to on_change.
+
+        :param changes: List[Dict], changed quotes.
+        :return: None
+        """
+        if not changes or self.on_change is None:
+            return
+        try:
+            self.on_change(changes)
+        except Exception as e:
+            logger.error(f"Error publishing quote changes: {e}")
+
+    def start(self) -> None:
+        """Start the watcher thread, which builds the first snapshot.
+
+        :return: None
+        """
+        if self._thread is not None:
+            return
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._watch, name="quote-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the watcher thread.
+
+        :param timeout: float, seconds to wait for it.
+        :return: None
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        """Return the snapshot size, version and age, and the watcher counters.
+
+        :return: Dict with mode, rows, version, age, rebuilds, deltas and notifications.
+        """
+        snapshot = self.snapshot
+        return {
+            'mode': "listen" if self.listen else "poll",
+            'rows': len(snapshot) if snapshot is not None else 0,
+            'version': snapshot.version if snapshot is not None else None,
+            'age': time.time() - snapshot.built_at if snapshot is not None else None,
+            'rebuilds': self.rebuilds,
+            'deltas': self.deltas,
+            'notifications': self.notifications
+        }
+
+    @staticmethod
+    def _read_version(db) -> int:
+        """Read the cryptocurrencies table version.
+
+        :param db: Session, database session.
+        :return: int, version (0 before the first write).
+        """
+        return db.execute(
+            select(TableVersionDB.version).where(TableVersionDB.name == CryptocurrencyDB.__tablename__)
+        ).scalar() or 0
+
+    def _watch(self) -> None:
+        """Watcher thread: keep the snapshot current until stopped.
+
+        :return: None
+        """
+        while not self._stopping.is_set():
+            try:
+                if self.listen:
+                    self._listen()
+                else:
+                    self._poll()
+            except Exception as e:
+                logger.error(f"Quote snapshot watcher failed: {e}")
+                self._stopping.wait(self.poll_seconds)
+
+    def _poll(self) -> None:
+        """Rebuild whenever the table version changes, checking every poll_seconds.
+
+        :return: None
+        """
+        self.rebuild()
+        while not self._stopping.wait(self.poll_seconds):
+            with SessionLocal() as db:
+                version = self._read_version(db)
+            if version != self.snapshot.version:
+                self.rebuild()
+
+    def _listen(self) -> None:
+        """Apply every table version notification, on a dedicated LISTEN connection.
+
+        Notifications arriving together (e.g. the batches of a refresh) are
+        applied with a single read. The snapshot is rebuilt after (re)connecting,
+        since notifications sent while disconnected are lost.
+
+        :return: None
+        """
+        engine = create_engine(
+            self.database_url,
+            poolclass=NullPool,
+            isolation_level="AUTOCOMMIT",
+            connect_args=KEEPALIVE_ARGS
+        )
+        try:
+            with engine.connect() as connection:
+                connection.execute(text(f"LISTEN {TABLE_VERSION_CHANNEL}"))
+                self.rebuild()
+
+                dbapi_connection = connection.connection.dbapi_connection
+                while not self._stopping.is_set():
+                    if not wait_readable([dbapi_connection], [], [], self.poll_seconds)[0]:
+                        continue
+
+                    dbapi_connection.poll()
+                    changes = [decode_table_change(notify.payload) for notify in dbapi_connection.notifies]
+                    self.notifications += len(dbapi_connection.notifies)
+                    dbapi_connection.notifies.clear()
+                    self.apply([
+                        (version, ids) for name, version, ids in changes if name == CryptocurrencyDB.__tablename__
+                    ])
+        finally:
+            engine.dispose()
+
+
+quote_store = QuoteStore(on_change=price_broker.publish)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_committed_changes(session) -> None:
+    """Apply the cryptocurrencies writes a session just committed to the local snapshot.
+
+    :param session: Session, session that committed.
+    :return: None
+    """
+    changes = [
+        (version, ids) for name, version, ids in session.info.pop(TABLE_CHANGES_KEY, ())
+        if name == CryptocurrencyDB.__tablename__
+    ]
+    if not changes:
+        return
+    try:
+        quote_store.apply(changes)
+    except Exception as e:
+        logger.error(f"Error applying committed quote changes: {e}")
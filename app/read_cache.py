@@ -0,0 +1,104 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Dict, Optional, Tuple
+
+READ_CACHE_MAX_PAGES = int(os.getenv("READ_CACHE_MAX_PAGES", "256"))
+
+
+def make_etag(version: int, key: str) -> str:
+    """Build a strong ETag for a representation of a table at a version.
+
+    :param version: int, table version.
+    :param key: str, identifies the representation (e.g. the canonical query string).
+    :return: str, quoted ETag value.
+    """
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return f'"v{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison).
+
+    :param if_none_match: str, optional, If-None-Match header value.
+    :param etag: str, current ETag.
+    :return: bool, True if the client's copy is current.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+def cache_headers(etag: str, updated_at: float) -> Dict[str, str]:
+    """Build the validator headers for a response.
+
+    :param etag: str, ETag value.
+    :param updated_at: float, time of the last write to the table.
+    :return: Dict with ETag, Last-Modified and Cache-Control headers.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if updated_at:
+        headers["Last-Modified"] = formatdate(updated_at, usegmt=True)
+    return headers
+
+
+class PageCache:
+    """In-process LRU of serialized list pages for the current table version.
+
+    Entries from older versions are dropped as soon as a newer version is seen,
+    so a write anywhere invalidates every cached page.
+    """
+
+    def __init__(self, max_pages: int = READ_CACHE_MAX_PAGES) -> None:
+        """Initialize the cache.
+
+        :param max_pages: int, maximum number of cached pages.
+        :return: None
+        """
+        self.max_pages = max_pages
+        self.version: Optional[int] = None
+        self._pages: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: int, key: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        """Return a cached page body and headers.
+
+        :param version: int, current table version.
+        :param key: str, canonical query string of the page.
+        :return: Tuple of body and extra headers, or None.
+        """
+        with self._lock:
+            if version != self.version:
+                return None
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+            return page
+
+    def set(self, version: int, key: str, body: bytes, headers: Dict[str, str]) -> None:
+        """Store a page body and headers.
+
+        :param version: int, table version the page was read at.
+        :param key: str, canonical query string of the page.
+        :param body: bytes, serialized JSON body.
+        :param headers: Dict[str, str], extra headers to replay (e.g. X-Next-Cursor).
+        :return: None
+        """
+        with self._lock:
+            if self.version is None or version > self.version:
+                self._pages.clear()
+                self.version = version
+            elif version < self.version:
+                return
+
+            self._pages[key] = (body, headers)
+            self._pages.move_to_end(key)
+
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
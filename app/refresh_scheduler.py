@@ -0,0 +1,305 @@
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.database import CryptocurrencyDB, SessionLocal, add_coin_reads, take_coin_reads
+
+logger = logging.getLogger(__name__)
+
+# evaluated in order, the first matching tier wins; intervals are in seconds
+DEFAULT_REFRESH_TIERS = [
+    {'name': 'pinned', 'pinned': True, 'interval': 300},
+    {'name': 'hot', 'min_reads': 10, 'interval': 600},
+    {'name': 'large_cap', 'min_market_cap': 1e10, 'interval': 900},
+    {'name': 'mid_cap', 'min_market_cap': 1e8, 'interval': 3600},
+    {'name': 'long_tail', 'interval': 86400}
+]
+
+REFRESH_TIERS = json.loads(os.getenv("REFRESH_TIERS", "null")) or DEFAULT_REFRESH_TIERS
+REFRESH_TICK_SECONDS = float(os.getenv("REFRESH_TICK_SECONDS", "60"))
+REFRESH_CALL_BUDGET_PER_HOUR = float(os.getenv("REFRESH_CALL_BUDGET_PER_HOUR", "600"))
+REFRESH_SYNC_SECONDS = float(os.getenv("REFRESH_SYNC_SECONDS", "600"))
+REFRESH_RETRY_SECONDS = float(os.getenv("REFRESH_RETRY_SECONDS", "60"))  # first retry of a failed coin, doubling
+REFRESH_READS_FLUSH_SECONDS = float(os.getenv("REFRESH_READS_FLUSH_SECONDS", "60"))
+
+
+def assign_tier(market_cap: Optional[float], pinned: bool, reads: int, tiers: List[Dict] = REFRESH_TIERS) -> Dict:
+    """Pick the refresh tier of a coin.
+
+    :param market_cap: float, optional, current market cap.
+    :param pinned: bool, whether the coin is pinned.
+    :param reads: int, recent number of reads of the coin.
+    :param tiers: List[Dict], tier definitions in priority order.
+    :return: Dict, first tier whose conditions all match (the last tier otherwise).
+    """
+    for tier in tiers:
+        if tier.get('pinned') and not pinned:
+            continue
+        if 'min_reads' in tier and reads < tier['min_reads']:
+            continue
+        if 'min_market_cap' in tier and (market_cap or 0) < tier['min_market_cap']:
+            continue
+        return tier
+
+    return tiers[-1]
+
+
+class TieredRefreshScheduler:
+    """Refreshes coins when they fall due, most overdue first, within a call budget.
+
+    Every coin sits in a min-heap keyed on its next due time, which comes from its
+    tier's interval. Each tick earns call credit at REFRESH_CALL_BUDGET_PER_HOUR and
+    spends it on the most overdue coins; whatever does not fit stays queued. Coins
+    whose refresh failed are retried after retry_seconds, doubling with every
+    further failure up to their tier's interval. Every tick also queues coins
+    created since the queue was built, wherever they were created, so they do
+    not wait for the next sync.
+
+    sync() and tick() run on different threads (leader election and the refresh
+    job), so the queue is only touched while holding a lock; the refresh itself
+    runs without it. Reads are counted by every worker and flushed to the
+    coin_reads table, where the leader's sync() picks them up.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[List[int]], Dict],
+        coins_per_call: int,
+        budget_per_hour: float = REFRESH_CALL_BUDGET_PER_HOUR,
+        tiers: List[Dict] = REFRESH_TIERS,
+        retry_seconds: float = REFRESH_RETRY_SECONDS
+    ) -> None:
+        """Initialize the scheduler.
+
+        :param refresh: Callable, refreshes the given cryptocurrency IDs and returns stats with api_calls.
+        :param coins_per_call: int, coins refreshed per CoinGecko call (250 batched, 1 per coin).
+        :param budget_per_hour: float, maximum CoinGecko calls per hour spent on refreshes.
+        :param tiers: List[Dict], tier definitions in priority order.
+        :param retry_seconds: float, delay before the first retry of a coin whose refresh failed.
+        :return: None
+        """
+        self.refresh = refresh
+        self.coins_per_call = coins_per_call
+        self.budget_per_hour = budget_per_hour
+        self.tiers = tiers
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._heap: List = []
+        self._tiers_by_coin: Dict[int, Dict] = {}
+        self._retries: Dict[int, Tuple[int, float]] = {}  # failed coin -> (consecutive failures, retry time)
+        self._syncs = 0
+        self._max_id = 0  # highest coin ID queued; higher IDs were created since
+        self._reads: Dict[int, int] = {}
+        self._reads_lock = threading.Lock()
+        self._credit = 0.0
+        self._last_tick: Optional[float] = None
+        self._last_sync = 0.0
+        self.last_run: Dict = {}
+
+    def record_read(self, cryptocurrency_id: int) -> None:
+        """Count a read of a coin, used to promote frequently read coins.
+
+        :param cryptocurrency_id: int, ID of the cryptocurrency.
+        :return: None
+        """
+        with self._reads_lock:
+            self._reads[cryptocurrency_id] = self._reads.get(cryptocurrency_id, 0) + 1
+
+    def flush_reads(self) -> None:
+        """Add the reads counted by this worker to the shared counts in the database.
+
+        Runs on every worker; counts that fail to be written are kept for the next flush.
+
+        :return: None
+        """
+        with self._reads_lock:
+            reads, self._reads = self._reads, {}
+        if not reads:
+            return
+
+        db = SessionLocal()
+        try:
+            add_coin_reads(db, reads)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error flushing read counts of {len(reads)} coins: {e}")
+            with self._reads_lock:
+                for key, count in reads.items():
+                    self._reads[key] = self._reads.get(key, 0) + count
+        finally:
+            db.close()
+
+    def sync(self) -> None:
+        """Rebuild the queue from the database, re-evaluating every coin's tier.
+
+        Uses the read counts of all workers, which are halved on every sync so they
+        track recent popularity.
+
+        :return: None
+        """
+        self.flush_reads()
+
+        db = SessionLocal()
+        try:
+            reads = take_coin_reads(db)
+            db.commit()
+            rows = db.execute(self._coins_query()).all()
+        finally:
+            db.close()
+
+        with self._lock:
+            self._retries = {row.id: self._retries[row.id] for row in rows if row.id in self._retries}
+            heap, tiers_by_coin = [], {}
+            for row in rows:
+                tier = assign_tier(row.market_cap, row.pinned, reads.get(row.id, 0), self.tiers)
+                tiers_by_coin[row.id] = tier
+                next_due = (row.last_updated or 0.0) + tier['interval']
+                if row.id in self._retries:
+                    next_due = max(next_due, self._retries[row.id][1])
+                heap.append((next_due, row.id))
+
+            heapq.heapify(heap)
+            self._heap, self._tiers_by_coin = heap, tiers_by_coin
+            self._max_id = max(tiers_by_coin, default=0)
+            self._last_sync = time.monotonic()
+            self._syncs += 1
+
+    def queue_new_coins(self) -> int:
+        """Queue the coins created since the queue was built, without a full sync.
+
+        :return: int, number of coins queued.
+        """
+        db = SessionLocal()
+        try:
+            rows = db.execute(self._coins_query().where(CryptocurrencyDB.id > self._max_id)).all()
+        finally:
+            db.close()
+
+        queued = 0
+        with self._lock:
+            for row in rows:
+                self._max_id = max(self._max_id, row.id)
+                if row.id in self._tiers_by_coin:
+                    continue  # a sync since the query already queued it
+                tier = assign_tier(row.market_cap, row.pinned, 0, self.tiers)
+                self._tiers_by_coin[row.id] = tier
+                heapq.heappush(self._heap, ((row.last_updated or 0.0) + tier['interval'], row.id))
+                queued += 1
+
+        return queued
+
+    @staticmethod
+    def _coins_query():
+        """Select the columns the queue needs of every CoinGecko-backed coin.
+
+        :return: Select, query for id, market_cap, pinned and last_updated.
+        """
+        return select(
+            CryptocurrencyDB.id,
+            CryptocurrencyDB.market_cap,
+            CryptocurrencyDB.pinned,
+            CryptocurrencyDB.last_updated
+        ).where(CryptocurrencyDB.coingecko_id.isnot(None))
+
+    def tick(self) -> Dict:
+        """Refresh the most overdue coins that fit into the available call credit.
+
+        :return: Dict with the stats of this tick.
+        """
+        now_monotonic = time.monotonic()
+        if not self._last_sync or now_monotonic - self._last_sync >= REFRESH_SYNC_SECONDS:
+            self.sync()
+        else:
+            self.queue_new_coins()
+
+        with self._lock:
+            elapsed = REFRESH_TICK_SECONDS if self._last_tick is None else now_monotonic - self._last_tick
+            self._last_tick = now_monotonic
+
+            # credit accrues at the hourly budget, capped at one tick's worth of unspent calls
+            per_tick = self.budget_per_hour * REFRESH_TICK_SECONDS / 3600
+            self._credit = min(
+                max(per_tick, 1.0),
+                self._credit + self.budget_per_hour * elapsed / 3600
+            )
+
+            now = time.time()
+            max_coins = int(self._credit) * self.coins_per_call
+            due = []
+            while self._heap and self._heap[0][0] <= now and len(due) < max_coins:
+                due.append(heapq.heappop(self._heap)[1])
+            syncs = self._syncs
+
+        stats = {'updated': 0, 'failed': 0, 'failed_ids': [], 'api_calls': 0}
+        if due:
+            try:
+                stats = self.refresh(due)
+            except Exception as e:
+                logger.error(f"Error refreshing {len(due)} coins: {e}")
+                stats = {'updated': 0, 'failed': len(due), 'failed_ids': due, 'api_calls': 0}
+
+        with self._lock:
+            self._credit -= stats.get('api_calls', 0)
+            if due:
+                self._requeue(due, set(stats.get('failed_ids', ())), resynced=self._syncs != syncs)
+
+            backlog = sum(1 for next_due, _ in self._heap if next_due <= now)
+            self.last_run = {'due': len(due), 'backlog': backlog, 'credit': round(self._credit, 2), **stats}
+
+        if backlog:
+            logger.warning(f"{backlog} coins are overdue for refresh, call budget exhausted")
+        return self.last_run
+
+    def _requeue(self, refreshed: List[int], failed: Set[int], resynced: bool) -> None:
+        """Queue refreshed coins for their next refresh, and failed ones for a retry.
+
+        Must be called while holding the lock.
+
+        :param refreshed: List[int], IDs taken off the queue for this tick.
+        :param failed: Set[int], IDs among them whose refresh failed.
+        :param resynced: bool, whether sync() rebuilt the queue during the refresh; the
+            rebuilt queue already holds the refreshed coins, so those entries are replaced.
+        :return: None
+        """
+        if resynced:
+            refreshed_set = set(refreshed)
+            self._heap = [entry for entry in self._heap if entry[1] not in refreshed_set]
+            heapq.heapify(self._heap)
+
+        finished = time.time()
+        for cryptocurrency_id in refreshed:
+            interval = self._tiers_by_coin.get(cryptocurrency_id, self.tiers[-1])['interval']
+            if cryptocurrency_id in failed:
+                failures = self._retries.get(cryptocurrency_id, (0, 0.0))[0] + 1
+                next_due = finished + min(self.retry_seconds * 2 ** (failures - 1), interval)
+                self._retries[cryptocurrency_id] = (failures, next_due)
+            else:
+                self._retries.pop(cryptocurrency_id, None)
+                next_due = finished + interval
+            heapq.heappush(self._heap, (next_due, cryptocurrency_id))
+
+    def stats(self) -> Dict:
+        """Return queue size, coins per tier and the last tick's stats.
+
+        :return: Dict with scheduler stats.
+        """
+        with self._lock:
+            tiers: Dict[str, int] = {}
+            for tier in self._tiers_by_coin.values():
+                tiers[tier['name']] = tiers.get(tier['name'], 0) + 1
+            queued, retrying = len(self._heap), len(self._retries)
+
+        return {
+            'queued': queued,
+            'retrying': retrying,
+            'tiers': tiers,
+            'budget_per_hour': self.budget_per_hour,
+            'last_run': self.last_run
+        }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Literal
 
 class CryptocurrencyBase(BaseModel):
     """Base model for cryptocurrency data validation."""
@@ -16,6 +16,7 @@ class CryptocurrencyCreate(BaseModel):
     coingecko_id: Optional[str] = None
     current_price: Optional[float] = Field(None, gt=0)
     market_cap: Optional[float] = Field(None, gt=0)
+    pinned: bool = False
 
     @validator('symbol')
     def uppercase_symbol(cls, symbol):
@@ -61,6 +62,7 @@ class CryptocurrencyUpdate(BaseModel):
     symbol: Optional[str] = Field(None, min_length=1, max_length=10)
     current_price: Optional[float] = Field(None, gt=0)
     market_cap: Optional[float] = Field(None, gt=0)
+    pinned: Optional[bool] = None
 
     class Config:
         extra = "allow"
@@ -74,6 +76,7 @@ class CryptocurrencyResponse(BaseModel):
     current_price: Optional[float]
     market_cap: Optional[float]
     last_updated: Optional[float]
+    pinned: bool = False
 
     class Config:
         orm_mode = True
@@ -85,3 +88,51 @@ class CryptocurrencyListResponse(BaseModel):
     class Config:
         extra = "allow"
         orm_mode = True
+
+class BulkItemResult(BaseModel):
+    """Model for the outcome of a single item of a bulk create request."""
+    index: int
+    symbol: str
+    status: Literal['created', 'updated', 'rejected']
+    id: Optional[int] = None
+    reason: Optional[str] = None
+
+class BulkCreateResponse(BaseModel):
+    """Model for returning the outcome of a bulk create request."""
+    created: int
+    updated: int
+    rejected: int
+    results: List[BulkItemResult]
+
+class CreateJobResponse(BaseModel):
+    """Model for returning the status of an asynchronous create.
+    cryptocurrency_id is set once the row is live, error once the job failed."""
+    id: str
+    status: Literal['pending', 'succeeded', 'failed']
+    symbol: str
+    cryptocurrency_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+    class Config:
+        orm_mode = True
+
+class PriceHistoryBucket(BaseModel):
+    """Model for one time bucket of aggregated price history.
+    open, high and low are only set in ohlc mode."""
+    bucket: float
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: Optional[float]
+    market_cap: Optional[float]
+    samples: int
+
+class QuoteResponse(BaseModel):
+    """Model for a current quote served from the in-memory quote snapshot."""
+    id: int
+    symbol: str
+    current_price: Optional[float]
+    market_cap: Optional[float]
+    last_updated: Optional[float]
@@ -0,0 +1,59 @@
+import json
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import select
+
+from app.database import CryptocurrencyDB
+from app.schemas import CryptocurrencyResponse
+
+try:
+    import orjson
+except ImportError:  # optional, json is used without it
+    orjson = None
+
+# the response model's fields, in order, and the columns selected for them
+RESPONSE_FIELDS = tuple(CryptocurrencyResponse.__fields__)
+RESPONSE_COLUMNS = tuple(getattr(CryptocurrencyDB, field) for field in RESPONSE_FIELDS)
+
+
+def select_response_columns():
+    """Select only the CryptocurrencyResponse columns, returned as plain row tuples.
+
+    Rows skip ORM instance construction and the identity map, and still expose
+    the columns by name (e.g. for keyset cursors).
+
+    :return: Select, statement to add filters, ordering and limits to.
+    """
+    return select(*RESPONSE_COLUMNS)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as compact JSON bytes, with orjson when it is installed.
+
+    :param value: Any, JSON-compatible value.
+    :return: bytes, UTF-8 JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def encode_row(row: Sequence) -> bytes:
+    """Encode one row of select_response_columns() as a CryptocurrencyResponse object.
+
+    :param row: Sequence, column values in RESPONSE_FIELDS order.
+    :return: bytes, JSON object.
+    """
+    return dumps(dict(zip(RESPONSE_FIELDS, row)))
+
+
+def encode_rows(rows: Iterable[Sequence]) -> bytes:
+    """Encode rows of select_response_columns() as a JSON array of CryptocurrencyResponse objects.
+
+    The columns already have the response types, so rows are not re-validated.
+
+    :param rows: Iterable of column values in RESPONSE_FIELDS order.
+    :return: bytes, JSON array.
+    """
+    fields = RESPONSE_FIELDS
+    return dumps([dict(zip(fields, row)) for row in rows])
@@ -0,0 +1,336 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.services.single_flight import SingleFlight, get_single_flight
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.getenv("COINGECKO_CACHE_MAX_ENTRIES", "1024"))
+CACHE_STALE_TTL = float(os.getenv("COINGECKO_CACHE_STALE_TTL", "120"))
+CACHE_BACKEND_URL = os.getenv("COINGECKO_CACHE_BACKEND_URL")  # e.g. redis://redis:6379/0
+
+# fresh lifetime in seconds per cached CoinGeckoService endpoint
+CACHE_TTLS = {
+    'details': float(os.getenv("COINGECKO_CACHE_TTL_DETAILS", "60")),
+    'validate': float(os.getenv("COINGECKO_CACHE_TTL_VALIDATE", "300")),
+    'top': float(os.getenv("COINGECKO_CACHE_TTL_TOP", "60"))
+}
+
+
+class Uncached:
+    """Wraps a loader result that is returned to the caller but never stored, such as a fallback."""
+
+    def __init__(self, value: Any) -> None:
+        """Wrap a value.
+
+        :param value: Any, loaded value.
+        :return: None
+        """
+        self.value = value
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU store of (value, stored_at) entries."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES) -> None:
+        """Initialize the store.
+
+        :param max_entries: int, number of entries kept before evicting the least recently used.
+        :return: None
+        """
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return the (value, stored_at) entry for key.
+
+        :param key: str, cache key.
+        :return: Tuple of value and store time, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, stored_at: float, expire: float) -> None:
+        """Store a value.
+
+        :param key: str, cache key.
+        :param value: Any, value to store.
+        :param stored_at: float, store time as a Unix timestamp.
+        :param expire: float, seconds after which the entry is useless and may be dropped.
+        :return: None
+        """
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Remove an entry.
+
+        :param key: str, cache key.
+        :return: None
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries.
+
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Shared store for multi-worker deployments, backed by Redis.
+
+    Requires the optional redis package. Values must be JSON-serializable;
+    eviction is left to Redis (key expiry and its maxmemory policy).
+    """
+
+    def __init__(self, url: str, prefix: str = "coingecko:") -> None:
+        """Connect to Redis.
+
+        :param url: str, Redis URL.
+        :param prefix: str, prefix for all cache keys.
+        :return: None
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisBackend requires the redis package: pip install redis") from e
+
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return the (value, stored_at) entry for key.
+
+        :param key: str, cache key.
+        :return: Tuple of value and store time, or None.
+        """
+        raw = self._client.get(self.prefix + key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry['value'], entry['stored_at']
+
+    def set(self, key: str, value: Any, stored_at: float, expire: float) -> None:
+        """Store a value.
+
+        :param key: str, cache key.
+        :param value: Any, value to store.
+        :param stored_at: float, store time as a Unix timestamp.
+        :param expire: float, seconds after which the entry is useless and may be dropped.
+        :return: None
+        """
+        raw = json.dumps({'value': value, 'stored_at': stored_at})
+        self._client.set(self.prefix + key, raw, ex=max(1, int(expire)))
+
+    def delete(self, key: str) -> None:
+        """Remove an entry.
+
+        :param key: str, cache key.
+        :return: None
+        """
+        self._client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        """Remove all entries.
+
+        :return: None
+        """
+        for key in self._client.scan_iter(f"{self.prefix}*"):
+            self._client.delete(key)
+
+
+class ResponseCache:
+    """TTL cache with stale-while-revalidate for CoinGecko lookups.
+
+    Entries younger than their namespace TTL are served as hits. Entries up to
+    stale_ttl seconds past it are served immediately while a background thread
+    reloads them. Older entries, and None results, are treated as misses.
+    Concurrent loads of the same key are coalesced into one loader call. If a
+    load fails (raises or returns None) while an expired entry is still stored,
+    that entry is served instead (stale-if-error).
+    """
+
+    def __init__(
+        self,
+        backend: Optional[Any] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_ttl: float = CACHE_STALE_TTL,
+        single_flight: Optional[SingleFlight] = None
+    ) -> None:
+        """Initialize the cache.
+
+        :param backend: MemoryBackend or RedisBackend, optional, defaults to an in-process LRU.
+        :param ttls: Dict[str, float], optional, fresh lifetime per namespace.
+        :param stale_ttl: float, seconds an expired entry may still be served while revalidating.
+        :param single_flight: SingleFlight, optional, defaults to the process-wide "cache" group.
+        :return: None
+        """
+        self.backend = backend or MemoryBackend()
+        self.ttls = ttls or CACHE_TTLS
+        self.stale_ttl = stale_ttl
+        self.single_flight = single_flight or get_single_flight("cache")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.fallbacks = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+    def get_or_load(self, namespace: str, key: str, loader: Callable[[], Any], use_cache: bool = True) -> Any:
+        """Return the cached value for key, loading it on a miss.
+
+        :param namespace: str, endpoint name, selects the TTL.
+        :param key: str, cache key within the namespace.
+        :param loader: Callable, fetches the value; None and Uncached results are not cached.
+        :param use_cache: bool, if False the value is always loaded (and then stored).
+        :return: Any, cached or freshly loaded value.
+        """
+        full_key = f"{namespace}:{key}"
+        ttl = self.ttls.get(namespace, 60.0)
+        entry = self.backend.get(full_key) if use_cache else None
+
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+
+            if age < ttl:
+                self._count('hits')
+                return value
+
+            if age < ttl + self.stale_ttl:
+                self._count('stale_hits')
+                self._revalidate(full_key, ttl, loader)
+                return value
+
+        self._count('misses')
+        if entry is None:
+            value = self._load(full_key, ttl, loader)
+            return value.value if isinstance(value, Uncached) else value
+
+        try:
+            value = self._load(full_key, ttl, loader)
+        except Exception as e:
+            logger.warning(f"Loading {full_key} failed, serving the expired entry: {e}")
+            self._count('fallbacks')
+            return entry[0]
+
+        if value is None or isinstance(value, Uncached):
+            self._count('fallbacks')
+            return entry[0]
+        return value
+
+    def invalidate(self, namespace: str, key: str) -> None:
+        """Drop a single entry.
+
+        :param namespace: str, endpoint name.
+        :param key: str, cache key within the namespace.
+        :return: None
+        """
+        self.backend.delete(f"{namespace}:{key}")
+
+    def clear(self) -> None:
+        """Drop all entries.
+
+        :return: None
+        """
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters.
+
+        :return: Dict with hits, stale_hits, misses, refreshes, fallbacks, evictions and coalesced loads.
+        """
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'fallbacks': self.fallbacks,
+            'evictions': self.backend.evictions,
+            'coalesced': self.single_flight.coalesced
+        }
+
+    def _load(self, full_key: str, ttl: float, loader: Callable[[], Any]) -> Any:
+        """Call the loader and store a result that is neither None nor Uncached.
+
+        Callers loading the same key at the same time share one loader call.
+
+        :param full_key: str, namespaced cache key.
+        :param ttl: float, fresh lifetime of the entry.
+        :param loader: Callable, fetches the value.
+        :return: Any, loaded value.
+        """
+        def load() -> Any:
+            value = loader()
+            if value is not None and not isinstance(value, Uncached):
+                self.backend.set(full_key, value, time.time(), ttl + self.stale_ttl)
+            return value
+
+        return self.single_flight.do(full_key, load)
+
+    def _revalidate(self, full_key: str, ttl: float, loader: Callable[[], Any]) -> None:
+        """Reload an entry in the background unless a reload is already running.
+
+        :param full_key: str, namespaced cache key.
+        :param ttl: float, fresh lifetime of the entry.
+        :param loader: Callable, fetches the value.
+        :return: None
+        """
+        with self._lock:
+            if full_key in self._refreshing:
+                return
+            self._refreshing.add(full_key)
+            self.refreshes += 1
+
+        def refresh() -> None:
+            try:
+                self._load(full_key, ttl, loader)
+            except Exception as e:
+                logger.error(f"Background refresh of {full_key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(full_key)
+
+        self._executor.submit(refresh)
+
+    def _count(self, counter: str) -> None:
+        """Increment a counter attribute.
+
+        :param counter: str, counter name.
+        :return: None
+        """
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def create_cache_backend() -> Any:
+    """Create the cache backend configured by COINGECKO_CACHE_BACKEND_URL.
+
+    :return: RedisBackend if a URL is configured, MemoryBackend otherwise.
+    """
+    if CACHE_BACKEND_URL:
+        return RedisBackend(CACHE_BACKEND_URL)
+    return MemoryBackend()
@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+from app.metrics import COINGECKO_CIRCUIT_STATE, COINGECKO_SHORT_CIRCUITED
+
+logger = logging.getLogger(__name__)
+
+CALL_DEADLINE = float(os.getenv("COINGECKO_CALL_DEADLINE", "10"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("COINGECKO_BREAKER_FAILURES", "5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("COINGECKO_BREAKER_SLOW_CALL_SECONDS", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("COINGECKO_BREAKER_RESET_SECONDS", "30"))
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of calling CoinGecko while the circuit is open."""
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Raised when a CoinGecko call cannot finish within its deadline."""
+
+
+class RateLimitTimeout(DeadlineExceeded):
+    """Raised when waiting for the rate limiter alone would pass the deadline."""
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker shared by all CoinGecko clients.
+
+    Consecutive failed calls (errors, timeouts, 429/5xx after retries) and
+    successful calls slower than slow_call_seconds both count towards
+    failure_threshold. Once it is reached the circuit opens and calls are
+    rejected for reset_seconds; after that a single probe call is let through,
+    which closes the circuit on success and reopens it otherwise.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+        reset_seconds: float = BREAKER_RESET_SECONDS
+    ) -> None:
+        """Initialize a closed circuit.
+
+        :param failure_threshold: int, consecutive failed or slow calls that open the circuit.
+        :param slow_call_seconds: float, duration above which a successful call counts as failed.
+        :param reset_seconds: float, seconds the circuit stays open before a probe call.
+        :return: None
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.short_circuited = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        COINGECKO_CIRCUIT_STATE.set(0)
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected (open, or half-open with a probe in flight)."""
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self._opened_at < self.reset_seconds
+            return self.state == self.HALF_OPEN and self._probing
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a probe call through.
+
+        :return: float, 0 when calls are allowed.
+        """
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Check whether a call may be made, reserving the probe when half-open.
+
+        :return: bool, False if the call must be rejected.
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return self._reject()
+                self._set_state(self.HALF_OPEN)
+
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return self._reject()
+                self._probing = True
+
+            return True
+
+    def check(self) -> None:
+        """Reserve a call, raising if the circuit rejects it.
+
+        :exception: CircuitOpenError if the circuit is open.
+        :return: None
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"CoinGecko circuit is open, next probe in {self.retry_after():.0f}s")
+
+    def record_success(self, seconds: float) -> None:
+        """Record a finished call; slow calls count as failures.
+
+        :param seconds: float, duration of the call.
+        :return: None
+        """
+        if seconds >= self.slow_call_seconds:
+            logger.warning(f"Slow CoinGecko call took {seconds:.1f}s")
+            self.record_failure()
+            return
+
+        with self._lock:
+            self.failures = 0
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+                self._set_state(self.CLOSED)
+                logger.info("CoinGecko circuit closed")
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit when the threshold is reached.
+
+        :return: None
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                return
+
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._probing = False
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                self._set_state(self.OPEN)
+                logger.warning(
+                    f"CoinGecko circuit opened after {self.failures} failed or slow calls, "
+                    f"probing again in {self.reset_seconds:.0f}s"
+                )
+
+    def release(self) -> None:
+        """Give back a reserved call that was never sent (e.g. the probe).
+
+        :return: None
+        """
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict:
+        """Return the circuit state and counters.
+
+        :return: Dict with state, consecutive failures, times opened and rejected calls.
+        """
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'opened': self.opened,
+                'short_circuited': self.short_circuited
+            }
+
+    def _reject(self) -> bool:
+        """Count a rejected call (lock held).
+
+        :return: bool, always False.
+        """
+        self.short_circuited += 1
+        COINGECKO_SHORT_CIRCUITED.inc()
+        return False
+
+    def _set_state(self, state: str) -> None:
+        """Change the state and export it (lock held).
+
+        :param state: str, new state.
+        :return: None
+        """
+        self.state = state
+        COINGECKO_CIRCUIT_STATE.set(self.STATE_VALUES[state])
+
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Return the process-wide CoinGecko circuit breaker, creating it on first use.
+
+    :return: CircuitBreaker, shared breaker.
+    """
+    global _breaker
+
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker()
+
+    return _breaker
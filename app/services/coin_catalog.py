@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = os.getenv("COIN_CATALOG_PATH", ".cache/coin_catalog.json")
+CATALOG_MAX_AGE_HOURS = float(os.getenv("COIN_CATALOG_MAX_AGE_HOURS", "24"))
+
+
+class CoinCatalog:
+    """In-memory index of CoinGecko's /coins/list keyed by id, symbol and name.
+
+    Lookups are case-insensitive. The indexes are rebuilt off to the side and
+    swapped in with a single assignment, so readers never see a partial catalog.
+    """
+
+    def __init__(self, path: Optional[str] = CATALOG_PATH) -> None:
+        """Initialize an empty catalog.
+
+        :param path: str, optional, JSON file the catalog is persisted to.
+        :return: None
+        """
+        self.path = path
+        self.fetched_at: Optional[float] = None
+        self._indexes = ({}, {}, {})
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._indexes[0])
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the catalog is empty or older than COIN_CATALOG_MAX_AGE_HOURS."""
+        if not self.fetched_at:
+            return True
+        return time.time() - self.fetched_at > CATALOG_MAX_AGE_HOURS * 3600
+
+    def replace(self, coins: List[Dict], fetched_at: Optional[float] = None) -> None:
+        """Replace the catalog contents and rebuild the indexes.
+
+        :param coins: List[Dict], /coins/list entries with id, symbol and name.
+        :param fetched_at: float, optional, time the list was fetched, defaults to now.
+        :return: None
+        """
+        by_id, by_symbol, by_name = {}, {}, {}
+
+        for coin in coins:
+            entry = {'id': coin['id'], 'symbol': coin['symbol'], 'name': coin['name']}
+            by_id[entry['id'].lower()] = entry
+            by_symbol.setdefault(entry['symbol'].lower(), []).append(entry)
+            by_name.setdefault(entry['name'].lower(), []).append(entry)
+
+        with self._lock:
+            self._indexes = (by_id, by_symbol, by_name)
+            self.fetched_at = fetched_at or time.time()
+
+    def get_by_id(self, coingecko_id: str) -> Optional[Dict]:
+        """Look up a coin by its CoinGecko ID.
+
+        :param coingecko_id: str, CoinGecko ID.
+        :return: Dict with id, symbol and name, or None.
+        """
+        return self._indexes[0].get(coingecko_id.lower())
+
+    def find_by_symbol(self, symbol: str) -> List[Dict]:
+        """Look up all coins sharing a ticker symbol.
+
+        :param symbol: str, cryptocurrency symbol.
+        :return: List of matching coins, possibly empty.
+        """
+        return self._indexes[1].get(symbol.lower(), [])
+
+    def find_by_name(self, name: str) -> List[Dict]:
+        """Look up all coins with the given name.
+
+        :param name: str, cryptocurrency name.
+        :return: List of matching coins, possibly empty.
+        """
+        return self._indexes[2].get(name.lower(), [])
+
+    def load(self) -> bool:
+        """Load the catalog from its JSON file, if present.
+
+        :return: bool, True if a catalog was loaded.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.replace(data['coins'], fetched_at=data.get('fetched_at'))
+            logger.info(f"Loaded {len(self)} coins from {self.path}")
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load coin catalog from {self.path}: {e}")
+            return False
+
+    def save(self) -> None:
+        """Persist the catalog to its JSON file, replacing the old file atomically.
+
+        :return: None
+        """
+        if not self.path:
+            return
+
+        coins = list(self._indexes[0].values())
+        tmp_path = f"{self.path}.tmp"
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({'fetched_at': self.fetched_at, 'coins': coins}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to save coin catalog to {self.path}: {e}")
+
+
+_catalog: Optional[CoinCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_coin_catalog() -> CoinCatalog:
+    """Return the process-wide coin catalog, creating it on first use.
+
+    :return: CoinCatalog, shared catalog.
+    """
+    global _catalog
+
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = CoinCatalog()
+
+    return _catalog
@@ -1,88 +1,472 @@
 import requests
 import logging
-from typing import Dict, Optional, List
+import os
+import threading
+import time
+from typing import Dict, Optional, List, Tuple, Union
+
+from app.metrics import observe_coingecko, observe_coingecko_response
+from app.services.cache import ResponseCache, Uncached, create_cache_backend
+from app.services.circuit_breaker import (
+    CircuitBreaker, DeadlineExceeded, RateLimitTimeout, get_circuit_breaker, CALL_DEADLINE
+)
+from app.services.coin_catalog import CoinCatalog, get_coin_catalog
+from app.services.http_client import AsyncHTTPClient, get_session, CONNECT_TIMEOUT, READ_TIMEOUT
+from app.services.rate_limiter import (
+    TokenBucket, get_rate_limiter, backoff_delay, parse_retry_after, MAX_RETRIES, RETRY_STATUSES
+)
+from app.services.single_flight import flight_key, get_single_flight
 
 logger = logging.getLogger(__name__)
 
 class CoinGeckoService:
     """Service for interacting with CoinGecko API."""
-    BASE_URL = "https://api.coingecko.com/api/v3"
+    BASE_URL = os.getenv("COINGECKO_BASE_URL", "https://api.coingecko.com/api/v3")
+    MARKETS_BATCH_SIZE = 250  # maximum ids/per_page accepted by /coins/markets
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = MAX_RETRIES,
+        catalog: Optional[CoinCatalog] = None,
+        cache: Optional[ResponseCache] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        deadline: float = CALL_DEADLINE
+    ) -> None:
+        """Initialize the service.
+
+        :param session: requests.Session, optional, defaults to the process-wide pooled session.
+        :param timeout: Tuple[float, float], optional, (connect, read) timeouts in seconds.
+        :param rate_limiter: TokenBucket, optional, defaults to the process-wide limiter.
+        :param max_retries: int, retries for 429 and 5xx responses.
+        :param catalog: CoinCatalog, optional, defaults to the process-wide coin catalog.
+        :param cache: ResponseCache, optional, defaults to a cache using the configured backend.
+        :param breaker: CircuitBreaker, optional, defaults to the process-wide breaker.
+        :param deadline: float, seconds a call may take including rate limiting and retries.
+        :return: None
+        """
+        self.session = session or get_session()
+        self.timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_retries = max_retries
+        self.catalog = catalog if catalog is not None else get_coin_catalog()
+        self.cache = cache or ResponseCache(create_cache_backend())
+        self.single_flight = get_single_flight("http")
+        self.breaker = breaker or get_circuit_breaker()
+        self.deadline = deadline
+        self.request_count = 0
+        self._catalog_lock = threading.Lock()
+        self._catalog_retry_at = 0.0
+        self._count_lock = threading.Lock()
+
+    def _count_requests(self, count: int = 1) -> None:
+        """Add to the number of requests sent by this service.
+
+        :param count: int, number of requests to add.
+        :return: None
+        """
+        with self._count_lock:
+            self.request_count += count
+
+    def _get(self, url: str, params: Optional[Dict] = None) -> requests.Response:
+        """Perform a rate-limited GET request against CoinGecko and count it.
+
+        Threads requesting the same endpoint with the same parameters at the
+        same time share a single upstream request and its response.
+
+        :param url: str, request URL.
+        :param params: Dict, optional, query parameters.
+        :exception: requests.exceptions.RequestException if the request fails.
+        :return: requests.Response, successful response.
+        """
+        return self.single_flight.do(flight_key(url, params), lambda: self._fetch(url, params))
+
+    def _fetch(self, url: str, params: Optional[Dict] = None) -> requests.Response:
+        """Send a GET request through the circuit breaker, within the call deadline.
+
+        :param url: str, request URL.
+        :param params: Dict, optional, query parameters.
+        :exception: CircuitOpenError if the circuit is open.
+        :exception: requests.exceptions.RequestException if the request fails.
+        :return: requests.Response, successful response.
+        """
+        self.breaker.check()
+
+        try:
+            response = self._send(url, params, time.monotonic() + self.deadline)
+        except RateLimitTimeout:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+
+        if response.status_code in RETRY_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success(response.elapsed.total_seconds())
+
+        response.raise_for_status()
+        return response
+
+    def _send(self, url: str, params: Optional[Dict], deadline: float) -> requests.Response:
+        """Send a GET request, retrying 429 and 5xx responses with backoff until the deadline.
+
+        A 429 pauses the shared rate limiter for the duration given by Retry-After.
+        Timeouts are capped by the time left, and a retry that cannot start before
+        the deadline is skipped, returning the last failed response.
 
-    def _validate_cryptocurrency(self, symbol: str, current_price: Optional[float] = None, market_cap: Optional[float] = None) -> Optional[Dict]:
+        :param url: str, request URL.
+        :param params: Dict, optional, query parameters.
+        :param deadline: float, time.monotonic() value the call must finish by.
+        :exception: RateLimitTimeout if the rate limiter would hold the call past the deadline.
+        :exception: requests.exceptions.RequestException if the request fails.
+        :return: requests.Response, last response received.
+        """
+        connect_timeout, read_timeout = self.timeout
+
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter.acquire(timeout=deadline - time.monotonic()) is None:
+                raise RateLimitTimeout(f"Rate limit wait would exceed the {self.deadline:.0f}s deadline for {url}")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"Deadline of {self.deadline:.0f}s exceeded for {url}")
+
+            self._count_requests()
+            response = self.session.get(
+                url, params=params, timeout=(min(connect_timeout, remaining), min(read_timeout, remaining))
+            )
+            observe_coingecko_response(url, response.status_code)
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                break
+
+            delay = backoff_delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+            if time.monotonic() + delay >= deadline:
+                break
+
+            logger.warning(f"CoinGecko returned {response.status_code}, retrying in {delay:.1f}s")
+
+            if response.status_code == 429:
+                self.rate_limiter.pause(delay)
+            else:
+                time.sleep(delay)
+
+        return response
+
+    def _validate_cryptocurrency(
+        self,
+        symbol: str,
+        current_price: Optional[float] = None,
+        market_cap: Optional[float] = None,
+        coingecko_id: Optional[str] = None
+    ) -> Optional[Dict]:
         """Validate cryptocurrency symbol and fetch details from CoinGecko
 
+        The symbol is resolved against the local coin catalog. When it maps to a
+        single coin and the caller supplied price and market cap, no request is
+        made; otherwise one /coins/markets call fetches the price (and picks the
+        largest coin when several share the symbol). Falls back to /search when
+        the catalog is unavailable.
+
         :param symbol: str, cryptocurrency symbol.
         :param current_price: float, optional, user-provided current price.
         :param market_cap: float, optional, user-provided market cap.
+        :param coingecko_id: str, optional, CoinGecko ID used to pick among coins sharing the symbol.
         :return: Dict with cryptocurrency details or None
         """
+        def load() -> Union[Dict, Uncached, None]:
+            details = self._fetch_validation(symbol, current_price, market_cap, coingecko_id)
+            # custom results (CoinGecko failing or not listing the coin) are not cached, so a
+            # recovered CoinGecko or a newly listed coin is picked up by the next create
+            return Uncached(details) if details is not None and not details['in_coingecko'] else details
+
+        key = f"{symbol.lower()}|{current_price}|{market_cap}|{(coingecko_id or '').lower()}"
         try:
-            search_url = f"{self.BASE_URL}/search?query={symbol}"
-            response = requests.get(search_url)
-            response.raise_for_status()
-            
-            search_results = response.json()
-            
-            coins = search_results.get('coins', [])
-            for coin in coins:
-                if coin['symbol'].lower() == symbol.lower():
-                    coin_url = f"{self.BASE_URL}/coins/{coin['id']}"
-                    coin_response = requests.get(coin_url)
-                    coin_response.raise_for_status()
-                    coin_details = coin_response.json()
-                    
-                    market_data = coin_details.get('market_data', {})
-                    
-                    coingecko_price = market_data.get('current_price', {}).get('usd', 0)
-                    coingecko_market_cap = market_data.get('market_cap', {}).get('usd', 0)
-                    
-                    return {
-                        'coingecko_id': coin['id'],
-                        'name': coin_details.get('name', coin['name']),
-                        'symbol': symbol.upper(),
-                        'current_price': coingecko_price,
-                        'market_cap': coingecko_market_cap,
-                        'in_coingecko': True
-                    }
-            
-            if current_price is not None and market_cap is not None:
-                return {
-                    'coingecko_id': None,
-                    'name': symbol.upper(),
-                    'symbol': symbol.upper(),
-                    'current_price': current_price,
-                    'market_cap': market_cap,
-                    'in_coingecko': False
-                }
-            
-            return None
-        
-        except requests.RequestException as e:
+            return self.cache.get_or_load('validate', key, load)
+        except requests.RequestException as e:  # also CircuitOpenError and DeadlineExceeded
             logger.error(f"CoinGecko API request failed: {e}")
-            
-            if current_price is not None and market_cap is not None:
-                return {
-                    'coingecko_id': None,
-                    'name': symbol.upper(),
-                    'symbol': symbol.upper(),
-                    'current_price': current_price,
-                    'market_cap': market_cap,
-                    'in_coingecko': False
-                }
-            
+            return self._custom_cryptocurrency(symbol, current_price, market_cap)
+
+    def _fetch_validation(
+        self,
+        symbol: str,
+        current_price: Optional[float] = None,
+        market_cap: Optional[float] = None,
+        coingecko_id: Optional[str] = None
+    ) -> Optional[Dict]:
+        """Validate cryptocurrency symbol against the catalog and CoinGecko, bypassing the cache.
+
+        :param symbol: str, cryptocurrency symbol.
+        :param current_price: float, optional, user-provided current price.
+        :param market_cap: float, optional, user-provided market cap.
+        :param coingecko_id: str, optional, CoinGecko ID used to pick among coins sharing the symbol.
+        :exception: requests.exceptions.RequestException if a CoinGecko call fails.
+        :return: Dict with cryptocurrency details or None
+        """
+        if not self.ensure_catalog():
+            return self._validate_with_search(symbol, current_price, market_cap)
+
+        candidates = self._catalog_candidates(symbol, coingecko_id)
+
+        if not self._needs_market_data(candidates, current_price, market_cap):
+            return self._resolve_candidates(symbol, current_price, market_cap, candidates, {})
+
+        markets_url = f"{self.BASE_URL}/coins/markets"
+        batch = [coin['id'] for coin in candidates[:self.MARKETS_BATCH_SIZE]]
+        response = self._get(markets_url, params=self._market_params(batch))
+        market_data = self._parse_market_data(response.json())
+
+        return self._resolve_candidates(symbol, current_price, market_cap, candidates, market_data)
+
+    @observe_coingecko
+    def validate_cryptocurrencies(self, items: List[Dict]) -> List[Optional[Dict]]:
+        """Validate many cryptocurrencies with shared catalog and /coins/markets lookups.
+
+        All symbols are resolved in the local catalog first; prices for every item
+        that needs one are then fetched together in batched /coins/markets calls.
+
+        :param items: List[Dict], items with symbol and optional current_price, market_cap and coingecko_id.
+        :return: List of validation details (or None) in the order of items.
+        """
+        if not self.ensure_catalog():
+            return [
+                self.validate_cryptocurrency(
+                    item['symbol'], item.get('current_price'), item.get('market_cap'), item.get('coingecko_id')
+                )
+                for item in items
+            ]
+
+        candidates_per_item = [
+            self._catalog_candidates(item['symbol'], item.get('coingecko_id')) for item in items
+        ]
+        ids_to_fetch = [
+            coin['id']
+            for item, candidates in zip(items, candidates_per_item)
+            if self._needs_market_data(candidates, item.get('current_price'), item.get('market_cap'))
+            for coin in candidates
+        ]
+        market_data = self.get_market_data(ids_to_fetch) if ids_to_fetch else {}
+
+        return [
+            self._resolve_candidates(
+                item['symbol'], item.get('current_price'), item.get('market_cap'), candidates, market_data
+            )
+            for item, candidates in zip(items, candidates_per_item)
+        ]
+
+    def _catalog_candidates(self, symbol: str, coingecko_id: Optional[str] = None) -> List[Dict]:
+        """Find catalog coins for a symbol, narrowed to coingecko_id when it matches one of them.
+
+        :param symbol: str, cryptocurrency symbol.
+        :param coingecko_id: str, optional, preferred CoinGecko ID.
+        :return: List of candidate coins.
+        """
+        candidates = self.catalog.find_by_symbol(symbol)
+        if coingecko_id:
+            candidates = [coin for coin in candidates if coin['id'] == coingecko_id.lower()] or candidates
+        return candidates
+
+    @staticmethod
+    def _needs_market_data(candidates: List[Dict], current_price: Optional[float], market_cap: Optional[float]) -> bool:
+        """Whether resolving the candidates requires a /coins/markets lookup.
+
+        :param candidates: List[Dict], catalog coins matching the symbol.
+        :param current_price: float, optional, user-provided current price.
+        :param market_cap: float, optional, user-provided market cap.
+        :return: bool, False when there is no candidate or a single one with user-provided data.
+        """
+        if not candidates:
+            return False
+        return len(candidates) > 1 or current_price is None or market_cap is None
+
+    def _resolve_candidates(
+        self,
+        symbol: str,
+        current_price: Optional[float],
+        market_cap: Optional[float],
+        candidates: List[Dict],
+        market_data: Dict[str, Dict]
+    ) -> Optional[Dict]:
+        """Pick the validated coin among the candidates, using market data when available.
+
+        :param symbol: str, cryptocurrency symbol.
+        :param current_price: float, optional, user-provided current price.
+        :param market_cap: float, optional, user-provided market cap.
+        :param candidates: List[Dict], catalog coins matching the symbol.
+        :param market_data: Dict, market details keyed by CoinGecko ID.
+        :return: Dict with cryptocurrency details or None
+        """
+        if not self._needs_market_data(candidates, current_price, market_cap):
+            if not candidates:
+                return self._custom_cryptocurrency(symbol, current_price, market_cap)
+            return self._coingecko_cryptocurrency(candidates[0], symbol, current_price, market_cap)
+
+        priced = [coin for coin in candidates if coin['id'] in market_data]
+        if not priced:
+            return self._custom_cryptocurrency(symbol, current_price, market_cap)
+
+        coin = max(priced, key=lambda candidate: market_data[candidate['id']]['market_cap'])
+        details = market_data[coin['id']]
+
+        return self._coingecko_cryptocurrency(
+            coin, symbol, details['current_price'], details['market_cap'], name=details['name']
+        )
+
+    def _validate_with_search(self, symbol: str, current_price: Optional[float] = None, market_cap: Optional[float] = None) -> Optional[Dict]:
+        """Validate cryptocurrency symbol with /search and /coins/{id} calls.
+
+        :param symbol: str, cryptocurrency symbol.
+        :param current_price: float, optional, user-provided current price.
+        :param market_cap: float, optional, user-provided market cap.
+        :exception: requests.exceptions.RequestException if a CoinGecko call fails.
+        :return: Dict with cryptocurrency details or None
+        """
+        search_url = f"{self.BASE_URL}/search?query={symbol}"
+        response = self._get(search_url)
+        
+        search_results = response.json()
+        
+        coins = search_results.get('coins', [])
+        for coin in coins:
+            if coin['symbol'].lower() == symbol.lower():
+                coin_url = f"{self.BASE_URL}/coins/{coin['id']}"
+                coin_response = self._get(coin_url)
+                coin_details = coin_response.json()
+                
+                market_data = coin_details.get('market_data', {})
+                
+                coingecko_price = market_data.get('current_price', {}).get('usd', 0)
+                coingecko_market_cap = market_data.get('market_cap', {}).get('usd', 0)
+                
+                return self._coingecko_cryptocurrency(
+                    coin, symbol, coingecko_price, coingecko_market_cap, name=coin_details.get('name')
+                )
+        
+        return self._custom_cryptocurrency(symbol, current_price, market_cap)
+
+    @staticmethod
+    def _coingecko_cryptocurrency(
+        coin: Dict,
+        symbol: str,
+        current_price: float,
+        market_cap: float,
+        name: Optional[str] = None
+    ) -> Dict:
+        """Build validation details for a cryptocurrency listed on CoinGecko.
+
+        :param coin: Dict, coin with at least id and name.
+        :param symbol: str, cryptocurrency symbol.
+        :param current_price: float, current price.
+        :param market_cap: float, market cap.
+        :param name: str, optional, name overriding the coin's name.
+        :return: Dict with cryptocurrency details.
+        """
+        return {
+            'coingecko_id': coin['id'],
+            'name': name or coin['name'],
+            'symbol': symbol.upper(),
+            'current_price': current_price,
+            'market_cap': market_cap,
+            'in_coingecko': True
+        }
+
+    @staticmethod
+    def _custom_cryptocurrency(symbol: str, current_price: Optional[float], market_cap: Optional[float]) -> Optional[Dict]:
+        """Build validation details for a cryptocurrency not listed on CoinGecko.
+
+        :param symbol: str, cryptocurrency symbol.
+        :param current_price: float, optional, user-provided current price.
+        :param market_cap: float, optional, user-provided market cap.
+        :return: Dict with cryptocurrency details, or None if price or market cap is missing.
+        """
+        if current_price is None or market_cap is None:
             return None
 
-    def get_cryptocurrency_details(self, coingecko_id: str) -> Optional[Dict]:
+        return {
+            'coingecko_id': None,
+            'name': symbol.upper(),
+            'symbol': symbol.upper(),
+            'current_price': current_price,
+            'market_cap': market_cap,
+            'in_coingecko': False
+        }
+
+    @observe_coingecko
+    def get_coin_list(self) -> List[Dict]:
+        """Retrieve the full list of coins (id, symbol, name) from CoinGecko.
+
+        :exception: requests.exceptions.RequestException if the request fails.
+        :return: List of dictionaries with id, symbol and name.
+        """
+        response = self._get(f"{self.BASE_URL}/coins/list")
+        return response.json()
+
+    @observe_coingecko
+    def refresh_catalog(self) -> bool:
+        """Re-fetch the coin list into the local catalog and persist it.
+
+        :return: bool, True if the catalog was refreshed.
+        """
+        try:
+            coins = self.get_coin_list()
+        except requests.RequestException as e:
+            logger.error(f"Failed to refresh coin catalog: {e}")
+            return False
+
+        self.catalog.replace(coins)
+        self.catalog.save()
+        logger.info(f"Coin catalog refreshed with {len(self.catalog)} coins")
+        return True
+
+    def ensure_catalog(self) -> bool:
+        """Make sure the local catalog is loaded, from disk if possible.
+
+        Only an empty catalog is fetched here; keeping a loaded catalog fresh is
+        left to the scheduler. Failed fetches are retried at most once a minute.
+
+        :return: bool, True if a catalog is available.
+        """
+        if len(self.catalog):
+            return True
+
+        with self._catalog_lock:
+            if not len(self.catalog) and not self.catalog.load() and time.monotonic() >= self._catalog_retry_at:
+                if not self.refresh_catalog():
+                    self._catalog_retry_at = time.monotonic() + 60
+
+        return len(self.catalog) > 0
+
+    @observe_coingecko
+    def get_cryptocurrency_details(self, coingecko_id: str, use_cache: bool = True) -> Optional[Dict]:
         """Fetch detailed information about a cryptocurrency from CoinGecko.
 
+        :param coingecko_id: str, CoinGecko ID of the cryptocurrency.
+        :param use_cache: bool, if False always fetch from CoinGecko (and update the cache).
+        :return: Dict with cryptocurrency details or None if retrieval fails.
+        """
+        return self.cache.get_or_load(
+            'details', coingecko_id,
+            lambda: self._fetch_cryptocurrency_details(coingecko_id),
+            use_cache=use_cache
+        )
+
+    def _fetch_cryptocurrency_details(self, coingecko_id: str) -> Optional[Dict]:
+        """Fetch detailed information about a cryptocurrency from CoinGecko, bypassing the cache.
+
         :param coingecko_id: str, CoinGecko ID of the cryptocurrency.
         :exception: requests.exceptions.RequestException if the request fails.
         :return: Dict with cryptocurrency details or None if retrieval fails.
         """
         try:
             coin_url = f"{self.BASE_URL}/coins/{coingecko_id}"
-            coin_response = requests.get(coin_url)
-            coin_response.raise_for_status()
+            coin_response = self._get(coin_url)
             coin_details = coin_response.json()
             
             market_data = coin_details.get('market_data', {})
@@ -98,10 +482,125 @@ class CoinGeckoService:
             logger.error(f"CoinGecko API request failed: {e}")
             return None
 
+    @observe_coingecko
+    def get_market_data(self, coingecko_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch price and market cap for many cryptocurrencies in batched /coins/markets calls.
+
+        Up to MARKETS_BATCH_SIZE ids are requested per call; a failed batch is logged
+        and its ids are missing from the result.
+
+        :param coingecko_ids: List[str], CoinGecko IDs of the cryptocurrencies.
+        :return: Dict mapping CoinGecko ID to its market details.
+        """
+        markets_url = f"{self.BASE_URL}/coins/markets"
+        market_data = {}
+
+        for batch in self._market_batches(coingecko_ids):
+            try:
+                coins = self._get(markets_url, params=self._market_params(batch)).json()
+            except requests.RequestException as e:
+                logger.error(f"CoinGecko markets request failed for {len(batch)} ids: {e}")
+                continue
+
+            market_data.update(self._parse_market_data(coins))
+
+        return market_data
+
+    @observe_coingecko
+    async def get_market_data_async(
+        self,
+        coingecko_ids: List[str],
+        client: Optional[AsyncHTTPClient] = None
+    ) -> Dict[str, Dict]:
+        """Fetch market data like get_market_data, running the batches concurrently.
+
+        :param coingecko_ids: List[str], CoinGecko IDs of the cryptocurrencies.
+        :param client: AsyncHTTPClient, optional, client bound to the running event loop.
+        :return: Dict mapping CoinGecko ID to its market details.
+        """
+        owns_client = client is None
+        client = client or AsyncHTTPClient()
+        markets_url = f"{self.BASE_URL}/coins/markets"
+        batches = self._market_batches(coingecko_ids)
+        market_data = {}
+
+        requests_before = client.request_count
+
+        try:
+            calls = [(markets_url, self._market_params(batch)) for batch in batches]
+            responses = await client.gather(calls)
+        finally:
+            self._count_requests(client.request_count - requests_before)
+            if owns_client:
+                await client.aclose()
+
+        for batch, response in zip(batches, responses):
+            if isinstance(response, Exception):
+                logger.error(f"CoinGecko markets request failed for {len(batch)} ids: {response}")
+                continue
+            market_data.update(self._parse_market_data(response.json()))
+
+        return market_data
+
+    def _market_batches(self, coingecko_ids: List[str]) -> List[List[str]]:
+        """Split unique, non-empty CoinGecko IDs into /coins/markets sized batches.
+
+        :param coingecko_ids: List[str], CoinGecko IDs.
+        :return: List of ID batches.
+        """
+        unique_ids = list(dict.fromkeys(coin_id for coin_id in coingecko_ids if coin_id))
+        return [
+            unique_ids[start:start + self.MARKETS_BATCH_SIZE]
+            for start in range(0, len(unique_ids), self.MARKETS_BATCH_SIZE)
+        ]
+
+    @staticmethod
+    def _market_params(batch: List[str]) -> Dict:
+        """Build /coins/markets query parameters for a batch of IDs.
+
+        :param batch: List[str], CoinGecko IDs.
+        :return: Dict with query parameters.
+        """
+        return {
+            'vs_currency': 'usd',
+            'ids': ','.join(batch),
+            'per_page': len(batch),
+            'page': 1,
+            'sparkline': False
+        }
+
+    @staticmethod
+    def _parse_market_data(coins: List[Dict]) -> Dict[str, Dict]:
+        """Convert a /coins/markets response into market details keyed by CoinGecko ID.
+
+        :param coins: List[Dict], /coins/markets response body.
+        :return: Dict mapping CoinGecko ID to its market details.
+        """
+        return {
+            coin['id']: {
+                'name': coin.get('name'),
+                'current_price': coin.get('current_price') or 0,
+                'market_cap': coin.get('market_cap') or 0,
+                'last_updated': coin.get('last_updated')
+            }
+            for coin in coins
+        }
+
+    @observe_coingecko
     def get_top_cryptocurrencies(self, limit: int = 10) -> List[Dict]:
         """Retrieve top cryptocurrencies by market cap from CoinGecko.
 
         :param limit: int, number of top cryptocurrencies to retrieve.
+        :exception: requests.exceptions.RequestException if the request fails.
+        :return: List of dictionaries containing top cryptocurrency details.
+        """
+        return self.cache.get_or_load('top', str(limit), lambda: self._fetch_top_cryptocurrencies(limit))
+
+    def _fetch_top_cryptocurrencies(self, limit: int = 10) -> List[Dict]:
+        """Retrieve top cryptocurrencies by market cap from CoinGecko, bypassing the cache.
+
+        :param limit: int, number of top cryptocurrencies to retrieve.
+        :exception: requests.exceptions.RequestException if the request fails.
         :return: List of dictionaries containing top cryptocurrency details.
         """
         markets_url = f"{self.BASE_URL}/coins/markets"
@@ -113,8 +612,7 @@ class CoinGeckoService:
             'sparkline': False
         }
         
-        response = requests.get(markets_url, params=params)
-        response.raise_for_status()
+        response = self._get(markets_url, params=params)
         top_coins = response.json()
         
         return [
@@ -128,10 +626,39 @@ class CoinGeckoService:
             for coin in top_coins
         ]
 
-    def validate_cryptocurrency(self, symbol: str) -> Optional[Dict]:
+    @observe_coingecko
+    def validate_cryptocurrency(
+        self,
+        symbol: str,
+        current_price: Optional[float] = None,
+        market_cap: Optional[float] = None,
+        coingecko_id: Optional[str] = None
+    ) -> Optional[Dict]:
         """Validate cryptocurrency symbol using CoinGecko API.
 
         :param symbol: str, cryptocurrency symbol to validate.
+        :param current_price: float, optional, user-provided current price.
+        :param market_cap: float, optional, user-provided market cap.
+        :param coingecko_id: str, optional, CoinGecko ID used to pick among coins sharing the symbol.
         :return: Dict with cryptocurrency details or None if validation fails.
         """
-        return self._validate_cryptocurrency(symbol)
+        return self._validate_cryptocurrency(symbol, current_price, market_cap, coingecko_id)
+
+
+_service: Optional[CoinGeckoService] = None
+_service_lock = threading.Lock()
+
+
+def get_coingecko_service() -> CoinGeckoService:
+    """Return the process-wide CoinGeckoService, creating it on first use.
+
+    :return: CoinGeckoService, shared service.
+    """
+    global _service
+
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = CoinGeckoService()
+
+    return _service
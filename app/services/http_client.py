@@ -0,0 +1,354 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, Union
+
+import requests
+
+from app.metrics import observe_coingecko_response
+from app.services.circuit_breaker import CircuitBreaker, DeadlineExceeded, get_circuit_breaker, CALL_DEADLINE
+from app.services.single_flight import SingleFlight, flight_key, get_single_flight
+from app.services.transport import async_transport, sync_adapter
+from app.services.rate_limiter import (
+    TokenBucket, get_rate_limiter, backoff_delay, parse_retry_after, MAX_RETRIES, RETRY_STATUSES
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = float(os.getenv("COINGECKO_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("COINGECKO_READ_TIMEOUT", "10"))
+POOL_SIZE = int(os.getenv("COINGECKO_POOL_SIZE", "10"))
+MAX_CONCURRENCY = int(os.getenv("COINGECKO_MAX_CONCURRENCY", "5"))
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Connection": "keep-alive"
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+T = TypeVar("T")
+
+
+def create_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    """Create a requests session with a keep-alive connection pool.
+
+    The adapter follows COINGECKO_TRANSPORT, so the session can record or replay traffic.
+
+    :param pool_size: int, maximum number of pooled connections per host.
+    :return: requests.Session, configured session.
+    """
+    session = requests.Session()
+    adapter = sync_adapter(pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use.
+
+    :return: requests.Session, shared session.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+
+    return _session
+
+
+def close_session() -> None:
+    """Close the process-wide session and release its pooled connections.
+
+    :return: None
+    """
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+class AsyncHTTPClient:
+    """Pooled async HTTP client running at most max_concurrency requests at once.
+
+    The underlying httpx client is bound to the event loop it is used in, so
+    create one client per loop (e.g. per application lifespan, or the ClientLoop below).
+    httpx is imported by the first client created, not with this module.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        pool_size: int = POOL_SIZE,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = MAX_RETRIES,
+        single_flight: Optional[SingleFlight] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        deadline: float = CALL_DEADLINE
+    ) -> None:
+        """Initialize the client.
+
+        :param max_concurrency: int, maximum number of in-flight requests.
+        :param pool_size: int, maximum number of pooled keep-alive connections.
+        :param connect_timeout: float, connect timeout in seconds.
+        :param read_timeout: float, read timeout in seconds.
+        :param rate_limiter: TokenBucket, optional, defaults to the process-wide limiter.
+        :param max_retries: int, retries for 429 and 5xx responses.
+        :param single_flight: SingleFlight, optional, defaults to the process-wide "http_async" group.
+        :param breaker: CircuitBreaker, optional, defaults to the process-wide breaker.
+        :param deadline: float, seconds a call may take once it has its first rate limiter slot.
+        :return: None
+        """
+        import httpx
+
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            headers=DEFAULT_HEADERS,
+            transport=async_transport(pool_size)
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_retries = max_retries
+        self.single_flight = single_flight or get_single_flight("http_async")
+        self.breaker = breaker or get_circuit_breaker()
+        self.deadline = deadline
+        self.request_count = 0
+
+    async def get(self, url: str, params: Optional[Dict] = None) -> "httpx.Response":
+        """Perform a rate-limited GET request once a concurrency slot is free.
+
+        An identical request already in flight (from any client or event loop)
+        is joined instead of being sent again.
+
+        :param url: str, request URL.
+        :param params: Dict, optional, query parameters.
+        :exception: httpx.HTTPError if the request fails.
+        :return: httpx.Response, successful response.
+        """
+        return await self.single_flight.do_async(flight_key(url, params), lambda: self._fetch(url, params))
+
+    async def _fetch(self, url: str, params: Optional[Dict] = None) -> "httpx.Response":
+        """Send a GET request through the circuit breaker, within the call deadline.
+
+        :param url: str, request URL.
+        :param params: Dict, optional, query parameters.
+        :exception: CircuitOpenError if the circuit is open.
+        :exception: httpx.HTTPError or DeadlineExceeded if the request fails.
+        :return: httpx.Response, successful response.
+        """
+        self.breaker.check()
+
+        try:
+            response = await self._send(url, params)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+
+        if response.status_code in RETRY_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success(response.elapsed.total_seconds())
+
+        response.raise_for_status()
+        return response
+
+    async def _send(self, url: str, params: Optional[Dict] = None) -> "httpx.Response":
+        """Send a GET request, retrying 429 and 5xx responses with backoff until the deadline.
+
+        The deadline starts once the first rate limiter slot is granted, since
+        batched refreshes queue on the limiter by design. Each attempt is bounded
+        by the time left; a retry that cannot start before the deadline is
+        skipped, returning the last failed response. A 429 pauses the shared
+        rate limiter for the duration given by Retry-After.
+
+        :param url: str, request URL.
+        :param params: Dict, optional, query parameters.
+        :exception: DeadlineExceeded if the deadline passes before a response arrives.
+        :exception: httpx.HTTPError if the request fails.
+        :return: httpx.Response, last response received.
+        """
+        deadline = None
+
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire_async()
+            deadline = deadline or time.monotonic() + self.deadline
+
+            async with self._semaphore:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"Deadline of {self.deadline:.0f}s exceeded for {url}")
+
+                self.request_count += 1
+                try:
+                    response = await asyncio.wait_for(self._client.get(url, params=params), remaining)
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded(f"Deadline of {self.deadline:.0f}s exceeded for {url}") from None
+            observe_coingecko_response(url, response.status_code)
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                break
+
+            delay = backoff_delay(attempt, parse_retry_after(response.headers.get("Retry-After")))
+            if time.monotonic() + delay >= deadline:
+                break
+
+            logger.warning(f"CoinGecko returned {response.status_code}, retrying in {delay:.1f}s")
+
+            if response.status_code == 429:
+                self.rate_limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+
+        return response
+
+    async def gather(self, calls: List[Tuple[str, Optional[Dict]]]) -> List[Union["httpx.Response", Exception]]:
+        """Run many GET requests concurrently, bounded by max_concurrency.
+
+        :param calls: List of (url, params) tuples.
+        :return: List of responses or exceptions, in the order of calls.
+        """
+        return await asyncio.gather(
+            *(self.get(url, params) for url, params in calls),
+            return_exceptions=True
+        )
+
+    async def aclose(self) -> None:
+        """Close the client and its pooled connections.
+
+        :return: None
+        """
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "AsyncHTTPClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+class ClientLoop:
+    """Event loop on a daemon thread with one long-lived AsyncHTTPClient, for synchronous callers.
+
+    Background jobs such as the refresh run every CoinGecko batch through it, so
+    the loop and the client's pooled connections are reused across batches and
+    runs instead of being built by asyncio.run for each batch.
+    """
+
+    def __init__(self, name: str = "coingecko-client") -> None:
+        """Initialize the loop; its thread and client start on first use.
+
+        :param name: str, name of the loop thread.
+        :return: None
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[AsyncHTTPClient] = None
+        self._lock = threading.Lock()
+
+    def run(self, call: Callable[[AsyncHTTPClient], Awaitable[T]]) -> T:
+        """Run a coroutine using the shared client on the loop thread and wait for its result.
+
+        :param call: Callable, takes the client and returns the coroutine to run.
+        :exception: whatever the coroutine raises.
+        :return: the coroutine's result.
+        """
+        return asyncio.run_coroutine_threadsafe(self._call(call), self._start()).result()
+
+    async def _call(self, call: Callable[[AsyncHTTPClient], Awaitable[T]]) -> T:
+        """Create the client on the loop it will be bound to, then run the call.
+
+        :param call: Callable, takes the client and returns the coroutine to run.
+        :return: the coroutine's result.
+        """
+        if self._client is None:
+            self._client = AsyncHTTPClient()
+        return await call(self._client)
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread unless it is running.
+
+        :return: asyncio.AbstractEventLoop, running loop.
+        """
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+
+        return self._loop
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Close the client and stop the loop thread.
+
+        :param timeout: float, seconds to wait for each step.
+        :return: None
+        """
+        with self._lock:
+            loop, thread, client = self._loop, self._thread, self._client
+            self._loop = self._thread = self._client = None
+
+        if loop is None:
+            return
+
+        if client is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout)
+            except Exception as e:
+                logger.warning(f"Error closing the {self.name} client: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+
+_client_loop: Optional[ClientLoop] = None
+_client_loop_lock = threading.Lock()
+
+
+def get_client_loop() -> ClientLoop:
+    """Return the process-wide client loop, creating it on first use.
+
+    :return: ClientLoop, shared client loop.
+    """
+    global _client_loop
+
+    if _client_loop is None:
+        with _client_loop_lock:
+            if _client_loop is None:
+                _client_loop = ClientLoop()
+
+    return _client_loop
+
+
+def close_client_loop() -> None:
+    """Close the process-wide client loop, its client and pooled connections.
+
+    :return: None
+    """
+    global _client_loop
+
+    with _client_loop_lock:
+        if _client_loop is not None:
+            _client_loop.close()
+            _client_loop = None
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import httpx
+
+from app.services.transport import DROPPED_HEADERS, Recording, ReplayMiss
+
+
+class RecordingAsyncTransport(httpx.AsyncHTTPTransport):
+    """httpx transport that sends requests normally and records every exchange."""
+
+    def __init__(self, recording: Recording, **kwargs) -> None:
+        """Initialize the transport.
+
+        :param recording: Recording, recording to append to.
+        :param kwargs: AsyncHTTPTransport arguments (e.g. limits).
+        :return: None
+        """
+        super().__init__(**kwargs)
+        self.recording = recording
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request and record the exchange.
+
+        :param request: httpx.Request, request to send.
+        :return: httpx.Response, live response with its body read.
+        """
+        started = time.perf_counter()
+        response = await super().handle_async_request(request)
+        content = await response.aread()
+        self.recording.append(
+            request.method, str(request.url), response.status_code, dict(response.headers),
+            content.decode("utf-8", errors="replace"), time.perf_counter() - started
+        )
+        headers = [(name, value) for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS]
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+
+class ReplayAsyncTransport(httpx.AsyncBaseTransport):
+    """httpx transport serving recorded responses without any network I/O."""
+
+    def __init__(self, recording: Recording) -> None:
+        """Initialize the transport.
+
+        :param recording: Recording, recording to serve from.
+        :return: None
+        """
+        self.recording = recording
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Serve the recorded response of a request.
+
+        :param request: httpx.Request, request to answer.
+        :exception: httpx.ConnectError if the request was never recorded.
+        :return: httpx.Response, recorded response.
+        """
+        try:
+            entry = self.recording.lookup(request.method, str(request.url))
+        except ReplayMiss as e:
+            raise httpx.ConnectError(str(e), request=request)
+
+        delay = self.recording.delay(entry)
+        if delay:
+            await asyncio.sleep(delay)
+
+        return httpx.Response(entry['status'], headers=entry['headers'], content=entry['body'].encode(), request=request)
@@ -0,0 +1,304 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import DATABASE_URL, RateLimitDB, engine
+from app.services.transport import TRANSPORT_MODE
+
+logger = logging.getLogger(__name__)
+
+CALLS_PER_MINUTE = float(os.getenv("COINGECKO_CALLS_PER_MINUTE", "30"))
+BURST = float(os.getenv("COINGECKO_RATE_BURST", "5"))
+# share one bucket between all worker processes through Postgres; CALLS_PER_MINUTE is the plan's total
+RATE_LIMIT_SHARED = os.getenv("COINGECKO_RATE_LIMIT_SHARED", "true").lower() == "true"
+# worker processes sharing the limit; main.py and docker-compose.yml export the count they start
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+MAX_RETRIES = int(os.getenv("COINGECKO_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("COINGECKO_BACKOFF_BASE", "1"))
+BACKOFF_MAX = float(os.getenv("COINGECKO_BACKOFF_MAX", "60"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread- and asyncio-safe token bucket limiting calls per minute.
+
+    Callers reserve a token up front, so concurrent callers are spaced out
+    at the configured rate instead of racing for the next refill.
+    """
+
+    def __init__(self, calls_per_minute: float = CALLS_PER_MINUTE, capacity: float = BURST) -> None:
+        """Initialize the bucket.
+
+        :param calls_per_minute: float, sustained number of calls allowed per minute, 0 for unlimited.
+        :param capacity: float, maximum number of calls allowed in a burst.
+        :return: None
+        """
+        self.rate = calls_per_minute / 60.0
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take a token, possibly borrowing against future refills.
+
+        :param max_wait: float, optional, give up (returning the token) if the wait would be longer.
+        :return: float, seconds the caller must wait before using the token, or None if it gave up.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.rate <= 0:
+                wait = max(0.0, self._paused_until - now)
+                return None if max_wait is not None and wait > max_wait else wait
+
+            # tokens only accrue outside pauses
+            refill = max(0.0, now - max(self._updated, self._paused_until)) * self.rate
+            self._tokens = min(self.capacity, self._tokens + refill)
+            self._updated = now
+            self._tokens -= 1
+
+            wait = max(0.0, self._paused_until - now) + (-self._tokens / self.rate if self._tokens < 0 else 0.0)
+            if max_wait is not None and wait > max_wait:
+                self._tokens += 1
+                return None
+            return wait
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[float]:
+        """Block until a call is allowed.
+
+        :param timeout: float, optional, maximum seconds to wait.
+        :return: float, seconds spent waiting, or None without waiting if it would exceed timeout.
+        """
+        wait = self._reserve(timeout)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Wait without blocking the event loop until a call is allowed.
+
+        :return: float, seconds spent waiting.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out calls for the given time, e.g. after a 429 response.
+
+        The bucket is also drained, and does not refill until the pause ends,
+        so calls resume at the sustained rate instead of bursting.
+
+        :param seconds: float, pause duration in seconds.
+        :return: None
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = now
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket whose state is a Postgres row shared by all worker processes.
+
+    Every reservation refills and takes a token in one atomic upsert, using the
+    database clock so that workers on different hosts agree on elapsed time;
+    pauses after 429 responses are shared the same way. If the database cannot
+    be reached, each worker falls back to a local bucket with its
+    1/WEB_CONCURRENCY share of the rate.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: float = CALLS_PER_MINUTE,
+        capacity: float = BURST,
+        name: str = "coingecko",
+        engine: Engine = engine,
+        workers: int = WEB_CONCURRENCY
+    ) -> None:
+        """Initialize the bucket; its row is created on the first reservation.
+
+        :param calls_per_minute: float, sustained number of calls allowed per minute across all workers.
+        :param capacity: float, maximum number of calls allowed in a burst across all workers.
+        :param name: str, row name, one per shared limit.
+        :param engine: Engine, Postgres engine.
+        :param workers: int, number of worker processes sharing the limit, for the local fallback.
+        :return: None
+        """
+        super().__init__(calls_per_minute, capacity)
+        self.name = name
+        self.engine = engine
+        self.fallback = TokenBucket(calls_per_minute / workers, max(1.0, capacity / workers))
+
+    def _now(self):
+        """Database clock as Unix time (SQL expression).
+
+        :return: ColumnElement, current time of the database server.
+        """
+        return func.extract('epoch', func.clock_timestamp())
+
+    def _reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take a token from the shared bucket, possibly borrowing against future refills.
+
+        :param max_wait: float, optional, give up (returning the token) if the wait would be longer.
+        :return: float, seconds the caller must wait before using the token, or None if it gave up.
+        """
+        if self.rate <= 0:
+            return super()._reserve(max_wait)
+
+        try:
+            with self.engine.begin() as connection:
+                tokens, paused_until, now = self._take(connection)
+                wait = max(0.0, paused_until - now) + (-tokens / self.rate if tokens < 0 else 0.0)
+                if max_wait is not None and wait > max_wait:
+                    connection.execute(
+                        update(RateLimitDB).where(RateLimitDB.name == self.name).values(tokens=RateLimitDB.tokens + 1)
+                    )
+                    return None
+                return wait
+        except SQLAlchemyError as e:
+            logger.warning(f"Shared rate limiter unavailable, using this worker's share of the rate: {e}")
+            return self.fallback._reserve(max_wait)
+
+    def _take(self, connection) -> Tuple[float, float, float]:
+        """Refill the bucket row and take a token (creating the row if needed).
+
+        :param connection: Connection, connection in a transaction.
+        :return: Tuple of tokens left (negative when borrowed), paused_until and the database time.
+        """
+        now = self._now()
+        statement = insert(RateLimitDB).values(
+            name=self.name,
+            tokens=self.capacity - 1,
+            updated_at=now,
+            paused_until=0.0
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[RateLimitDB.name],
+            set_={
+                'tokens': func.least(
+                    self.capacity,
+                    RateLimitDB.tokens + func.greatest(
+                        0.0, now - func.greatest(RateLimitDB.updated_at, RateLimitDB.paused_until)
+                    ) * self.rate
+                ) - 1,
+                'updated_at': func.greatest(RateLimitDB.updated_at, now)
+            }
+        ).returning(RateLimitDB.tokens, RateLimitDB.paused_until, RateLimitDB.updated_at)
+        return tuple(connection.execute(statement).one())
+
+    async def acquire_async(self) -> float:
+        """Wait without blocking the event loop until a call is allowed.
+
+        :return: float, seconds spent waiting.
+        """
+        wait = await asyncio.to_thread(self._reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out calls in every worker for the given time, e.g. after a 429 response.
+
+        :param seconds: float, pause duration in seconds.
+        :return: None
+        """
+        self.fallback.pause(seconds)
+
+        try:
+            with self.engine.begin() as connection:
+                now = self._now()
+                statement = insert(RateLimitDB).values(
+                    name=self.name,
+                    tokens=0.0,
+                    updated_at=now,
+                    paused_until=now + seconds
+                )
+                connection.execute(statement.on_conflict_do_update(
+                    index_elements=[RateLimitDB.name],
+                    set_={
+                        'tokens': func.least(RateLimitDB.tokens, 0.0),
+                        'updated_at': func.greatest(RateLimitDB.updated_at, now),
+                        'paused_until': func.greatest(RateLimitDB.paused_until, now + seconds)
+                    }
+                ))
+        except SQLAlchemyError as e:
+            logger.warning(f"Failed to pause the shared rate limiter: {e}")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date.
+
+    :param value: str, optional, header value.
+    :return: float seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Compute how long to wait before retrying a failed call.
+
+    Honors Retry-After when given (plus a little jitter so waiting callers do not
+    retry in lockstep), otherwise uses capped exponential backoff with full jitter.
+
+    :param attempt: int, zero-based retry attempt.
+    :param retry_after: float, optional, server-provided Retry-After in seconds.
+    :return: float, delay in seconds.
+    """
+    if retry_after is not None:
+        return min(BACKOFF_MAX, retry_after) + random.uniform(0, BACKOFF_BASE)
+
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+_rate_limiter: Optional[TokenBucket] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucket:
+    """Return the process-wide CoinGecko rate limiter, creating it on first use.
+
+    Replayed traffic never reaches CoinGecko, so replay mode is not rate limited.
+    On Postgres the bucket is shared by all worker processes, so the plan's
+    CALLS_PER_MINUTE holds for the whole deployment rather than per worker.
+
+    :return: TokenBucket, shared rate limiter.
+    """
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                if TRANSPORT_MODE == "replay":
+                    _rate_limiter = TokenBucket(0)
+                elif RATE_LIMIT_SHARED and DATABASE_URL.startswith("postgresql"):
+                    _rate_limiter = SharedTokenBucket()
+                else:
+                    _rate_limiter = TokenBucket(CALLS_PER_MINUTE)
+
+    return _rate_limiter
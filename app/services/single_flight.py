@@ -0,0 +1,160 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+from app.metrics import COINGECKO_COALESCED
+
+SINGLE_FLIGHT_ENABLED = os.getenv("COINGECKO_SINGLE_FLIGHT", "true").lower() == "true"
+
+
+def flight_key(url: str, params: Optional[Dict] = None) -> str:
+    """Build the coalescing key of a GET request.
+
+    :param url: str, request URL.
+    :param params: Dict, optional, query parameters.
+    :return: str, URL with sorted query parameters.
+    """
+    if not params:
+        return url
+    return f"{url}{'&' if '?' in url else '?'}{urlencode(sorted(params.items()))}"
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls so only the first one does the work.
+
+    Callers arriving while a call for the same key is in flight wait for its
+    result (or exception) instead of repeating it. Waiting works from threads
+    (do) and from async tasks on any event loop (do_async), since the shared
+    result is a concurrent.futures.Future.
+    """
+
+    def __init__(self, name: str, enabled: bool = SINGLE_FLIGHT_ENABLED) -> None:
+        """Initialize the group.
+
+        :param name: str, layer name used in stats and metrics.
+        :param enabled: bool, if False every call runs on its own.
+        :return: None
+        """
+        self.name = name
+        self.enabled = enabled
+        self.calls = 0
+        self.coalesced = 0
+        self._flights: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """Join the flight for key, starting one if none is running.
+
+        :param key: str, call key.
+        :return: Tuple of the shared future and whether the caller leads the flight.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                COINGECKO_COALESCED.labels(self.name).inc()
+                return future, False
+
+            future = Future()
+            self._flights[key] = future
+            self.calls += 1
+            return future, True
+
+    def _land(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """End a flight and hand its outcome to the waiting callers.
+
+        :param key: str, call key.
+        :param future: Future, shared future of the flight.
+        :param result: Any, result of the call.
+        :param error: BaseException, optional, exception raised by the call.
+        :return: None
+        """
+        with self._lock:
+            self._flights.pop(key, None)
+
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn, or wait for the identical call already in flight.
+
+        :param key: str, call key (e.g. endpoint and parameters).
+        :param fn: Callable, does the actual work.
+        :return: Any, result of fn.
+        """
+        if not self.enabled:
+            return fn()
+
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._land(key, future, error=e)
+            raise
+
+        self._land(key, future, result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn, or wait for the identical call already in flight.
+
+        :param key: str, call key (e.g. endpoint and parameters).
+        :param fn: Callable returning an awaitable, does the actual work.
+        :return: Any, result of fn.
+        """
+        if not self.enabled:
+            return await fn()
+
+        future, leader = self._join(key)
+        if not leader:
+            # shielded, so a cancelled waiter does not cancel the flight for everyone else
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._land(key, future, error=e)
+            raise
+
+        self._land(key, future, result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Return call counters.
+
+        :return: Dict with calls (executed) and coalesced (saved) counts.
+        """
+        return {'calls': self.calls, 'coalesced': self.coalesced}
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Return the process-wide coalescing group of a layer, creating it on first use.
+
+    :param name: str, layer name (e.g. "cache", "http", "http_async").
+    :return: SingleFlight, shared group.
+    """
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """Return the counters of every coalescing group.
+
+    :return: Dict mapping layer name to its counters.
+    """
+    with _groups_lock:
+        return {name: group.stats() for name, group in _groups.items()}
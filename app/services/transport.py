@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+TRANSPORT_MODE = os.getenv("COINGECKO_TRANSPORT", "live")  # "live", "record" or "replay"
+RECORDING_PATH = os.getenv("COINGECKO_RECORDING_PATH", ".cache/coingecko_recording.jsonl")
+REPLAY_TIME_SCALE = float(os.getenv("COINGECKO_REPLAY_TIME_SCALE", "0"))  # 0 = full speed, 1 = recorded latency
+
+# describe the original transfer, not the decoded body that is stored
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+class ReplayMiss(requests.ConnectionError):
+    """Raised when a replayed request has no recorded response."""
+
+
+def request_key(method: str, url: str) -> str:
+    """Build the lookup key of a request, independent of the host it was sent to.
+
+    :param method: str, HTTP method.
+    :param url: str, full request URL including the query string.
+    :return: str, method, path and sorted query parameters.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {parts.path}?{query}"
+
+
+class Recording:
+    """A JSONL log of CoinGecko request/response pairs.
+
+    In record mode exchanges are appended to the file as they happen. In replay
+    mode the whole file is indexed by request_key in memory; repeated requests
+    get the recorded responses in order, and the last one once they run out.
+    """
+
+    def __init__(self, path: str = RECORDING_PATH, time_scale: float = REPLAY_TIME_SCALE) -> None:
+        """Initialize the recording without touching the file.
+
+        :param path: str, JSONL file path.
+        :param time_scale: float, factor applied to recorded latencies on replay.
+        :return: None
+        """
+        self.path = path
+        self.time_scale = time_scale
+        self._index: Optional[Dict[str, List[Dict]]] = None
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def append(self, method: str, url: str, status: int, headers: Dict[str, str], body: str, elapsed: float) -> None:
+        """Append an exchange to the recording file.
+
+        :param method: str, HTTP method.
+        :param url: str, full request URL.
+        :param status: int, response status code.
+        :param headers: Dict[str, str], response headers.
+        :param body: str, decoded response body.
+        :param elapsed: float, seconds the request took.
+        :return: None
+        """
+        entry = {
+            'ts': time.time(),
+            'key': request_key(method, url),
+            'method': method.upper(),
+            'url': url,
+            'status': status,
+            'headers': {name: value for name, value in headers.items() if name.lower() not in DROPPED_HEADERS},
+            'body': body,
+            'elapsed': round(elapsed, 4)
+        }
+        line = json.dumps(entry) + "\n"
+
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line)
+
+    def _load(self) -> Dict[str, List[Dict]]:
+        """Index the recording file by request key (lock held).
+
+        :return: Dict mapping request key to recorded exchanges in order.
+        """
+        index: Dict[str, List[Dict]] = {}
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        index.setdefault(entry['key'], []).append(entry)
+        except FileNotFoundError:
+            logger.error(f"CoinGecko recording {self.path} not found, every replayed request will fail")
+
+        logger.info(f"Indexed {sum(map(len, index.values()))} recorded CoinGecko responses from {self.path}")
+        return index
+
+    def lookup(self, method: str, url: str) -> Dict:
+        """Return the next recorded exchange for a request.
+
+        :param method: str, HTTP method.
+        :param url: str, full request URL.
+        :exception: ReplayMiss if the request was never recorded.
+        :return: Dict, recorded exchange.
+        """
+        key = request_key(method, url)
+
+        with self._lock:
+            if self._index is None:
+                self._index = self._load()
+
+            entries = self._index.get(key)
+            if not entries:
+                raise ReplayMiss(f"No recorded response for {key}")
+
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return entries[min(position, len(entries) - 1)]
+
+    def delay(self, entry: Dict) -> float:
+        """Seconds to wait before serving a recorded exchange.
+
+        :param entry: Dict, recorded exchange.
+        :return: float, scaled recorded latency.
+        """
+        return entry.get('elapsed', 0.0) * self.time_scale
+
+
+class RecordingAdapter(HTTPAdapter):
+    """requests adapter that sends requests normally and records every exchange."""
+
+    def __init__(self, recording: Recording, **kwargs) -> None:
+        """Initialize the adapter.
+
+        :param recording: Recording, recording to append to.
+        :param kwargs: HTTPAdapter pool arguments.
+        :return: None
+        """
+        super().__init__(**kwargs)
+        self.recording = recording
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """Send a request and record the exchange.
+
+        :param request: PreparedRequest, request to send.
+        :return: requests.Response, live response.
+        """
+        response = super().send(request, **kwargs)
+        self.recording.append(
+            request.method, request.url, response.status_code, dict(response.headers),
+            response.text, response.elapsed.total_seconds()
+        )
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests adapter serving recorded responses without any network I/O."""
+
+    def __init__(self, recording: Recording) -> None:
+        """Initialize the adapter.
+
+        :param recording: Recording, recording to serve from.
+        :return: None
+        """
+        super().__init__()
+        self.recording = recording
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """Serve the recorded response of a request.
+
+        :param request: PreparedRequest, request to answer.
+        :exception: ReplayMiss if the request was never recorded.
+        :return: requests.Response, recorded response.
+        """
+        entry = self.recording.lookup(request.method, request.url)
+        delay = self.recording.delay(entry)
+        if delay:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['body'].encode()
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.reason = "Replayed"
+        return response
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+_recording: Optional[Recording] = None
+_recording_lock = threading.Lock()
+
+
+def get_recording() -> Recording:
+    """Return the process-wide recording, shared by the sync and async transports.
+
+    :return: Recording, shared recording.
+    """
+    global _recording
+
+    if _recording is None:
+        with _recording_lock:
+            if _recording is None:
+                _recording = Recording()
+
+    return _recording
+
+
+def sync_adapter(pool_size: int, mode: str = TRANSPORT_MODE) -> BaseAdapter:
+    """Build the requests adapter for a transport mode.
+
+    :param pool_size: int, maximum number of pooled connections per host.
+    :param mode: str, "live", "record" or "replay".
+    :return: BaseAdapter, adapter to mount on the session.
+    """
+    if mode == "replay":
+        return ReplayAdapter(get_recording())
+    if mode == "record":
+        return RecordingAdapter(get_recording(), pool_connections=2, pool_maxsize=pool_size)
+    return HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+
+
+def async_transport(pool_size: int, mode: str = TRANSPORT_MODE) -> Optional["httpx.AsyncBaseTransport"]:
+    """Build the httpx transport for a transport mode.
+
+    The httpx transports live in app.services.httpx_transport, which is only
+    imported when the async client records or replays.
+
+    :param pool_size: int, maximum number of pooled keep-alive connections.
+    :param mode: str, "live", "record" or "replay".
+    :return: AsyncBaseTransport, or None to use httpx's default transport.
+    """
+    if mode not in ("record", "replay"):
+        return None
+
+    import httpx
+    from app.services.httpx_transport import RecordingAsyncTransport, ReplayAsyncTransport
+
+    if mode == "replay":
+        return ReplayAsyncTransport(get_recording())
+    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+    return RecordingAsyncTransport(get_recording(), limits=limits)
@@ -0,0 +1,240 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.pool import NullPool
+
+from app.database import engine
+from app.metrics import STARTUP_PHASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+STARTED_AT = time.perf_counter()  # the "import" phase runs from here to the start of the lifespan
+
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1"))
+DB_WAIT_TIMEOUT = float(os.getenv("DB_WAIT_TIMEOUT", "180"))
+DB_WAIT_INITIAL_DELAY = float(os.getenv("DB_WAIT_INITIAL_DELAY", "0.05"))
+DB_WAIT_MAX_DELAY = float(os.getenv("DB_WAIT_MAX_DELAY", "2"))
+RUN_MIGRATIONS = os.getenv("RUN_MIGRATIONS", "true").lower() == "true"  # false when a deploy step migrates
+MIGRATION_LOCK_KEY = int(os.getenv("MIGRATION_LOCK_KEY", "4242002"))
+ALEMBIC_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+class StartupTimer:
+    """Times the startup phases of a worker and tracks whether it is ready to serve."""
+
+    def __init__(self, budget: float = STARTUP_BUDGET_SECONDS, started: float = STARTED_AT) -> None:
+        """Initialize the timer.
+
+        :param budget: float, seconds startup should take; slower startups are logged as warnings.
+        :param started: float, perf_counter() value startup is measured from.
+        :return: None
+        """
+        self.budget = budget
+        self.started = started
+        self.phases: Dict[str, float] = {}
+        self.ready = False
+        self.error: Optional[str] = None
+        self.total: Optional[float] = None
+        self._mark = started
+
+    def mark(self, name: str) -> None:
+        """Record the time since the previous phase (or the start) as a phase.
+
+        :param name: str, phase name.
+        :return: None
+        """
+        now = time.perf_counter()
+        self._record(name, now - self._mark)
+        self._mark = now
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as a phase.
+
+        :param name: str, phase name.
+        :return: Iterator, context manager.
+        """
+        self._mark = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name)
+
+    def finish(self) -> None:
+        """Mark the worker ready and report the phase timings.
+
+        :return: None
+        """
+        self.total = time.perf_counter() - self.started
+        self.ready = True
+        for name, seconds in {**self.phases, 'total': self.total}.items():
+            STARTUP_PHASE_SECONDS.labels(name).set(seconds)  # after ready, as it may import prometheus_client
+
+        phases = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.phases.items())
+        if self.total > self.budget:
+            logger.warning(f"Startup took {self.total:.3f}s, over its {self.budget:.1f}s budget ({phases})")
+        else:
+            logger.info(f"Startup finished in {self.total:.3f}s ({phases})")
+
+    def fail(self, error: Exception) -> None:
+        """Record a startup that cannot complete.
+
+        :param error: Exception, cause of the failure.
+        :return: None
+        """
+        self.error = str(error)
+        logger.error(f"Startup failed: {error}")
+
+    def stats(self) -> Dict:
+        """Return the readiness state and phase timings.
+
+        :return: Dict with ready, error, seconds, budget and phases.
+        """
+        return {
+            'ready': self.ready,
+            'error': self.error,
+            'seconds': self.total,
+            'budget': self.budget,
+            'phases': dict(self.phases)
+        }
+
+    def _record(self, name: str, seconds: float) -> None:
+        """Store a phase duration; finish() exports them all.
+
+        :param name: str, phase name.
+        :param seconds: float, duration.
+        :return: None
+        """
+        self.phases[name] = seconds
+
+
+def configure_logging() -> None:
+    """Configure the root logger from LOG_LEVEL.
+
+    :return: None
+    """
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    logging.getLogger("apscheduler").setLevel(logging.WARNING)  # logs every job run otherwise
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("alembic").setLevel(logging.WARNING)  # app.startup logs applied migrations
+
+
+def create_database(engine: Engine = engine) -> bool:
+    """Create the engine's Postgres database, connecting to the postgres maintenance database.
+
+    :param engine: Engine, engine whose database is missing.
+    :return: bool, False if the database cannot be created this way (e.g. SQLite).
+    """
+    url = make_url(engine.url)
+    if url.get_backend_name() != "postgresql":
+        return False
+
+    admin = create_engine(url.set(database="postgres"), poolclass=NullPool, isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as connection:
+            connection.execute(text(f'CREATE DATABASE "{url.database}"'))
+        logger.info(f"Created database {url.database}")
+    except ProgrammingError:
+        pass  # created by another worker in the meantime
+    finally:
+        admin.dispose()
+
+    return True
+
+
+def wait_for_database(engine: Engine = engine, timeout: float = DB_WAIT_TIMEOUT) -> int:
+    """Wait until the database accepts connections, creating it if it does not exist.
+
+    Retries start after DB_WAIT_INITIAL_DELAY and double up to DB_WAIT_MAX_DELAY,
+    so a database that is already up costs a single round trip and one that is
+    starting is picked up within moments of accepting connections.
+
+    :param engine: Engine, engine to probe.
+    :param timeout: float, seconds to keep retrying.
+    :exception: OperationalError if the database is still unreachable after timeout.
+    :return: int, number of attempts.
+    """
+    deadline = time.monotonic() + timeout
+    delay = DB_WAIT_INITIAL_DELAY
+    attempts = 0
+
+    while True:
+        attempts += 1
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return attempts
+        except OperationalError as e:
+            if "does not exist" in str(e.orig) and create_database(engine):
+                continue
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise
+
+            logger.info(f"Database not ready yet ({str(e.orig).strip()}), retrying in {delay:.2f}s")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, DB_WAIT_MAX_DELAY)
+
+
+def run_migrations(engine: Engine = engine) -> bool:
+    """Upgrade the database schema to the latest Alembic revision.
+
+    Alembic is only imported here. Workers starting together serialize on a
+    Postgres advisory lock, and the ones that get it after the first find the
+    schema current.
+
+    :param engine: Engine, engine to migrate.
+    :return: bool, True if migrations were applied, False if the schema was current.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config(ALEMBIC_CONFIG)
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+
+    with engine.connect() as connection:
+        if set(MigrationContext.configure(connection).get_current_heads()) == heads:
+            return False
+
+        locked = connection.dialect.name == "postgresql"
+        if locked:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+        connection.commit()
+
+        try:
+            config.attributes['connection'] = connection
+            command.upgrade(config, "head")
+            connection.commit()
+        finally:
+            if locked:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': MIGRATION_LOCK_KEY})
+                connection.commit()
+
+    logger.info(f"Database schema migrated to {', '.join(sorted(heads))}")
+    return True
+
+
+def prepare_database() -> None:
+    """Wait for the database and migrate it, as a deploy step before starting workers.
+
+    :return: None
+    """
+    wait_for_database()
+    run_migrations()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    prepare_database()
@@ -0,0 +1,260 @@
+import asyncio
+import json
+import logging
+import os
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "100"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+UPDATE_FIELDS = ('id', 'symbol', 'current_price', 'market_cap', 'last_updated')
+
+
+class Subscription:
+    """A single listener's bounded queue of encoded update messages.
+
+    When the queue is full the oldest message is dropped and counted, so a slow
+    consumer only ever loses history, never blocks the publisher or other listeners.
+    """
+
+    def __init__(self, symbols: Optional[Set[str]] = None, queue_size: int = STREAM_QUEUE_SIZE) -> None:
+        """Initialize the subscription.
+
+        :param symbols: Set[str], optional, uppercase symbols to receive; None receives everything.
+        :param queue_size: int, maximum number of undelivered messages.
+        :return: None
+        """
+        self.symbols = symbols
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, message: str) -> None:
+        """Enqueue a message, dropping the oldest one if the consumer is behind.
+
+        :param message: str, encoded message.
+        :return: None
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def next_message(self, timeout: float) -> Optional[str]:
+        """Wait for the next message.
+
+        :param timeout: float, seconds to wait before returning None (used for heartbeats).
+        :return: str, encoded message, or None on timeout.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def take_dropped(self) -> int:
+        """Return and reset the number of messages dropped since the last call.
+
+        :return: int, dropped message count.
+        """
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class PriceUpdateBroker:
+    """Fans price update diffs out to the WebSocket and SSE subscribers of this worker.
+
+    The quote snapshot watcher publishes the rows each rebuild changed, so
+    subscribers get the writes of every worker. publish() may be called from
+    any thread; delivery always happens on the event loop the broker is bound to.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a broker without subscribers.
+
+        :return: None
+        """
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscriptions: Set[Subscription] = set()
+        self._wildcard: Set[Subscription] = set()
+        self._by_symbol: Dict[str, Set[Subscription]] = {}
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Bind the broker to the application's event loop.
+
+        :param loop: AbstractEventLoop, running event loop.
+        :return: None
+        """
+        self.loop = loop
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of active subscriptions."""
+        return len(self._subscriptions)
+
+    def subscribe(self, symbols: Optional[Iterable[str]] = None) -> Subscription:
+        """Register a subscription, optionally filtered to some symbols.
+
+        Must be called on the bound event loop.
+
+        :param symbols: Iterable[str], optional, symbols to receive.
+        :return: Subscription, new subscription.
+        """
+        normalized = {symbol.strip().upper() for symbol in symbols or [] if symbol.strip()}
+        subscription = Subscription(normalized or None)
+        self._add(subscription)
+        return subscription
+
+    def update_filter(self, subscription: Subscription, symbols: Optional[Iterable[str]]) -> None:
+        """Change the symbols a subscription receives.
+
+        :param subscription: Subscription, existing subscription.
+        :param symbols: Iterable[str], optional, new symbols; empty or None receives everything.
+        :return: None
+        """
+        self._remove(subscription)
+        subscription.symbols = {symbol.strip().upper() for symbol in symbols or [] if symbol.strip()} or None
+        self._add(subscription)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription.
+
+        :param subscription: Subscription, subscription to remove.
+        :return: None
+        """
+        self._remove(subscription)
+
+    def publish(self, updates: List[Dict]) -> None:
+        """Publish update diffs to all matching subscribers, from any thread.
+
+        :param updates: List[Dict], diffs with the UPDATE_FIELDS keys.
+        :return: None
+        """
+        if not updates or self.loop is None or self.loop.is_closed():
+            return
+        if not self._subscriptions:
+            return
+
+        self.loop.call_soon_threadsafe(self._dispatch, updates)
+
+    def _dispatch(self, updates: List[Dict]) -> None:
+        """Deliver updates on the event loop; the unfiltered payload is encoded only once.
+
+        :param updates: List[Dict], update diffs.
+        :return: None
+        """
+        if self._wildcard:
+            message = json.dumps({'updates': updates})
+            for subscription in self._wildcard:
+                subscription.offer(message)
+
+        if not self._by_symbol:
+            return
+
+        per_subscription: Dict[Subscription, List[Dict]] = {}
+        for update in updates:
+            for subscription in self._by_symbol.get(update['symbol'], ()):
+                per_subscription.setdefault(subscription, []).append(update)
+
+        for subscription, matched in per_subscription.items():
+            subscription.offer(json.dumps({'updates': matched}))
+
+    def _add(self, subscription: Subscription) -> None:
+        """Index a subscription by its symbols.
+
+        :param subscription: Subscription, subscription to index.
+        :return: None
+        """
+        self._subscriptions.add(subscription)
+        if subscription.symbols is None:
+            self._wildcard.add(subscription)
+            return
+        for symbol in subscription.symbols:
+            self._by_symbol.setdefault(symbol, set()).add(subscription)
+
+    def _remove(self, subscription: Subscription) -> None:
+        """Remove a subscription from the indexes.
+
+        :param subscription: Subscription, subscription to remove.
+        :return: None
+        """
+        self._subscriptions.discard(subscription)
+        self._wildcard.discard(subscription)
+        for symbol in subscription.symbols or ():
+            listeners = self._by_symbol.get(symbol)
+            if listeners is not None:
+                listeners.discard(subscription)
+                if not listeners:
+                    del self._by_symbol[symbol]
+
+
+async def sse_events(broker: PriceUpdateBroker, subscription: Subscription) -> AsyncIterator[str]:
+    """Encode a subscription as Server-Sent Events, with heartbeats while idle.
+
+    :param broker: PriceUpdateBroker, broker the subscription belongs to.
+    :param subscription: Subscription, subscription to stream.
+    :return: AsyncIterator over SSE frames.
+    """
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            message = await subscription.next_message(STREAM_HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": heartbeat\n\n"
+                continue
+
+            dropped = subscription.take_dropped()
+            if dropped:
+                yield f"event: lagged\ndata: {json.dumps({'dropped': dropped})}\n\n"
+            yield f"event: prices\ndata: {message}\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def serve_websocket(broker: PriceUpdateBroker, websocket, symbols: Optional[Iterable[str]]) -> None:
+    """Stream updates to an accepted WebSocket until it disconnects.
+
+    Clients may send {"symbols": [...]} at any time to change their filter.
+
+    :param broker: PriceUpdateBroker, broker to subscribe to.
+    :param websocket: WebSocket, accepted connection.
+    :param symbols: Iterable[str], optional, initial symbol filter.
+    :return: None
+    """
+    subscription = broker.subscribe(symbols)
+
+    async def receive_filters() -> None:
+        while True:
+            data = await websocket.receive_json()
+            if isinstance(data, dict) and 'symbols' in data:
+                broker.update_filter(subscription, data['symbols'])
+
+    receiver = asyncio.create_task(receive_filters())
+
+    try:
+        while not receiver.done():
+            message = await subscription.next_message(STREAM_HEARTBEAT_SECONDS)
+            if message is None:
+                continue
+
+            dropped = subscription.take_dropped()
+            if dropped:
+                await websocket.send_text(json.dumps({'lagged': {'dropped': dropped}}))
+            await websocket.send_text(message)
+    except Exception as e:
+        logger.info(f"Price update WebSocket closed: {e}")
+    finally:
+        receiver.cancel()
+        broker.unsubscribe(subscription)
+
+
+def parse_symbols(symbols: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated symbols query parameter.
+
+    :param symbols: str, optional, e.g. "BTC,ETH".
+    :return: List[str] or None when no filter was given.
+    """
+    return symbols.split(",") if symbols else None
+
+
+price_broker = PriceUpdateBroker()
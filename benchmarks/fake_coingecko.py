@@ -0,0 +1,237 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+def make_coins(count: int) -> List[Dict]:
+    """Generate a deterministic coin universe.
+
+    :param count: int, number of coins.
+    :return: List[Dict], coins with id, symbol, name, price and market cap.
+    """
+    return [
+        {
+            'id': f"coin-{i}",
+            'symbol': f"c{i}",
+            'name': f"Coin {i}",
+            'current_price': round(1 + (i * 7919 % 100000) / 100, 2),
+            'market_cap': float(10 ** 12 // (i + 1))
+        }
+        for i in range(count)
+    ]
+
+
+class FakeCoinGecko:
+    """Local stand-in for the CoinGecko endpoints used by CoinGeckoService.
+
+    Serves /search, /coins/list, /coins/markets and /coins/{id} under /api/v3 with
+    configurable latency, a random 5xx error rate and a per-minute rate limit
+    answered with 429 and Retry-After. Randomness is seeded, so runs are repeatable.
+    """
+
+    def __init__(
+        self,
+        coin_count: int = 10000,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: int = 0,
+        retry_after: int = 1,
+        seed: int = 0
+    ) -> None:
+        """Initialize the server without starting it.
+
+        :param coin_count: int, size of the coin universe.
+        :param latency: float, seconds added to every response.
+        :param jitter: float, extra random latency, up to this many seconds.
+        :param error_rate: float, fraction of requests answered with a 503.
+        :param rate_limit: int, requests per minute before answering 429, 0 for unlimited.
+        :param retry_after: int, Retry-After seconds sent with 429 responses.
+        :param seed: int, random seed.
+        :return: None
+        """
+        self.coins = make_coins(coin_count)
+        self.by_id = {coin['id']: coin for coin in self.coins}
+        self.by_symbol: Dict[str, List[Dict]] = {}
+        for coin in self.coins:
+            self.by_symbol.setdefault(coin['symbol'], []).append(coin)
+
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._window: deque = deque()
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.statuses: Dict[int, int] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to use as COINGECKO_BASE_URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v3"
+
+    def start(self) -> str:
+        """Start serving on a free local port in a background thread.
+
+        :return: str, base URL of the server.
+        """
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                status, body, headers = fake.handle(self.path)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self) -> None:
+        """Stop the server.
+
+        :return: None
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset_stats(self) -> None:
+        """Clear the call and status counters.
+
+        :return: None
+        """
+        with self._lock:
+            self.calls.clear()
+            self.statuses.clear()
+
+    def handle(self, raw_path: str) -> Tuple[int, object, Dict[str, str]]:
+        """Answer a request, applying latency, errors and rate limiting.
+
+        :param raw_path: str, request path with query string.
+        :return: Tuple of status, JSON body and extra headers.
+        """
+        url = urlsplit(raw_path)
+        path = url.path.split("/api/v3", 1)[-1]
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        endpoint = "/coins/{id}" if path.startswith("/coins/") and path.count("/") == 2 and path not in (
+            "/coins/list", "/coins/markets"
+        ) else path
+
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            failed = self.error_rate and self._random.random() < self.error_rate
+            limited = self._rate_limited()
+
+        if delay:
+            time.sleep(delay)
+
+        if limited:
+            status, body, headers = 429, {'status': {'error_code': 429}}, {"Retry-After": str(self.retry_after)}
+        elif failed:
+            status, body, headers = 503, {'error': "service unavailable"}, {}
+        else:
+            status, body, headers = self._route(path, query)
+
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        return status, body, headers
+
+    def _rate_limited(self) -> bool:
+        """Record a request in the one-minute window and check the rate limit (lock held).
+
+        :return: bool, True if the request exceeds the limit.
+        """
+        if not self.rate_limit:
+            return False
+
+        now = time.monotonic()
+        while self._window and now - self._window[0] > 60:
+            self._window.popleft()
+        if len(self._window) >= self.rate_limit:
+            return True
+        self._window.append(now)
+        return False
+
+    def _route(self, path: str, query: Dict[str, str]) -> Tuple[int, object, Dict[str, str]]:
+        """Build the response body of an endpoint.
+
+        :param path: str, API path below /api/v3.
+        :param query: Dict[str, str], query parameters.
+        :return: Tuple of status, JSON body and extra headers.
+        """
+        if path == "/coins/list":
+            return 200, [{'id': c['id'], 'symbol': c['symbol'], 'name': c['name']} for c in self.coins], {}
+
+        if path == "/search":
+            term = query.get('query', "").lower()
+            matches = self.by_symbol.get(term, []) + [
+                coin for coin in self.coins[:1000] if term and term in coin['name'].lower()
+            ]
+            return 200, {'coins': [
+                {'id': c['id'], 'symbol': c['symbol'].upper(), 'name': c['name']} for c in matches[:25]
+            ]}, {}
+
+        if path == "/coins/markets":
+            if query.get('ids'):
+                coins = [self.by_id[i] for i in query['ids'].split(",") if i in self.by_id]
+            else:
+                per_page, page = int(query.get('per_page', 100)), int(query.get('page', 1))
+                coins = self.coins[(page - 1) * per_page:page * per_page]
+            return 200, [self._market_row(coin) for coin in coins], {}
+
+        if path.startswith("/coins/"):
+            coin = self.by_id.get(path.rsplit("/", 1)[1])
+            if coin is None:
+                return 404, {'error': "coin not found"}, {}
+            return 200, {
+                'id': coin['id'],
+                'symbol': coin['symbol'],
+                'name': coin['name'],
+                'market_data': {
+                    'current_price': {'usd': coin['current_price']},
+                    'market_cap': {'usd': coin['market_cap']},
+                    'last_updated': "2024-01-01T00:00:00.000Z"
+                }
+            }, {}
+
+        return 404, {'error': "unknown endpoint"}, {}
+
+    @staticmethod
+    def _market_row(coin: Dict) -> Dict:
+        """Build a /coins/markets entry.
+
+        :param coin: Dict, coin of the universe.
+        :return: Dict, markets row.
+        """
+        return {
+            'id': coin['id'],
+            'symbol': coin['symbol'],
+            'name': coin['name'],
+            'current_price': coin['current_price'],
+            'market_cap': coin['market_cap'],
+            'last_updated': "2024-01-01T00:00:00.000Z"
+        }
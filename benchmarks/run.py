@@ -0,0 +1,551 @@
+"""Benchmark the API, the refresh job and the validation path against a local CoinGecko stand-in.
+
+Usage:
+    python -m benchmarks.run --scenarios crud,refresh,validation --rows 10,1000,10000 --output bench_results.json
+    python -m benchmarks.run --scenarios serialization --rows 1000,10000 --repeat 10
+
+Results are written as JSON (one entry per scenario/operation with throughput,
+latency percentiles and CoinGecko calls per operation) so runs of different
+commits can be compared with --baseline.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.fake_coingecko import FakeCoinGecko
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments.
+
+    :param argv: List[str], optional, arguments, defaults to sys.argv.
+    :return: argparse.Namespace, parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default="crud,refresh,validation", help="comma-separated scenarios")
+    parser.add_argument(
+        "--rows", default="10,1000,10000", help="comma-separated table sizes for the refresh and serialization scenarios"
+    )
+    parser.add_argument("--iterations", type=int, default=200, help="operations per CRUD/validation/quotes benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="refresh/serialization runs per table size")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake CoinGecko latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random fake latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake responses that are 503")
+    parser.add_argument("--rate-limit", type=int, default=0, help="fake requests per minute before 429, 0 = none")
+    parser.add_argument("--client-rate", type=float, default=1e6, help="COINGECKO_CALLS_PER_MINUTE of the client")
+    parser.add_argument("--database-url", default=None, help="database to benchmark, a temporary SQLite file by default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="earlier results file to compare against")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace, base_url: str, workdir: str) -> None:
+    """Point the application at the fake server and a scratch database.
+
+    Must run before any app module is imported, since they read settings at import time.
+
+    :param args: argparse.Namespace, parsed arguments.
+    :param base_url: str, fake CoinGecko base URL.
+    :param workdir: str, directory for scratch files.
+    :return: None
+    """
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir}/bench.db"
+    os.environ["COINGECKO_BASE_URL"] = base_url
+    os.environ["COIN_CATALOG_PATH"] = os.path.join(workdir, "coin_catalog.json")
+    os.environ["COINGECKO_CALLS_PER_MINUTE"] = str(args.client_rate)
+    os.environ["COINGECKO_RATE_BURST"] = str(max(1, int(args.client_rate // 60)))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile.
+
+    :param values: List[float], samples.
+    :param q: float, quantile between 0 and 1.
+    :return: float, percentile value (0 without samples).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def summarize(scenario: str, operation: str, latencies: List[float], api_calls: int, errors: int, **extra) -> Dict:
+    """Build a result entry from per-operation latencies.
+
+    :param scenario: str, scenario name.
+    :param operation: str, operation name.
+    :param latencies: List[float], seconds per operation.
+    :param api_calls: int, CoinGecko calls made by all operations.
+    :param errors: int, failed operations.
+    :return: Dict, result entry.
+    """
+    total = sum(latencies)
+    count = len(latencies)
+    return {
+        'scenario': scenario,
+        'operation': operation,
+        'count': count,
+        'total_seconds': round(total, 4),
+        'throughput': round(count / total, 2) if total else None,
+        'mean_ms': round(total / count * 1000, 3) if count else None,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'api_calls': api_calls,
+        'api_calls_per_op': round(api_calls / count, 3) if count else None,
+        'errors': errors,
+        **extra
+    }
+
+
+def measure(operation: Callable[[int], bool], iterations: int, service) -> tuple:
+    """Run an operation repeatedly, timing each call.
+
+    :param operation: Callable, takes the iteration index and returns True on success.
+    :param iterations: int, number of calls.
+    :param service: CoinGeckoService, used to count CoinGecko calls.
+    :return: Tuple of latencies, CoinGecko calls and errors.
+    """
+    latencies, errors = [], 0
+    calls_before = service.request_count
+
+    for i in range(iterations):
+        started = time.perf_counter()
+        ok = operation(i)
+        latencies.append(time.perf_counter() - started)
+        errors += not ok
+
+    return latencies, service.request_count - calls_before, errors
+
+
+def reset_database() -> None:
+    """Drop and recreate all tables.
+
+    :return: None
+    """
+    from app.database import Base, engine
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def run_crud(args: argparse.Namespace, fake: FakeCoinGecko) -> List[Dict]:
+    """Benchmark the CRUD endpoints in-process, without the background scheduler.
+
+    :param args: argparse.Namespace, parsed arguments.
+    :param fake: FakeCoinGecko, running fake server.
+    :return: List[Dict], result entries.
+    """
+    from fastapi.testclient import TestClient
+
+    from app.app import app
+    from app.services.create_api_service import get_coingecko_service
+
+    reset_database()
+    service = get_coingecko_service()
+    service.cache.clear()
+    client = TestClient(app)  # not used as a context manager, so startup jobs stay off
+    n = args.iterations
+    coins = fake.coins
+    ids: List[int] = []
+
+    def create_custom(i: int) -> bool:
+        response = client.post("/cryptocurrencies/", json={
+            'name': f"Custom {i}", 'symbol': f"X{i}", 'current_price': 1.5, 'market_cap': 1000.0
+        })
+        if response.status_code == 200:
+            ids.append(response.json()['id'])
+        return response.status_code == 200
+
+    def create_coingecko(i: int) -> bool:
+        coin = coins[i]
+        response = client.post("/cryptocurrencies/", json={
+            'name': coin['name'], 'symbol': coin['symbol'], 'coingecko_id': coin['id']
+        })
+        if response.status_code == 200:
+            ids.append(response.json()['id'])
+        return response.status_code == 200
+
+    def read(i: int) -> bool:
+        return client.get(f"/cryptocurrencies/{ids[i % len(ids)]}").status_code == 200
+
+    def list_page(i: int) -> bool:
+        return client.get("/cryptocurrencies/", params={'limit': 100, 'skip': (i * 7) % max(1, len(ids))}).status_code == 200
+
+    def update(i: int) -> bool:
+        return client.put(f"/cryptocurrencies/{ids[i % len(ids)]}", json={'current_price': 2.0 + i}).status_code == 200
+
+    def delete(i: int) -> bool:
+        return client.delete(f"/cryptocurrencies/{ids[i]}").status_code == 200
+
+    results = []
+    for name, operation in (
+        ('create_custom', create_custom),
+        ('create_coingecko', create_coingecko),
+        ('get', read),
+        ('list', list_page),
+        ('update', update),
+        ('delete', delete)
+    ):
+        fake.reset_stats()
+        latencies, api_calls, errors = measure(operation, n, service)
+        results.append(summarize('crud', name, latencies, api_calls, errors, fake_calls=dict(fake.calls)))
+
+    return results
+
+
+def run_refresh(args: argparse.Namespace, fake: FakeCoinGecko) -> List[Dict]:
+    """Benchmark auto_refresh_cryptocurrencies over tables of several sizes.
+
+    :param args: argparse.Namespace, parsed arguments.
+    :param fake: FakeCoinGecko, running fake server.
+    :return: List[Dict], result entries (one per table size).
+    """
+    from app.app import REFRESH_MODE, auto_refresh_cryptocurrencies
+    from app.database import SessionLocal, upsert_cryptocurrencies
+    from app.services.create_api_service import get_coingecko_service
+
+    service = get_coingecko_service()
+    results = []
+
+    for rows in [int(size) for size in args.rows.split(",") if size]:
+        reset_database()
+        db = SessionLocal()
+        try:
+            upsert_cryptocurrencies(db, [
+                {'name': coin['name'], 'symbol': coin['symbol'].upper(), 'coingecko_id': coin['id'],
+                 'current_price': 1.0, 'market_cap': 1.0}
+                for coin in fake.coins[:rows]
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        fake.reset_stats()
+        runs = []
+
+        def refresh(_: int) -> bool:
+            stats = auto_refresh_cryptocurrencies()
+            runs.append(stats)
+            return stats['failed'] == 0
+
+        latencies, api_calls, errors = measure(refresh, args.repeat, service)
+        results.append(summarize(
+            'refresh', f"refresh_{rows}", latencies, api_calls, errors,
+            rows=rows,
+            mode=REFRESH_MODE,
+            coins_per_second=round(rows * len(latencies) / sum(latencies), 1) if sum(latencies) else None,
+            api_calls_per_coin=round(api_calls / (rows * len(latencies)), 4) if rows else None,
+            batch_write_seconds=[batch['write_seconds'] for batch in runs[-1]['batches']] if runs else [],
+            fake_calls=dict(fake.calls),
+            fake_statuses={str(status): count for status, count in fake.statuses.items()}
+        ))
+
+    return results
+
+
+def run_validation(args: argparse.Namespace, fake: FakeCoinGecko) -> List[Dict]:
+    """Benchmark symbol validation through the catalog, through /search and in batches.
+
+    Caches are cleared first and every operation uses a distinct coin, so all
+    measurements are cold.
+
+    :param args: argparse.Namespace, parsed arguments.
+    :param fake: FakeCoinGecko, running fake server.
+    :return: List[Dict], result entries.
+    """
+    from app.services.create_api_service import get_coingecko_service
+
+    service = get_coingecko_service()
+    service.cache.clear()
+    n = args.iterations
+    coins = fake.coins
+    results = []
+
+    fake.reset_stats()
+    started, calls_before = time.perf_counter(), service.request_count
+    service.refresh_catalog()
+    results.append(summarize(
+        'validation', 'catalog_load', [time.perf_counter() - started], service.request_count - calls_before, 0,
+        catalog_size=len(service.catalog)
+    ))
+
+    def validate_catalog(i: int) -> bool:
+        coin = coins[i]
+        return service.validate_cryptocurrency(coin['symbol'], coingecko_id=coin['id']) is not None
+
+    def validate_search(i: int) -> bool:
+        coin = coins[n + i]
+        return service._validate_with_search(coin['symbol']) is not None
+
+    for name, operation in (('validate_catalog', validate_catalog), ('validate_search', validate_search)):
+        fake.reset_stats()
+        latencies, api_calls, errors = measure(operation, n, service)
+        results.append(summarize('validation', name, latencies, api_calls, errors, fake_calls=dict(fake.calls)))
+
+    service.cache.clear()
+    fake.reset_stats()
+    items = [{'symbol': coin['symbol'], 'coingecko_id': coin['id']} for coin in coins[2 * n:3 * n]]
+    started, calls_before = time.perf_counter(), service.request_count
+    validated = service.validate_cryptocurrencies(items)
+    elapsed = time.perf_counter() - started
+    results.append(summarize(
+        'validation', 'validate_batch', [elapsed / len(items)] * len(items), service.request_count - calls_before,
+        sum(details is None for details in validated), fake_calls=dict(fake.calls)
+    ))
+
+    return results
+
+
+def run_serialization(args: argparse.Namespace, fake: FakeCoinGecko) -> List[Dict]:
+    """Benchmark encoding list responses, query included, over tables of several sizes.
+
+    response_model loads ORM objects and validates each through
+    CryptocurrencyResponse before jsonable_encoder and json.dumps, as FastAPI
+    does for response_model routes. column_tuples is the path the read
+    endpoints use: selected columns encoded directly.
+
+    :param args: argparse.Namespace, parsed arguments.
+    :param fake: FakeCoinGecko, running fake server.
+    :return: List[Dict], result entries (one per path and table size).
+    """
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import select
+
+    from app.database import CryptocurrencyDB, SessionLocal, upsert_cryptocurrencies
+    from app.schemas import CryptocurrencyResponse
+    from app.serialization import encode_rows, orjson, select_response_columns
+
+    if hasattr(CryptocurrencyResponse, 'model_validate'):
+        def validate(crypto: CryptocurrencyDB) -> CryptocurrencyResponse:
+            return CryptocurrencyResponse.model_validate(crypto, from_attributes=True)
+    else:
+        validate = CryptocurrencyResponse.from_orm
+
+    def response_model(db) -> bytes:
+        cryptocurrencies = db.execute(select(CryptocurrencyDB)).scalars().all()
+        return json.dumps(jsonable_encoder([validate(crypto) for crypto in cryptocurrencies])).encode()
+
+    def column_tuples(db) -> bytes:
+        return encode_rows(db.execute(select_response_columns()).all())
+
+    results = []
+
+    for rows in [int(size) for size in args.rows.split(",") if size]:
+        reset_database()
+        db = SessionLocal()
+        try:
+            upsert_cryptocurrencies(db, [
+                {'name': coin['name'], 'symbol': coin['symbol'].upper(), 'coingecko_id': coin['id'],
+                 'current_price': coin['current_price'], 'market_cap': coin['market_cap']}
+                for coin in fake.coins[:rows]
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        for name, encode in (('response_model', response_model), ('column_tuples', column_tuples)):
+            latencies, body = [], b""
+
+            for _ in range(args.repeat):
+                session = SessionLocal()  # a fresh session each run, so no ORM identity map is reused
+                try:
+                    started = time.perf_counter()
+                    body = encode(session)
+                    latencies.append(time.perf_counter() - started)
+                finally:
+                    session.close()
+
+            results.append(summarize(
+                'serialization', f"{name}_{rows}", latencies, 0, 0,
+                rows=rows,
+                rows_per_second=round(rows * len(latencies) / sum(latencies), 1) if sum(latencies) else None,
+                body_bytes=len(body),
+                encoder="orjson" if name == 'column_tuples' and orjson is not None else "json"
+            ))
+
+    return results
+
+
+def run_quotes(args: argparse.Namespace, fake: FakeCoinGecko) -> List[Dict]:
+    """Benchmark quote lookups, encoding included, over tables of several sizes.
+
+    database runs a query per lookup, as GET /cryptocurrencies/{id} does;
+    snapshot serves it from the in-memory quote snapshot behind GET /quotes.
+    Both look up single symbols and batches of 100.
+
+    :param args: argparse.Namespace, parsed arguments.
+    :param fake: FakeCoinGecko, running fake server.
+    :return: List[Dict], result entries (one per path, batch size and table size).
+    """
+    from sqlalchemy import select
+
+    from app.database import CryptocurrencyDB, SessionLocal, upsert_cryptocurrencies
+    from app.quotes import QUOTE_COLUMNS, QUOTE_FIELDS, QuoteStore
+    from app.serialization import dumps
+
+    results = []
+
+    for rows in [int(size) for size in args.rows.split(",") if size]:
+        reset_database()
+        db = SessionLocal()
+        try:
+            upsert_cryptocurrencies(db, [
+                {'name': coin['name'], 'symbol': coin['symbol'].upper(), 'coingecko_id': coin['id'],
+                 'current_price': coin['current_price'], 'market_cap': coin['market_cap']}
+                for coin in fake.coins[:rows]
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        symbols = [coin['symbol'].upper() for coin in fake.coins[:rows]]
+        snapshot = QuoteStore().rebuild()
+
+        def database(batch: List[str]) -> bytes:
+            with SessionLocal() as session:
+                found = session.execute(select(*QUOTE_COLUMNS).where(CryptocurrencyDB.symbol.in_(batch))).all()
+            return dumps([dict(zip(QUOTE_FIELDS, row)) for row in found])
+
+        def from_snapshot(batch: List[str]) -> bytes:
+            return snapshot.encode(snapshot.positions(batch))
+
+        for batch_size in (1, 100):
+            for name, lookup in (('database', database), ('snapshot', from_snapshot)):
+                latencies = []
+
+                for i in range(args.iterations):
+                    batch = [symbols[(i * batch_size + j * 7) % len(symbols)] for j in range(batch_size)]
+                    started = time.perf_counter()
+                    lookup(batch)
+                    latencies.append(time.perf_counter() - started)
+
+                results.append(summarize(
+                    'quotes', f"{name}_{batch_size}_of_{rows}", latencies, 0, 0,
+                    rows=rows,
+                    batch_size=batch_size,
+                    lookups_per_second=round(batch_size * len(latencies) / sum(latencies), 1) if sum(latencies) else None
+                ))
+
+    return results
+
+
+SCENARIOS = {
+    'crud': run_crud,
+    'refresh': run_refresh,
+    'validation': run_validation,
+    'serialization': run_serialization,
+    'quotes': run_quotes
+}
+
+
+def metadata(args: argparse.Namespace) -> Dict:
+    """Describe the environment of a run, so results can be compared across commits.
+
+    :param args: argparse.Namespace, parsed arguments.
+    :return: Dict with commit, platform and configuration.
+    """
+    def git(*command: str) -> Optional[str]:
+        try:
+            return subprocess.run(["git", *command], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'timestamp': time.time(),
+        'commit': git("rev-parse", "HEAD"),
+        'dirty': bool(git("status", "--porcelain", "--untracked-files=no")),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'database': os.environ["DATABASE_URL"].split("://", 1)[0],
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')}
+    }
+
+
+def compare(results: List[Dict], baseline: Dict) -> None:
+    """Print throughput and p99 changes against an earlier results file.
+
+    :param results: List[Dict], current result entries.
+    :param baseline: Dict, earlier results file contents.
+    :return: None
+    """
+    previous = {(entry['scenario'], entry['operation']): entry for entry in baseline.get('results', [])}
+    print(f"\nCompared with {baseline.get('meta', {}).get('commit', 'baseline')}:")
+    print(f"{'operation':<28}{'throughput':>14}{'change':>10}{'p99 ms':>12}{'change':>10}")
+
+    for entry in results:
+        before = previous.get((entry['scenario'], entry['operation']))
+        if not before:
+            continue
+
+        def change(key: str) -> str:
+            if not before.get(key) or entry.get(key) is None:
+                return "n/a"
+            return f"{(entry[key] - before[key]) / before[key] * 100:+.1f}%"
+
+        print(
+            f"{entry['scenario'] + '.' + entry['operation']:<28}{entry['throughput'] or 0:>14.1f}"
+            f"{change('throughput'):>10}{entry['p99_ms']:>12.2f}{change('p99_ms'):>10}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the selected scenarios and write the results file.
+
+    :param argv: List[str], optional, command line arguments.
+    :return: None
+    """
+    args = parse_args(argv)
+    rows = [int(size) for size in args.rows.split(",") if size]
+    fake = FakeCoinGecko(
+        coin_count=max(rows + [3 * args.iterations]),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        seed=args.seed
+    )
+    base_url = fake.start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(args, base_url, workdir)
+        results = []
+
+        try:
+            for name in args.scenarios.split(","):
+                if name not in SCENARIOS:
+                    sys.exit(f"Unknown scenario {name}, choose from {', '.join(SCENARIOS)}")
+                print(f"Running {name}...", file=sys.stderr)
+                results.extend(SCENARIOS[name](args, fake))
+        finally:
+            fake.stop()
+
+        report = {'meta': metadata(args), 'results': results}
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for entry in results:
+        print(
+            f"{entry['scenario'] + '.' + entry['operation']:<28}{entry['count']:>7} ops "
+            f"{entry['throughput'] or 0:>10.1f}/s  p50 {entry['p50_ms']:>9.2f}ms  p99 {entry['p99_ms']:>9.2f}ms  "
+            f"calls/op {entry['api_calls_per_op']}"
+        )
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,83 @@
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
 import streamlit as st
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
     
-BASE_URL = "http://api:8000"
+BASE_URL = os.getenv("API_BASE_URL", "http://api:8000")
+PAGE_SIZE = int(os.getenv("CLIENT_PAGE_SIZE", "500"))  # rows per /cryptocurrencies/ request, at most 1000
+CACHE_TTL = float(os.getenv("CLIENT_CACHE_TTL", "300"))
+CREATE_POLL_SECONDS = float(os.getenv("CLIENT_CREATE_POLL_SECONDS", "0.5"))
+CREATE_TIMEOUT = float(os.getenv("CLIENT_CREATE_TIMEOUT", "30"))  # seconds to wait for an asynchronous create
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Return a keep-alive session shared by all reruns and browser sessions.
+
+    :return: requests.Session, pooled session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_data_version() -> Optional[str]:
+    """Return the ETag of the cryptocurrency table, which changes on every write.
+
+    A one-row conditional request is answered with a 304 while nothing changed.
+
+    :return: str, current ETag, or None if the API sent none.
+    """
+    known = st.session_state.get('data_version')
+    headers = {"If-None-Match": known} if known else {}
+    response = get_session().get(f"{BASE_URL}/cryptocurrencies/", params={'limit': 1}, headers=headers)
+
+    if response.status_code != 304:
+        response.raise_for_status()
+        st.session_state.data_version = response.headers.get("ETag")
+    return st.session_state.data_version
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_page(version: Optional[str], cursor: Optional[str], limit: int = PAGE_SIZE) -> Tuple[List[Dict], Optional[str]]:
+    """Fetch one page of cryptocurrencies, cached per data version.
+
+    :param version: str, optional, data version the page belongs to (cache key only).
+    :param cursor: str, optional, X-Next-Cursor of the previous page.
+    :param limit: int, rows per page.
+    :return: Tuple of rows and the cursor of the next page (None on the last page).
+    """
+    params = {'limit': limit}
+    if cursor:
+        params['cursor'] = cursor
+
+    response = get_session().get(f"{BASE_URL}/cryptocurrencies/", params=params)
+    response.raise_for_status()
+    return response.json(), response.headers.get("X-Next-Cursor")
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def load_cryptocurrencies(version: Optional[str], pages: int) -> Tuple[pd.DataFrame, Dict[int, str], Optional[str]]:
+    """Load the first pages of cryptocurrencies into a table and an id->name index.
+
+    :param version: str, optional, data version (cache key only).
+    :param pages: int, number of pages to load.
+    :return: Tuple of the table, the id->name index and the cursor of the next page.
+    """
+    rows: List[Dict] = []
+    cursor = None
+
+    for page in range(pages):
+        page_rows, cursor = fetch_page(version, cursor)
+        rows.extend(page_rows)
+        if not cursor:
+            break
+
+    df = pd.DataFrame(rows)
+    names = dict(zip(df['id'].tolist(), df['name'].tolist())) if rows else {}
+    return df, names, cursor
 
 def create_cryptocurrency() -> None:
     """Create a new cryptocurrency entry in the database.
@@ -21,7 +96,7 @@ def create_cryptocurrency() -> None:
         
         if submit_button:
             try:
-                response = requests.post(
+                response = get_session().post(
                     f"{BASE_URL}/cryptocurrencies/", 
                     json={
                         "name": name,
@@ -34,53 +109,84 @@ def create_cryptocurrency() -> None:
                 if response.status_code == 200:
                     st.success(f"Cryptocurrency {name} created successfully!")
                     st.json(response.json())
+                elif response.status_code == 202:
+                    with st.spinner(f"Validating {name}..."):
+                        job = wait_for_create_job(response.json())
+
+                    if job['status'] == 'succeeded':
+                        st.success(f"Cryptocurrency {name} created successfully!")
+                        st.json(job)
+                    elif job['status'] == 'failed':
+                        st.error(f"Error: {job['error']}")
+                    else:
+                        st.info(f"Cryptocurrency {name} is still being validated (job {job['id']})")
                 else:
                     st.error(f"Error: {response.json().get('detail', 'Unknown error')}")
             
             except requests.exceptions.RequestException as e:
                 st.error(f"Connection error: {e}")
 
+def wait_for_create_job(job: Dict) -> Dict:
+    """Poll an asynchronous create until it finishes or CREATE_TIMEOUT passes.
+
+    :param job: Dict, create job returned with the 202 response.
+    :exception: requests.exceptions.RequestException if polling fails.
+    :return: Dict, last known state of the job.
+    """
+    deadline = time.monotonic() + CREATE_TIMEOUT
+
+    while job['status'] == 'pending' and time.monotonic() < deadline:
+        time.sleep(CREATE_POLL_SECONDS)
+        response = get_session().get(f"{BASE_URL}/cryptocurrencies/jobs/{job['id']}")
+        response.raise_for_status()
+        job = response.json()
+
+    return job
+
 def list_cryptocurrencies() -> None:
-    """List all cryptocurrencies from the database.
+    """List cryptocurrencies from the database, PAGE_SIZE rows at a time.
+
+    Pages are cached per data version, so reruns only send one conditional request.
 
     :return: None, displays cryptocurrencies in Streamlit table.
     """
     st.header("List cryptocurrencies")
     
     try:
-        response = requests.get(f"{BASE_URL}/cryptocurrencies/")
-        
-        if response.status_code == 200:
-            cryptocurrencies = response.json()
-            
-            if not cryptocurrencies:
-                st.info("No cryptocurrencies found. Create a cryptocurrency!")
-                return
+        version = get_data_version()
+        pages = st.session_state.setdefault('pages_loaded', 1)
+        df, names, next_cursor = load_cryptocurrencies(version, pages)
             
-            df = pd.DataFrame(cryptocurrencies)
+        if df.empty:
+            st.info("No cryptocurrencies found. Create a cryptocurrency!")
+            return
             
-            st.dataframe(df)
+        st.dataframe(df)
+        st.caption(f"{len(df)} cryptocurrencies loaded")
+
+        if next_cursor and st.button(f"Load {PAGE_SIZE} more"):
+            st.session_state.pages_loaded = pages + 1
+            st.rerun()
             
-            selected_crypto = st.selectbox(
-                "Select cryptocurrency", 
-                options=df['id'].tolist(),
-                format_func=lambda x: df[df['id'] == x]['name'].values[0]
-            )
+        selected_crypto = st.selectbox(
+            "Select cryptocurrency", 
+            options=list(names),
+            format_func=names.get
+        )
             
-            col1, col2 = st.columns(2)
+        col1, col2 = st.columns(2)
             
-            with col1:
-                if st.button("Update cryptocurrency"):
-                    st.session_state.update_crypto_id = selected_crypto
-                    st.rerun()
+        with col1:
+            if st.button("Update cryptocurrency"):
+                st.session_state.update_crypto_id = selected_crypto
+                st.rerun()
             
-            with col2:
-                if st.button("Delete cryptocurrency"):
-                    delete_cryptocurrency(selected_crypto)
-        
-        else:
-            st.error(f"Error: {response.json().get('detail', 'Unknown error')}")
+        with col2:
+            if st.button("Delete cryptocurrency"):
+                delete_cryptocurrency(selected_crypto)
     
+    except requests.exceptions.HTTPError as e:
+        st.error(f"Error: {e}")
     except requests.exceptions.RequestException as e:
         st.error(f"Connection error: {e}")
     except Exception as e:
@@ -95,7 +201,7 @@ def update_cryptocurrency(crypto_id: int) -> None:
     st.header("Update cryptocurrency")
     
     try:
-        response = requests.get(f"{BASE_URL}/cryptocurrencies/{crypto_id}")
+        response = get_session().get(f"{BASE_URL}/cryptocurrencies/{crypto_id}")
         
         if response.status_code == 200:
             crypto = response.json()
@@ -120,7 +226,7 @@ def update_cryptocurrency(crypto_id: int) -> None:
                 
                 if submit_button:
                     try:
-                        update_response = requests.put(
+                        update_response = get_session().put(
                             f"{BASE_URL}/cryptocurrencies/{crypto_id}", 
                             json={
                                 "name": name,
@@ -152,7 +258,7 @@ def delete_cryptocurrency(crypto_id: int) -> None:
     :return: None, displays Streamlit notification about deletion status.
     """
     try:
-        response = requests.delete(f"{BASE_URL}/cryptocurrencies/{crypto_id}")
+        response = get_session().delete(f"{BASE_URL}/cryptocurrencies/{crypto_id}")
         
         if response.status_code == 200:
             st.success(f"Cryptocurrency deleted successfully!")
@@ -1,16 +1,50 @@
 import uvicorn
 import multiprocessing
 import subprocess
+import shutil
 import signal
-import time
 import os
-import psycopg2
+import urllib.request
+from typing import Optional
+
+SERVE_MODE = os.getenv("SERVE_MODE", "dev")  # "dev" (auto-reload) or "production"
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))  # same default as app.services.rate_limiter
+RUN_STREAMLIT = os.getenv("RUN_STREAMLIT", "true").lower() == "true"
+API_READY_URL = "http://127.0.0.1:8000/ready"
 
 def run_fastapi() -> None:
     """Run FastAPI application.
 
+    In production mode, WEB_CONCURRENCY worker processes serve requests; background
+    jobs run in a single worker elected through a Postgres advisory lock. The
+    database is migrated once before the workers start, so they skip that step.
+    In dev mode, the server waits for and migrates the database on startup itself.
+
     :return: None, runs FastAPI application.
     """
+    if SERVE_MODE == "production":
+        metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)  # drop metrics of previous runs
+            os.makedirs(metrics_dir, exist_ok=True)
+
+        from app.startup import configure_logging, prepare_database  # after the metrics directory exists
+
+        configure_logging()
+        prepare_database()
+        os.environ["RUN_MIGRATIONS"] = "false"
+        os.environ["WEB_CONCURRENCY"] = str(WEB_CONCURRENCY)  # workers size their share of shared limits with it
+
+        uvicorn.run(
+            "app.app:app", 
+            host="0.0.0.0", 
+            port=8000, 
+            workers=WEB_CONCURRENCY,
+            proxy_headers=True
+        )
+        return
+
+    os.environ["WEB_CONCURRENCY"] = "1"
     uvicorn.run(
         "app.app:app", 
         host="0.0.0.0", 
@@ -18,83 +52,36 @@ def run_fastapi() -> None:
         reload=True
     )
 
-def run_streamlit() -> None:
-    """Run Streamlit application.
+def api_ready() -> bool:
+    """Check whether the API finished starting up.
 
-    :return: None, runs Streamlit application.
+    :return: bool, True once /ready answers 200.
     """
-    subprocess.run([
-        "streamlit", "run", "client/app.py", 
-        "--server.port", "8501"
-    ])
+    try:
+        with urllib.request.urlopen(API_READY_URL, timeout=1) as response:
+            return response.status == 200
+    except OSError:
+        return False
 
-def wait_for_database() -> None:
-    """Wait for the database to be ready.
+def start_streamlit() -> subprocess.Popen:
+    """Start the Streamlit application.
 
-    :return: None
+    :return: subprocess.Popen, Streamlit process.
     """
-    db_url = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/coingecko_api")
-    db_parts = db_url.replace("postgresql://", "").split("/")
-    db_name = db_parts[1] if len(db_parts) > 1 else "postgres"
-    conn_parts = db_parts[0].split("@")
-    user_pass = conn_parts[0].split(":")
-    host_port = conn_parts[1].split(":")
-    
-    user = user_pass[0]
-    password = user_pass[1] if len(user_pass) > 1 else ""
-    host = host_port[0]
-    port = int(host_port[1]) if len(host_port) > 1 else 5432
-    
-    max_retries = 60  
-    retry_interval = 3  
-    
-    print(f"Waiting for database at {host}:{port}...")
-    for i in range(max_retries):
-        try:
-            try:
-                conn = psycopg2.connect(
-                    dbname=db_name,
-                    user=user,
-                    password=password,
-                    host=host,
-                    port=port,
-                    connect_timeout=5  
-                )
-            except psycopg2.OperationalError as e:
-                if "does not exist" in str(e):
-                    conn = psycopg2.connect(
-                        dbname="postgres",
-                        user=user,
-                        password=password,
-                        host=host,
-                        port=port,
-                        connect_timeout=5
-                    )
-                    conn.autocommit = True
-                    cursor = conn.cursor()
-                    cursor.execute(f"CREATE DATABASE {db_name}")
-                    cursor.close()
-                    print(f"Created database {db_name}")
-                else:
-                    raise
-                    
-            conn.close()
-            print("Database is ready!")
-            return
-        except psycopg2.OperationalError as e:
-            print(f"Database not ready yet ({str(e)}), retrying in {retry_interval} seconds... ({i+1}/{max_retries})")
-            time.sleep(retry_interval)
-    
-    print("Failed to connect to the database after maximum retries")
-    raise Exception("Database connection failed")
+    return subprocess.Popen([
+        "streamlit", "run", "client/app.py", 
+        "--server.port", "8501"
+    ])
 
 def main() -> None:
-    """Run FastAPI and Streamlit applications concurrently.
+    """Run the FastAPI application, and the Streamlit application once the API is ready.
+
+    Streamlit is started only after /ready answers, like the streamlit service
+    in docker-compose.yml, so it does not compete with the API's startup. The
+    API keeps serving if Streamlit exits. RUN_STREAMLIT=false runs the API only.
 
     :return: None, runs applications concurrently.
     """
-    wait_for_database()
-    
     multiprocessing.set_start_method('spawn')
 
     stop_event = multiprocessing.Event()
@@ -106,16 +93,15 @@ def main() -> None:
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    try:
-        fastapi_process = multiprocessing.Process(target=run_fastapi)
-        streamlit_process = multiprocessing.Process(target=run_streamlit)
+    fastapi_process = multiprocessing.Process(target=run_fastapi)
+    streamlit_process: Optional[subprocess.Popen] = None
 
+    try:
         fastapi_process.start()
-        streamlit_process.start()
 
-        while not stop_event.is_set():
-            if not fastapi_process.is_alive() or not streamlit_process.is_alive():
-                break
+        while not stop_event.is_set() and fastapi_process.is_alive():
+            if RUN_STREAMLIT and streamlit_process is None and api_ready():
+                streamlit_process = start_streamlit()
             stop_event.wait(1)
 
     except Exception as e:
@@ -124,16 +110,18 @@ def main() -> None:
     finally:
         if fastapi_process.is_alive():
             fastapi_process.terminate()
-        if streamlit_process.is_alive():
+        if streamlit_process is not None and streamlit_process.poll() is None:
             streamlit_process.terminate()
 
         fastapi_process.join(timeout=5)
-        streamlit_process.join(timeout=5)
+        if streamlit_process is not None:
+            try:
+                streamlit_process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                streamlit_process.kill()
 
         if fastapi_process.is_alive():
             fastapi_process.kill()
-        if streamlit_process.is_alive():
-            streamlit_process.kill()
 
 if __name__ == "__main__":
     main()
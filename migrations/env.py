@@ -0,0 +1,55 @@
+from alembic import context
+from sqlalchemy.engine import Connection
+
+from app.database import DATABASE_URL, Base, engine
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL for DATABASE_URL without connecting (alembic upgrade --sql).
+
+    :return: None
+    """
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={'paramstyle': 'named'}
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_on(connection: Connection) -> None:
+    """Run the migrations on an open connection.
+
+    :param connection: Connection, database connection.
+    :return: None
+    """
+    context.configure(connection=connection, target_metadata=target_metadata)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run the migrations on the connection passed by app.startup, or on a new one.
+
+    :return: None
+    """
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        run_migrations_on(connection)
+        return
+
+    with engine.connect() as connection:
+        run_migrations_on(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
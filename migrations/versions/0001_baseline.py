@@ -0,0 +1,132 @@
+"""Baseline schema
+
+Creates every table of app.database. Databases created earlier by
+Base.metadata.create_all() are brought up to date instead: missing tables,
+the cryptocurrencies.pinned column and missing indexes are added, and
+existing ones are left alone.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Dict, Sequence, Set, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def existing_schema() -> Dict[str, Set[str]]:
+    """Map each existing table to its column and index names.
+
+    :return: Dict, empty when emitting SQL offline.
+    """
+    if op.get_context().as_sql:
+        return {}
+
+    inspector = sa.inspect(op.get_bind())
+    return {
+        table: {column['name'] for column in inspector.get_columns(table)}
+        | {index['name'] for index in inspector.get_indexes(table)}
+        for table in inspector.get_table_names()
+    }
+
+
+def create_index(schema: Dict[str, Set[str]], name: str, table: str, columns: list, **kwargs) -> None:
+    """Create an index unless it already exists.
+
+    :param schema: Dict, existing_schema() result.
+    :param name: str, index name.
+    :param table: str, table name.
+    :param columns: list, indexed columns.
+    :return: None
+    """
+    if name not in schema.get(table, ()):
+        op.create_index(name, table, columns, **kwargs)
+
+
+def upgrade() -> None:
+    schema = existing_schema()
+
+    if 'cryptocurrencies' not in schema:
+        op.create_table(
+            'cryptocurrencies',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String()),
+            sa.Column('symbol', sa.String()),
+            sa.Column('current_price', sa.Float()),
+            sa.Column('market_cap', sa.Float()),
+            sa.Column('coingecko_id', sa.String(), unique=True),
+            sa.Column('last_updated', sa.Float(), nullable=True),
+            sa.Column('pinned', sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+    elif 'pinned' not in schema['cryptocurrencies']:
+        op.add_column(
+            'cryptocurrencies',
+            sa.Column('pinned', sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+
+    create_index(schema, 'ix_cryptocurrencies_id', 'cryptocurrencies', ['id'])
+    create_index(schema, 'ix_cryptocurrencies_name', 'cryptocurrencies', ['name'], unique=True)
+    create_index(schema, 'ix_cryptocurrencies_symbol', 'cryptocurrencies', ['symbol'], unique=True)
+    create_index(schema, 'ix_cryptocurrencies_market_cap_id', 'cryptocurrencies', ['market_cap', 'id'])
+    create_index(schema, 'ix_cryptocurrencies_current_price_id', 'cryptocurrencies', ['current_price', 'id'])
+    create_index(schema, 'ix_cryptocurrencies_last_updated_id', 'cryptocurrencies', ['last_updated', 'id'])
+
+    if 'price_history' not in schema:
+        op.create_table(
+            'price_history',
+            sa.Column(
+                'cryptocurrency_id',
+                sa.Integer(),
+                sa.ForeignKey('cryptocurrencies.id', ondelete='CASCADE'),
+                primary_key=True
+            ),
+            sa.Column('ts', sa.Float(), primary_key=True),
+            sa.Column('price', sa.Float()),
+            sa.Column('market_cap', sa.Float())
+        )
+    create_index(schema, 'ix_price_history_ts', 'price_history', ['ts'], postgresql_using='brin')
+
+    if 'table_versions' not in schema:
+        op.create_table(
+            'table_versions',
+            sa.Column('name', sa.String(), primary_key=True),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.Float(), nullable=False)
+        )
+
+    if 'refresh_checkpoints' not in schema:
+        op.create_table(
+            'refresh_checkpoints',
+            sa.Column('name', sa.String(), primary_key=True),
+            sa.Column('started_at', sa.Float(), nullable=False),
+            sa.Column('last_id', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.Float(), nullable=False)
+        )
+
+    if 'create_jobs' not in schema:
+        op.create_table(
+            'create_jobs',
+            sa.Column('id', sa.String(), primary_key=True),
+            sa.Column('status', sa.String(), nullable=False),
+            sa.Column('symbol', sa.String(), nullable=False),
+            sa.Column('payload', sa.JSON(), nullable=False),
+            sa.Column('cryptocurrency_id', sa.Integer(), nullable=True),
+            sa.Column('error', sa.String(), nullable=True),
+            sa.Column('created_at', sa.Float(), nullable=False),
+            sa.Column('updated_at', sa.Float(), nullable=False)
+        )
+    create_index(schema, 'ix_create_jobs_status', 'create_jobs', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_table('create_jobs')
+    op.drop_table('refresh_checkpoints')
+    op.drop_table('table_versions')
+    op.drop_table('price_history')
+    op.drop_table('cryptocurrencies')
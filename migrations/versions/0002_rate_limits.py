@@ -0,0 +1,29 @@
+"""Shared CoinGecko rate limit bucket
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_limits',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.Column('paused_until', sa.Float(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limits')
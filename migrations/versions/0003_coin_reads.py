@@ -0,0 +1,27 @@
+"""Coin read counts shared by all workers
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'coin_reads',
+        sa.Column('cryptocurrency_id', sa.Integer(), primary_key=True),
+        sa.Column('reads', sa.Integer(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('coin_reads')
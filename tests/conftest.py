@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+import pytest
+
+# the app reads its settings at import time, so point it at a throwaway SQLite
+# database before any app module is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='coingecko_api_tests_')}/test.db"
+os.environ.setdefault("AUTO_REFRESH_ENABLED", "false")
+
+# Postgres-only behavior (shared rate limiter) is tested against this database when set
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+class FakeClock:
+    """Stand-in for the time module whose clock only moves when told to."""
+
+    def __init__(self, start: float = 1000.0) -> None:
+        self.now = start
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Return a fake clock; patch it over a module's time import with monkeypatch.setattr.
+
+    :return: FakeClock, clock starting at 1000.
+    """
+    return FakeClock()
+
+
+@pytest.fixture(scope="session")
+def migrated_database() -> None:
+    """Create the schema of the test database once per run.
+
+    :return: None
+    """
+    from app.startup import run_migrations
+
+    run_migrations()
+
+
+@pytest.fixture
+def db(migrated_database):
+    """Return a session on an empty test database, emptied again afterwards.
+
+    :return: Session, database session.
+    """
+    from app.database import CryptocurrencyDB, PriceHistoryDB, RefreshCheckpointDB, SessionLocal
+
+    def empty(session) -> None:
+        for model in (PriceHistoryDB, RefreshCheckpointDB, CryptocurrencyDB):
+            session.query(model).delete()
+        session.commit()
+
+    session = SessionLocal()
+    empty(session)
+    yield session
+    session.rollback()
+    empty(session)
+    session.close()
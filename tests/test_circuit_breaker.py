@@ -0,0 +1,174 @@
+import pytest
+import requests
+
+from app.services import circuit_breaker
+from app.services.cache import MemoryBackend, ResponseCache
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.create_api_service import CoinGeckoService
+from app.services.rate_limiter import TokenBucket
+
+
+@pytest.fixture
+def breaker_clock(monkeypatch, clock):
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return clock
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(breaker_clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()['opened'] == 1
+
+
+def test_success_resets_the_failure_count(breaker_clock):
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=5)
+
+    breaker.record_failure()
+    breaker.record_success(0.1)
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 1
+
+
+def test_slow_calls_count_as_failures(breaker_clock):
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=5)
+
+    breaker.record_success(6.0)
+    breaker.record_success(5.0)
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_open_circuit_rejects_calls_until_reset(breaker_clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    open_breaker(breaker)
+
+    breaker_clock.advance(10)
+    assert breaker.is_open
+    assert breaker.retry_after() == pytest.approx(20)
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert not breaker.allow()
+    assert breaker.stats()['short_circuited'] == 2
+
+
+def test_half_open_lets_a_single_probe_through(breaker_clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    open_breaker(breaker)
+    breaker_clock.advance(30)
+
+    assert not breaker.is_open
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.is_open  # while the probe is in flight
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_the_circuit(breaker_clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    open_breaker(breaker)
+    breaker_clock.advance(30)
+    breaker.allow()
+
+    breaker.record_success(0.1)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_the_circuit(breaker_clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    open_breaker(breaker)
+    breaker_clock.advance(30)
+    breaker.allow()
+
+    breaker.record_failure()  # a single failure is enough while half-open
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() == pytest.approx(30)
+    assert breaker.stats()['opened'] == 2
+
+
+def test_released_probe_can_be_taken_again(breaker_clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    open_breaker(breaker)
+    breaker_clock.advance(30)
+    breaker.allow()
+
+    breaker.release()  # e.g. the probe gave up waiting for the rate limiter
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+class FailingSession:
+    """requests.Session stand-in whose every request fails to connect."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        raise requests.ConnectionError("CoinGecko unreachable")
+
+
+class EmptyCatalog:
+    """Coin catalog that is never available, so validation falls back to /search."""
+
+    def __len__(self) -> int:
+        return 0
+
+    def load(self) -> bool:
+        return False
+
+
+def make_service(breaker: CircuitBreaker) -> CoinGeckoService:
+    return CoinGeckoService(
+        session=FailingSession(),
+        rate_limiter=TokenBucket(calls_per_minute=60_000, capacity=100),
+        max_retries=0,
+        catalog=EmptyCatalog(),
+        cache=ResponseCache(MemoryBackend()),
+        breaker=breaker
+    )
+
+
+def test_open_circuit_stops_requests_to_coingecko():
+    service = make_service(CircuitBreaker(failure_threshold=2, reset_seconds=30))
+
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            service._fetch(f"{service.BASE_URL}/ping")
+
+    with pytest.raises(CircuitOpenError):
+        service._fetch(f"{service.BASE_URL}/ping")
+    assert service.session.calls == 2
+
+
+def test_validation_fallback_is_not_cached_while_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    open_breaker(breaker)
+    service = make_service(breaker)
+
+    details = service._validate_cryptocurrency("abc", current_price=1.0, market_cap=100.0)
+
+    assert details['in_coingecko'] is False
+    assert service.session.calls == 0
+
+    # once CoinGecko is reachable again the symbol is validated anew, not served from the cache
+    service.breaker = CircuitBreaker()
+    service._validate_cryptocurrency("abc", current_price=1.0, market_cap=100.0)
+    assert service.session.calls > 0
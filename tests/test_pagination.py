@@ -0,0 +1,89 @@
+import itertools
+
+import pytest
+from sqlalchemy import select
+
+from app.database import CryptocurrencyDB
+from app.pagination import InvalidCursor, apply_keyset, decode_cursor, encode_cursor, next_cursor
+
+
+def test_cursor_round_trip_is_url_safe():
+    cursor = encode_cursor('market_cap', 'desc', 1.5e9, 42)
+
+    assert '=' not in cursor and '+' not in cursor and '/' not in cursor
+    assert decode_cursor(cursor, 'market_cap', 'desc') == (1.5e9, 42)
+
+
+@pytest.mark.parametrize('value', [None, 'BTC', 0, 12.25])
+def test_cursor_keeps_the_sort_value(value):
+    assert decode_cursor(encode_cursor('symbol', 'asc', value, 7), 'symbol', 'asc') == (value, 7)
+
+
+@pytest.mark.parametrize('sort_by, order', [('current_price', 'asc'), ('market_cap', 'desc')])
+def test_cursor_of_another_sort_is_rejected(sort_by, order):
+    cursor = encode_cursor('market_cap', 'asc', 1.0, 1)
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, sort_by, order)
+
+
+@pytest.mark.parametrize('cursor', ['', 'not a cursor', 'e30', encode_cursor('id', 'asc', 1, 1)[:-3]])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, 'id', 'asc')
+
+
+@pytest.fixture
+def coins(db):
+    # ties and NULLs in every sort column, so pages end in the middle of equal values
+    market_caps = [None, 5.0, 5.0, None, 1.0, 5.0, None, 2.0]
+    prices = [1.0, 1.0, None, 3.0, 1.0, None, 2.0, 1.0]
+    rows = [
+        CryptocurrencyDB(
+            name=f"coin {index}",
+            symbol=f"C{index % 3}{index}",
+            current_price=price,
+            market_cap=market_cap,
+            last_updated=None if index % 4 == 0 else 1000.0 + index % 2
+        )
+        for index, (market_cap, price) in enumerate(zip(market_caps, prices))
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def expected_order(rows, sort_by, order):
+    """Order rows like apply_keyset: by (value, id), NULLs last ascending and first descending."""
+    def key(row):
+        value = getattr(row, sort_by)
+        return (value is None, value if value is not None else 0, row.id)
+
+    ordered = sorted(rows, key=key)
+    return [row.id for row in (ordered[::-1] if order == 'desc' else ordered)]
+
+
+def page_through(db, sort_by, order, page_size):
+    ids, cursor = [], None
+    for _ in range(100):
+        query = apply_keyset(select(CryptocurrencyDB), sort_by, order, cursor).limit(page_size)
+        page = db.execute(query).scalars().all()
+        ids.extend(row.id for row in page)
+        if len(page) < page_size:
+            return ids
+        cursor = next_cursor(page[-1], sort_by, order)
+    raise AssertionError("pagination did not terminate")
+
+
+@pytest.mark.parametrize('sort_by, order, page_size', list(itertools.product(
+    ['id', 'market_cap', 'current_price', 'last_updated', 'symbol'], ['asc', 'desc'], [1, 2, 3]
+)))
+def test_pages_cover_every_row_once_in_order(db, coins, sort_by, order, page_size):
+    assert page_through(db, sort_by, order, page_size) == expected_order(coins, sort_by, order)
+
+
+def test_page_after_the_last_row_is_empty(db, coins):
+    last = db.execute(apply_keyset(select(CryptocurrencyDB), 'market_cap', 'asc', None)).scalars().all()[-1]
+    cursor = next_cursor(last, 'market_cap', 'asc')
+
+    assert db.execute(apply_keyset(select(CryptocurrencyDB), 'market_cap', 'asc', cursor)).all() == []
@@ -0,0 +1,147 @@
+import uuid
+from email.utils import formatdate
+
+import pytest
+from sqlalchemy import create_engine, delete
+
+from app.database import RateLimitDB
+from app.services import rate_limiter
+from app.services.rate_limiter import SharedTokenBucket, TokenBucket, backoff_delay, parse_retry_after
+from tests.conftest import TEST_POSTGRES_URL
+
+
+@pytest.fixture
+def bucket_clock(monkeypatch, clock):
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def test_burst_up_to_capacity_then_spaced_at_rate(bucket_clock):
+    bucket = TokenBucket(calls_per_minute=60, capacity=3)
+
+    assert [bucket._reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # later callers reserve future tokens, so each waits one interval longer than the previous one
+    assert bucket._reserve() == pytest.approx(1.0)
+    assert bucket._reserve() == pytest.approx(2.0)
+
+
+def test_refill_is_capped_at_capacity(bucket_clock):
+    bucket = TokenBucket(calls_per_minute=60, capacity=2)
+    bucket._reserve()
+    bucket._reserve()
+
+    bucket_clock.advance(3600)
+
+    assert [bucket._reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket._reserve() == pytest.approx(1.0)
+
+
+def test_max_wait_gives_the_token_back(bucket_clock):
+    bucket = TokenBucket(calls_per_minute=60, capacity=1)
+    bucket._reserve()
+
+    assert bucket._reserve(max_wait=0.5) is None
+    assert bucket._reserve() == pytest.approx(1.0)  # the refused reservation did not take a token
+
+
+def test_acquire_sleeps_for_the_reserved_wait(bucket_clock):
+    bucket = TokenBucket(calls_per_minute=120, capacity=1)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket_clock.now == pytest.approx(1000.5)
+
+
+def test_pause_delays_and_drains_the_bucket(bucket_clock):
+    bucket = TokenBucket(calls_per_minute=60, capacity=5)
+
+    bucket.pause(10)
+
+    # the pause, then one interval for the drained bucket to refill
+    assert bucket._reserve() == pytest.approx(11.0)
+    bucket_clock.advance(11)
+    # no burst after the pause: calls resume at the sustained rate
+    assert bucket._reserve() == pytest.approx(1.0)
+
+
+def test_zero_rate_is_unlimited_but_honors_pauses(bucket_clock):
+    bucket = TokenBucket(calls_per_minute=0)
+
+    assert [bucket._reserve() for _ in range(100)] == [0.0] * 100
+    bucket.pause(3)
+    assert bucket._reserve() == pytest.approx(3.0)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert 0 < parse_retry_after(formatdate(rate_limiter.time.time() + 30, usegmt=True)) <= 30
+
+
+def test_backoff_honors_retry_after_up_to_the_maximum():
+    assert rate_limiter.BACKOFF_MAX <= backoff_delay(0, retry_after=10 ** 6) <= rate_limiter.BACKOFF_MAX + rate_limiter.BACKOFF_BASE
+    assert 0 <= backoff_delay(2) <= rate_limiter.BACKOFF_BASE * 4
+
+
+def test_shared_bucket_falls_back_to_its_share_without_the_database():
+    unreachable = create_engine("postgresql+psycopg2://nobody@127.0.0.1:1/none", connect_args={'connect_timeout': 1})
+    bucket = SharedTokenBucket(calls_per_minute=60, capacity=4, engine=unreachable, workers=2)
+
+    assert bucket.fallback.rate == pytest.approx(0.5)
+    assert bucket.fallback.capacity == 2
+    assert [bucket._reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket._reserve() == pytest.approx(2.0, abs=0.1)
+
+
+@pytest.fixture
+def postgres_engine():
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_engine(TEST_POSTGRES_URL)
+    RateLimitDB.__table__.create(engine, checkfirst=True)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def shared_name(postgres_engine):
+    name = f"test-{uuid.uuid4().hex}"
+    yield name
+    with postgres_engine.begin() as connection:
+        connection.execute(delete(RateLimitDB).where(RateLimitDB.name == name))
+
+
+def test_shared_bucket_is_shared_between_workers(postgres_engine, shared_name):
+    workers = [
+        SharedTokenBucket(calls_per_minute=60, capacity=2, name=shared_name, engine=postgres_engine, workers=2)
+        for _ in range(2)
+    ]
+
+    assert workers[0]._reserve() == 0.0
+    assert workers[1]._reserve() == 0.0
+    # the burst is spent across both workers, so the next call waits for the shared refill
+    assert workers[0]._reserve() == pytest.approx(1.0, abs=0.1)
+    assert workers[1]._reserve() == pytest.approx(2.0, abs=0.1)
+
+
+def test_shared_bucket_refusal_returns_the_token_in_the_same_transaction(postgres_engine, shared_name):
+    bucket = SharedTokenBucket(calls_per_minute=60, capacity=1, name=shared_name, engine=postgres_engine)
+    bucket._reserve()
+
+    assert bucket._reserve(max_wait=0.5) is None
+    with postgres_engine.connect() as connection:
+        tokens = connection.execute(RateLimitDB.__table__.select().where(RateLimitDB.name == shared_name)).one().tokens
+    assert tokens == pytest.approx(0.0, abs=0.1)
+
+
+def test_shared_pause_reaches_every_worker(postgres_engine, shared_name):
+    first, second = (
+        SharedTokenBucket(calls_per_minute=60, capacity=5, name=shared_name, engine=postgres_engine)
+        for _ in range(2)
+    )
+
+    first.pause(30)
+
+    assert second._reserve() == pytest.approx(31.0, abs=0.5)
@@ -0,0 +1,94 @@
+import pytest
+
+import app.app as api
+from app.database import CryptocurrencyDB, get_refresh_checkpoint, save_refresh_checkpoint
+
+
+@pytest.fixture
+def coins(db):
+    rows = [
+        CryptocurrencyDB(name=f"coin {index}", symbol=f"C{index}", coingecko_id=f"coin-{index}", current_price=1.0, market_cap=1.0)
+        for index in range(5)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """Serve every requested coin from a stand-in for CoinGecko and record the requested batches."""
+    batches = []
+
+    def fetch_market_data(service, coingecko_ids):
+        batches.append(list(coingecko_ids))
+        return {coingecko_id: {'current_price': 2.0, 'market_cap': 3.0} for coingecko_id in coingecko_ids}
+
+    monkeypatch.setattr(api, "_fetch_market_data", fetch_market_data)
+    monkeypatch.setattr(api, "REFRESH_BATCH_SIZE", 2)
+    return batches
+
+
+def fail_write_of_batch(monkeypatch, failing_batch: int) -> None:
+    """Make the price write of one batch (1-based) fail, like a crash or lost connection mid-run."""
+    writes = []
+    bulk_update_prices = api.bulk_update_prices
+
+    def failing_bulk_update_prices(db, updates):
+        writes.append(updates)
+        if len(writes) == failing_batch:
+            raise RuntimeError("connection lost")
+        bulk_update_prices(db, updates)
+
+    monkeypatch.setattr(api, "bulk_update_prices", failing_bulk_update_prices)
+
+
+def test_interrupted_run_checkpoints_the_last_committed_batch(db, coins, fetched, monkeypatch):
+    fail_write_of_batch(monkeypatch, 2)
+
+    stats = api.auto_refresh_cryptocurrencies()
+
+    assert stats['updated'] == 2
+    assert stats['failed_ids'] == coins[2:]
+    assert [batch['committed'] for batch in stats['batches']] == [True, False]
+    assert get_refresh_checkpoint(db).last_id == coins[1]
+
+
+def test_next_run_resumes_after_the_checkpoint(db, coins, fetched, monkeypatch):
+    with monkeypatch.context() as patch:
+        fail_write_of_batch(patch, 2)
+        api.auto_refresh_cryptocurrencies()
+    fetched.clear()
+
+    stats = api.auto_refresh_cryptocurrencies()
+
+    assert stats['resumed_after'] == coins[1]
+    assert fetched == [['coin-2', 'coin-3'], ['coin-4']]
+    assert stats['updated'] == 3 and stats['failed_ids'] == []
+    db.expire_all()
+    assert get_refresh_checkpoint(db) is None  # a finished run starts over next time
+    assert [price for price, in db.query(CryptocurrencyDB.current_price)] == [2.0] * 5
+
+
+def test_stale_checkpoint_is_ignored(db, coins, fetched, monkeypatch):
+    save_refresh_checkpoint(db, started_at=0.0, last_id=coins[2])
+    db.commit()
+    monkeypatch.setattr(api, "REFRESH_CHECKPOINT_MAX_AGE_HOURS", 0)
+
+    stats = api.auto_refresh_cryptocurrencies()
+
+    assert stats['resumed_after'] is None
+    assert stats['updated'] == 5
+
+
+def test_targeted_refresh_leaves_the_checkpoint_alone(db, coins, fetched):
+    save_refresh_checkpoint(db, started_at=123.0, last_id=coins[0])
+    db.commit()
+
+    stats = api.auto_refresh_cryptocurrencies([coins[3]])
+
+    assert stats['resumed_after'] is None
+    assert fetched == [['coin-3']]
+    db.expire_all()
+    checkpoint = get_refresh_checkpoint(db)
+    assert (checkpoint.started_at, checkpoint.last_id) == (123.0, coins[0])
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.single_flight import SingleFlight, flight_key
+
+
+def test_flight_key_ignores_parameter_order():
+    assert flight_key("https://x/coins", {'b': 2, 'a': 1}) == flight_key("https://x/coins", {'a': 1, 'b': 2})
+    assert flight_key("https://x/coins?vs=usd", {'a': 1}) == "https://x/coins?vs=usd&a=1"
+    assert flight_key("https://x/coins") == "https://x/coins"
+
+
+def run_concurrently(group: SingleFlight, keys, fn):
+    """Call group.do for every key from its own thread while the first call is held in flight."""
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def held():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return fn()
+
+    with ThreadPoolExecutor(len(keys)) as pool:
+        leader = pool.submit(group.do, keys[0], held)
+        started.wait(5)
+        followers = [pool.submit(group.do, key, held) for key in keys[1:]]
+        while len(calls) + group.coalesced < len(keys):
+            time.sleep(0.001)  # every follower has joined the flight or started its own
+        release.set()
+        futures = [leader] + followers
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result(5))
+            except Exception as e:
+                outcomes.append(e)
+    return len(calls), outcomes
+
+
+def test_identical_concurrent_calls_run_once():
+    group = SingleFlight("test", enabled=True)
+
+    calls, results = run_concurrently(group, ["k"] * 5, lambda: {'price': 1})
+
+    assert calls == 1
+    assert results == [{'price': 1}] * 5
+    assert group.stats() == {'calls': 1, 'coalesced': 4}
+
+
+def test_different_keys_run_separately():
+    group = SingleFlight("test", enabled=True)
+
+    calls, _ = run_concurrently(group, ["a", "b"], lambda: 1)
+
+    assert calls == 2
+    assert group.stats() == {'calls': 2, 'coalesced': 0}
+
+
+def test_error_reaches_every_waiter_and_is_not_remembered():
+    group = SingleFlight("test", enabled=True)
+
+    def fail():
+        raise ValueError("CoinGecko down")
+
+    _, outcomes = run_concurrently(group, ["k"] * 3, fail)
+
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert group.do("k", lambda: "recovered") == "recovered"  # the next call starts a new flight
+
+
+def test_sequential_calls_are_not_coalesced():
+    group = SingleFlight("test", enabled=True)
+
+    assert [group.do("k", lambda: n) for n in range(3)] == [0, 1, 2]
+    assert group.stats() == {'calls': 3, 'coalesced': 0}
+
+
+def test_disabled_group_runs_every_call():
+    group = SingleFlight("test", enabled=False)
+
+    calls, _ = run_concurrently(group, ["k"] * 3, lambda: 1)
+
+    assert calls == 3
+
+
+def test_async_callers_share_one_flight():
+    group = SingleFlight("test", enabled=True)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "quote"
+
+    async def main():
+        return await asyncio.gather(*(group.do_async("k", fetch) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["quote"] * 4
+    assert len(calls) == 1
+
+
+def test_cancelled_async_waiter_does_not_cancel_the_flight():
+    group = SingleFlight("test", enabled=True)
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "quote"
+
+    async def main():
+        leader = asyncio.ensure_future(group.do_async("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(group.do_async("k", fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader
+
+    assert asyncio.run(main()) == "quote"
+
+
+def test_threads_and_event_loops_share_a_flight():
+    group = SingleFlight("test", enabled=True)
+    started, release = threading.Event(), threading.Event()
+
+    def held():
+        started.set()
+        release.wait(5)
+        return "quote"
+
+    async def follower():
+        return await group.do_async("k", lambda: asyncio.sleep(0, result="own call"))
+
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(group.do, "k", held)
+        started.wait(5)
+        threading.Timer(0.05, release.set).start()
+        assert asyncio.run(follower()) == "quote"
+        assert leader.result(5) == "quote"